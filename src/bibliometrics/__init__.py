@@ -23,3 +23,6 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 # 
+
+
+from .publications import Publication, PublicationTable, parsePublications
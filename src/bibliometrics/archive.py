@@ -0,0 +1,256 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# An archive of the pages retrieved from Scholar, stored once per distinct
+# content. Run with: python3 -m bibliometrics.archive --help, to export the
+# pages of a profile as of a time, for the offlineInput field.
+
+import argparse, gzip, hashlib, json, lzma, os, shutil, threading
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, parse_qs
+
+# The extensions of the objects by compression, which are also the ones
+# that the offlineInput field recognizes
+compressions = {
+    "gzip" : ".gz",
+    "lzma" : ".xz"
+}
+
+class PageArchive:
+    """A content-addressed archive of pages: each distinct page is stored
+    once, compressed, named by the SHA-256 hash of its content, such that
+    a page identical to one already archived only adds an entry to the
+    index. The index, a JSON Lines file, maps each profile ID and time
+    of retrieval to the hash of the page retrieved."""
+
+    __slots__ = [ '_directory', '_compression', '_lock' ]
+
+    def __init__(self, directory, compression="gzip"):
+        """Initializes the PageArchive.
+
+        Keyword arguments:
+        directory - the directory of the archive, which is created if
+            it doesn't exist
+        compression - the compression of the newly archived pages, either
+            "gzip" or "lzma"
+        """
+        if compression not in compressions:
+            raise ValueError("Unknown compression " + str(compression))
+        self._directory = directory
+        self._compression = compression
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True, mode=0o777)
+
+    def put(self, profileID, cstart, page, fetched=None):
+        """Archives a page, unless an identical page is already archived,
+        and adds it to the index. Returns the hash of the page.
+
+        Keyword arguments:
+        profileID - the Scholar profile ID
+        cstart - the index of the first publication on the page
+        page - the page as bytes
+        fetched - the time of retrieval as a datetime, or None for now
+        """
+        digest = hashlib.sha256(page).hexdigest()
+        if self.object_path(digest) == None:
+            filename = os.path.join(
+                self._directory,
+                "objects",
+                digest[:2],
+                digest + compressions[self._compression]
+            )
+            temp = filename + ".{0}.{1}.tmp".format(os.getpid(), threading.get_ident())
+            os.makedirs(os.path.dirname(filename), exist_ok=True, mode=0o777)
+            with open(temp, "wb") as f:
+                f.write(
+                    gzip.compress(page, mtime=0) if (
+                        self._compression == "gzip") else lzma.compress(page)
+                )
+            os.replace(temp, filename)
+        entry = {
+            "profile" : profileID,
+            "cstart" : cstart,
+            "fetched" : (fetched if fetched != None else datetime.now(timezone.utc)).isoformat(),
+            "sha256" : digest
+        }
+        with self._lock:
+            with open(os.path.join(self._directory, "index.jsonl"), "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        return digest
+
+    def get(self, digest):
+        """Gets an archived page as bytes, or None if it isn't archived.
+
+        Keyword arguments:
+        digest - the hash of the page
+        """
+        filename = self.object_path(digest)
+        if filename == None:
+            return None
+        with open(filename, "rb") as f:
+            page = f.read()
+        return gzip.decompress(page) if filename.endswith(".gz") else lzma.decompress(page)
+
+    def object_path(self, digest):
+        """Gets the filename of an archived page, compressed, or None if
+        it isn't archived.
+
+        Keyword arguments:
+        digest - the hash of the page
+        """
+        for extension in compressions.values():
+            filename = os.path.join(self._directory, "objects", digest[:2], digest + extension)
+            if os.path.isfile(filename):
+                return filename
+        return None
+
+    def entries(self, profileID=None):
+        """Gets the entries of the index, in the order in which they were
+        added, each a dict of the profile ID (profile), the index of the
+        first publication on the page (cstart), the time of retrieval as
+        an ISO 8601 string (fetched), and the hash of the page (sha256).
+
+        Keyword arguments:
+        profileID - the Scholar profile ID, or None for all profiles
+        """
+        try:
+            with open(os.path.join(self._directory, "index.jsonl"), "r") as f:
+                entries = [ json.loads(line) for line in f if len(line.strip()) > 0 ]
+        except OSError:
+            return []
+        return [ e for e in entries if profileID == None or e["profile"] == profileID ]
+
+    def page_paths(self, profileID, fetched=None, pagesize=100):
+        """Gets the filenames of the archived pages of a profile, in order,
+        as they were most recently retrieved as of a time: for each page,
+        from the first, the latest retrieved at or before that time, up to
+        the first page that wasn't.
+
+        Keyword arguments:
+        profileID - the Scholar profile ID
+        fetched - the time as a datetime, or None for the latest pages
+        pagesize - the number of publications per page
+        """
+        latest = {}
+        for e in self.entries(profileID):
+            if fetched == None or datetime.fromisoformat(e["fetched"]) <= fetched:
+                latest[e["cstart"]] = e["sha256"]
+        paths = []
+        while len(paths) * pagesize in latest:
+            filename = self.object_path(latest[len(paths) * pagesize])
+            if filename == None:
+                break
+            paths.append(filename)
+        return paths
+
+    def export(self, profileID, directory, fetched=None):
+        """Copies the archived pages of a profile, as they were most recently
+        retrieved as of a time, to a directory, as page1, page2, and so
+        forth, compressed, such that the offlineInput field can compute the
+        bibliometrics from them. Returns the number of pages copied.
+
+        Keyword arguments:
+        profileID - the Scholar profile ID
+        directory - the directory, which is created if it doesn't exist
+        fetched - the time as a datetime, or None for the latest pages
+        """
+        os.makedirs(directory, exist_ok=True, mode=0o777)
+        paths = self.page_paths(profileID, fetched)
+        for i, filename in enumerate(paths, start=1):
+            shutil.copyfile(
+                filename,
+                os.path.join(directory, "page{0}.html{1}".format(i, os.path.splitext(filename)[1]))
+            )
+        return len(paths)
+
+class ArchivingFetcher:
+    """Wraps a fetcher such that the body of every successful retrieval
+    of a page of a profile is added to a PageArchive."""
+
+    __slots__ = [ '_fetcher', '_archive' ]
+
+    def __init__(self, fetcher, archive):
+        """Initializes the ArchivingFetcher.
+
+        Keyword arguments:
+        fetcher - the fetcher for the requests
+        archive - the PageArchive
+        """
+        self._fetcher = fetcher
+        self._archive = archive
+
+    def fetch(self, url, headers, sink=None):
+        """Retrieves a page, archiving it if the response is a 200.
+        Returns a tuple of the status code, the response headers, and the
+        body as bytes.
+
+        Keyword arguments:
+        url - the url of the page
+        headers - a dict of the request headers
+        sink - an object that is passed the body of a 200 response, or
+            None; as the archive needs the complete body, the sink is
+            passed it all at once
+        """
+        response = self._fetcher.fetch(url, headers)
+        if response[0] == 200:
+            query = parse_qs(urlsplit(url).query)
+            try:
+                self._archive.put(
+                    query["user"][0] if "user" in query else "",
+                    int(query["cstart"][0]) if "cstart" in query else 0,
+                    response[2]
+                )
+            except OSError:
+                print("WARNING: An error occurred while writing to the page archive.")
+            if sink != None:
+                sink.feed(response[2])
+        return response
+
+    def close(self):
+        """Releases any resources held by the wrapped fetcher."""
+        self._fetcher.close()
+
+def main():
+    """Entry point for exporting archived pages."""
+    parser = argparse.ArgumentParser(
+        prog="python3 -m bibliometrics.archive",
+        description="Export the archived pages of a profile, as of a time, for the offlineInput field."
+    )
+    parser.add_argument("archive", help="the directory of the archive")
+    parser.add_argument("profile", help="the Scholar profile ID")
+    parser.add_argument("directory", help="the directory to which the pages are exported")
+    parser.add_argument("--as-of", default=None, help="ISO 8601 time, such as 2025-06-30T00:00:00+00:00, by default the latest")
+    args = parser.parse_args()
+    fetched = None
+    if args.as_of != None:
+        fetched = datetime.fromisoformat(args.as_of)
+        if fetched.tzinfo == None:
+            fetched = fetched.replace(tzinfo=timezone.utc)
+    count = PageArchive(args.archive).export(args.profile, args.directory, fetched)
+    print("Exported", count, "pages.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import math
+from datetime import datetime
+from .calculator import BibliometricCalculator, ixx_thresholds
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The most citations of a publication for which the vectorized calculator
+# packs the index of the profile and the citations into one sort key
+packed_max = 2**31 - 1
+
+def ragged(cites_lists):
+    """Packs the citations per publication of several profiles into a
+    ragged array. Returns a tuple of the flat list of the citations of all
+    of the profiles, in order, and the list of offsets into it, one more
+    than the number of profiles, such that the citations of profile i are
+    from offsets[i] up to offsets[i+1].
+
+    Keyword arguments:
+    cites_lists - a list of the lists of citations of the profiles
+    """
+    flat = []
+    offsets = [0]
+    for cites in cites_lists:
+        flat.extend(cites)
+        offsets.append(len(flat))
+    return flat, offsets
+
+class MetricsTable:
+    """The bibliometrics of many profiles, stored by column: a dict from
+    the key of each bibliometric to a list with its value for each profile,
+    or None for the profiles for which it isn't computed. Each row can be
+    retrieved as a dict, the same as BibliometricCalculator.to_dict."""
+
+    __slots__ = [ 'columns', '_size' ]
+
+    def __init__(self, size):
+        """Initializes an empty MetricsTable.
+
+        Keyword arguments:
+        size - the number of profiles
+        """
+        self.columns = {}
+        self._size = size
+
+    def set_column(self, key, values):
+        """Sets the column of a bibliometric, replacing any previous column.
+
+        Keyword arguments:
+        key - the key of the bibliometric
+        values - a list of its values, or None, for each profile
+        """
+        self.columns[key] = values
+
+    def set_value(self, key, i, value):
+        """Sets the value of a bibliometric for one profile.
+
+        Keyword arguments:
+        key - the key of the bibliometric
+        i - the index of the profile
+        value - the value
+        """
+        if key not in self.columns:
+            self.columns[key] = [ None ] * self._size
+        self.columns[key][i] = value
+
+    def to_dicts(self):
+        """Returns a list of the dicts of the bibliometrics of the profiles."""
+        return [ self[i] for i in range(self._size) ]
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, i):
+        return {
+            key : values[i] for key, values in self.columns.items() if values[i] is not None
+        }
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self[i]
+
+def calculate_batch(metrics, cites, offsets, years=None, limits=None, vectorized=None):
+    """Calculates the bibliometrics of many profiles at once, the same as
+    BibliometricCalculator does for each. If NumPy is installed, they are
+    computed with vectorized operations over all of the profiles, and
+    otherwise one profile at a time. Returns a MetricsTable.
+
+    Keyword arguments:
+    metrics - a list of the dicts of the metrics scraped from the profiles
+    cites - the citations per publication of all of the profiles, in order,
+        as a flat sequence (see ragged)
+    offsets - the offsets into cites of the citations of each profile,
+        one more than the number of profiles (see ragged)
+    years - a list of the year of the first publication of each profile,
+        or None in the list or in place of it if not provided
+    limits - a list of the maximum number of cited articles that could have
+        been scraped for each profile (see BibliometricCalculator), or None
+        in the list or in place of it if the citations are complete
+    vectorized - True to use NumPy, False not to, or None to use it if it
+        is installed
+    """
+    if len(offsets) != len(metrics) + 1:
+        raise ValueError("There must be one more offset than profiles.")
+    if years is None:
+        years = [ None ] * len(metrics)
+    if limits is None:
+        limits = [ None ] * len(metrics)
+    if vectorized is None:
+        vectorized = numpy is not None
+    if vectorized:
+        if numpy is None:
+            raise ImportError("The vectorized batch calculator requires NumPy.")
+        return _calculate_vectorized(metrics, cites, offsets, years, limits)
+    table = MetricsTable(len(metrics))
+    for i, scraped in enumerate(metrics):
+        segment = cites[offsets[i]:offsets[i+1]]
+        calc = BibliometricCalculator(
+            scraped,
+            segment.tolist() if hasattr(segment, "tolist") else list(segment),
+            years[i],
+            limits[i]
+        )
+        for key, value in calc.to_dict().items():
+            table.set_value(key, i, value)
+    return table
+
+def _calculate_vectorized(metrics, cites, offsets, years, limits):
+    """Calculates the bibliometrics of many profiles with NumPy, sorting the
+    citations of each profile, and computing the prefix sums of all of them,
+    at once. Returns a MetricsTable.
+
+    Keyword arguments:
+    metrics - a list of the dicts of the metrics scraped from the profiles
+    cites - the flat citations per publication of all of the profiles
+    offsets - the offsets into cites of the citations of each profile
+    years - a list of the year of the first publication of each profile
+    limits - a list of the limit of each profile, or None
+    """
+    size = len(metrics)
+    table = MetricsTable(size)
+    for i, scraped in enumerate(metrics):
+        for key, value in scraped.items():
+            table.set_value(key, i, value)
+    offsets = numpy.asarray(offsets, dtype=numpy.int64)
+    starts = offsets[:-1]
+    counts = numpy.diff(offsets)
+    flat = numpy.asarray(cites, dtype=numpy.int64)[offsets[0]:offsets[-1]]
+    starts = starts - offsets[0]
+    has_h = numpy.array([ "h-index" in m for m in metrics ], dtype=bool)
+    h = numpy.array([ m["h-index"] if "h-index" in m else 0 for m in metrics ], dtype=numpy.int64)
+
+    # m-quotient, for every profile with an h-index and a year
+    this_year = datetime.now().year
+    hList = h.tolist()
+    for i in range(size):
+        if has_h[i] and years[i]:
+            n = this_year - years[i]
+            m = hList[i] / n if n > 0 else 0
+            if m > 0:
+                table.set_value("m-quotient", i, "{0:.2f}".format(m))
+
+    if len(flat) == 0:
+        return table
+
+    # sort each profile's citations in decreasing order, all at once, by
+    # profile and then by decreasing citations, and compute the prefix sums
+    # within each profile
+    profile = numpy.repeat(numpy.arange(size, dtype=numpy.int64), counts)
+    if flat.min() >= 0 and flat.max() <= packed_max:
+        # packs both into one key, which sorts faster than two
+        keys = (profile << 32) | (packed_max - flat)
+        keys.sort()
+        sorted_cites = packed_max - (keys & 0xffffffff)
+    else:
+        sorted_cites = flat[numpy.lexsort((-flat, profile))]
+    rank = numpy.arange(1, len(flat) + 1, dtype=numpy.int64) - numpy.repeat(starts, counts)
+    prefix = numpy.cumsum(sorted_cites)
+    prefix -= numpy.repeat(numpy.concatenate(([0], prefix))[starts], counts)
+
+    nonempty = counts > 0
+    safe_starts = numpy.where(nonempty, starts, 0)
+    safe_ends = numpy.where(nonempty, starts + counts - 1, 0)
+    most = numpy.where(nonempty, sorted_cites[safe_starts], 0)
+    least = sorted_cites[safe_ends]
+    total = prefix[safe_ends]
+    active = has_h & nonempty & (most > 0)
+    complete = numpy.array([
+        limit is None or counts[i] < limit for i, limit in enumerate(limits)
+    ], dtype=bool)
+
+    def per_profile(values):
+        """Sums values over the publications of each profile."""
+        sums = numpy.zeros(size, dtype=numpy.int64)
+        sums[nonempty] = numpy.add.reduceat(values, starts[nonempty])
+        return sums
+
+    g = per_profile(numpy.where(prefix >= rank*rank, 1, 0))
+    w = per_profile(numpy.where(sorted_cites >= 10*rank, 1, 0))
+
+    # the h-core, from the prefix sums
+    h_core_sum = numpy.where(
+        (counts >= h) & (h > 0),
+        prefix[numpy.clip(starts + h - 1, 0, len(flat) - 1)],
+        0
+    )
+
+    mostList = most.tolist()
+    countsList = counts.tolist()
+    for i in numpy.flatnonzero(active).tolist():
+        table.set_value("most-cited", i, mostList[i])
+        table.set_value("o-index", i, round(math.sqrt(hList[i] * mostList[i])))
+    known = complete | ((total < counts*counts) & (least <= 2*counts + 1))
+    _set_column(table, "g-index", g, active & (g > 0) & known)
+    _set_h_median(table, sorted_cites, starts, countsList, hList, active)
+    e = numpy.sqrt(numpy.maximum(h_core_sum - h*h, 0))
+    _set_formatted(table, "e-index", e, active & (h_core_sum > h*h) & (e > 0))
+    r = numpy.sqrt(h_core_sum)
+    _set_formatted(table, "r-index", r, active & (r > 0))
+    a = h_core_sum / numpy.where(h > 0, h, 1)
+    _set_formatted(table, "a-index", a, active & (h > 0) & (a > 0))
+    for xx in ixx_thresholds.values():
+        ixx = per_profile(numpy.where(sorted_cites >= xx, 1, 0))
+        _set_column(table, "i{0}-index".format(xx), ixx, active & (ixx > 0) & (complete | (least < xx)))
+    _set_column(table, "w-index", w, active & (w > 0) & (complete | (least < 10*(counts + 1))))
+    return table
+
+def _set_column(table, key, values, mask):
+    """Sets the values of a bibliometric for the profiles selected by a mask.
+
+    Keyword arguments:
+    table - the MetricsTable
+    key - the key of the bibliometric
+    values - an array of its values for all of the profiles
+    mask - an array that is True for the profiles for which it is computed
+    """
+    values = values.tolist()
+    column = [ None ] * len(values)
+    for i in numpy.flatnonzero(mask).tolist():
+        column[i] = values[i]
+    table.set_column(key, column)
+
+def _set_formatted(table, key, values, mask):
+    """Sets the values of a bibliometric, formatted with two decimal places
+    as BibliometricCalculator does, for the profiles selected by a mask.
+
+    Keyword arguments:
+    table - the MetricsTable
+    key - the key of the bibliometric
+    values - an array of its values for all of the profiles
+    mask - an array that is True for the profiles for which it is computed
+    """
+    values = values.tolist()
+    column = [ None ] * len(values)
+    for i in numpy.flatnonzero(mask).tolist():
+        column[i] = "{0:.2f}".format(values[i])
+    table.set_column(key, column)
+
+def _set_h_median(table, sorted_cites, starts, counts, h, active):
+    """Sets the h-median of the profiles, from the citations at the middle
+    of each profile's h-core.
+
+    Keyword arguments:
+    table - the MetricsTable
+    sorted_cites - the citations of each profile, in decreasing order
+    starts - the offsets of the profiles into sorted_cites
+    counts - a list of the number of publications of each profile
+    h - a list of the h-index of each profile
+    active - an array that is True for the profiles with any citations
+    """
+    starts = starts.tolist()
+    for i in numpy.flatnonzero(active).tolist():
+        if h[i] <= 0:
+            continue
+        if h[i] % 2 == 0:
+            m1 = h[i] // 2
+            if m1 >= counts[i]:
+                continue
+            total = int(sorted_cites[starts[i] + m1 - 1]) + int(sorted_cites[starts[i] + m1])
+            median = total // 2 if total % 2 == 0 else total / 2
+        else:
+            m = h[i] // 2
+            median = int(sorted_cites[starts[i] + m]) if m < counts[i] else 0
+        if median > 0.0:
+            table.set_value("h-median", i, median if (
+                isinstance(median, int)) else "{0:.1f}".format(median))
@@ -0,0 +1,154 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# A harness that runs each of the parser backends over saved and synthetic
+# profile pages, and reports their throughput and whether their results
+# agree with those of the default backend. Run with:
+# python3 -m bibliometrics.benchmark --help
+
+import argparse, os, time
+from . import bibliometrics as bib
+from .loadtest import synthetic_profile, synthetic_profile_page
+from .parsers import parserBackends
+
+def synthetic_pages(count=4, publications=1000):
+    """Generates the first pages of synthetic profiles, as the undecoded
+    bytes of the responses, each listing all of its publications.
+
+    Keyword arguments:
+    count - the number of pages
+    publications - the number of publications on each page
+    """
+    return [
+        synthetic_profile_page(
+            "BENCH{0}".format(i),
+            synthetic_profile("BENCH{0}".format(i), publications),
+            0,
+            publications
+        ).encode("utf-8") for i in range(count)
+    ]
+
+def parse_page(parser, page):
+    """Parses a page with a parser backend, returning either its result,
+    or the exception that it raised.
+
+    Keyword arguments:
+    parser - the parser backend
+    page - the profile page
+    """
+    try:
+        return parser.scan(page)
+    except Exception as e:
+        return e
+
+def benchmark_parsers(pages, repeat=3, backends=None):
+    """Runs each parser backend over the pages, and measures its best time
+    of repeat runs over all of them. Returns a dict from the name of each
+    backend to a dict of its pages-per-second, megabytes-per-second, and
+    agreement, the fraction of the pages for which its result (or the
+    exception it raised) is the same as that of the scanner backend, along
+    with the indexes of the pages for which it disagrees.
+
+    Keyword arguments:
+    pages - the profile pages, each either a str or bytes-like
+    repeat - the number of runs of each backend over the pages
+    backends - a dict from names to parser backend classes, or None for
+        all of them
+    """
+    if backends == None:
+        backends = parserBackends
+    reference = [ parse_page(parserBackends["scanner"](), page) for page in pages ]
+    size = sum(len(page) for page in pages)
+    stats = {}
+    for name, backend in backends.items():
+        parser = backend()
+        best = None
+        for r in range(repeat):
+            start = time.perf_counter()
+            results = [ parse_page(parser, page) for page in pages ]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best == None else min(best, elapsed)
+        disagreements = [
+            i for i, (result, expected) in enumerate(zip(results, reference))
+            if not agree(result, expected)
+        ]
+        stats[name] = {
+            "pages-per-second" : len(pages) / best if best > 0 else float("inf"),
+            "megabytes-per-second" : size / 1e6 / best if best > 0 else float("inf"),
+            "agreement" : 1 - len(disagreements) / len(pages) if len(pages) > 0 else 1,
+            "disagreements" : disagreements
+        }
+    return stats
+
+def agree(result, expected):
+    """Checks if the result of a backend agrees with the expected result,
+    where two exceptions agree if they are of the same type.
+
+    Keyword arguments:
+    result - the result of the backend, or the exception it raised
+    expected - the expected result, or exception
+    """
+    if isinstance(result, Exception) or isinstance(expected, Exception):
+        return type(result) == type(expected)
+    return result == expected
+
+def main():
+    """Entry point for the parser benchmark."""
+    parser = argparse.ArgumentParser(
+        prog="python3 -m bibliometrics.benchmark",
+        description="Compare the throughput and agreement of the parser backends."
+    )
+    parser.add_argument("pages", nargs="*", help="saved profile pages, plain or gzip compressed, such as a sample of real traffic")
+    parser.add_argument("--testcase", default=os.path.join("tests", "testcase.html.txt"), help="saved profile page included if it exists")
+    parser.add_argument("--synthetic", type=int, default=4, help="number of synthetic pages")
+    parser.add_argument("--publications", type=int, default=1000, help="publications per synthetic page")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each backend, of which the fastest counts")
+    args = parser.parse_args()
+    filenames = list(args.pages)
+    if os.path.isfile(args.testcase):
+        filenames.insert(0, args.testcase)
+    pages = [ bib.readSavedPage(filename, True) for filename in filenames ]
+    pages.extend(synthetic_pages(args.synthetic, args.publications))
+    if len(pages) == 0:
+        print("No pages to parse.")
+        return
+    print("{0} pages, {1:.2f} MB".format(len(pages), sum(len(page) for page in pages) / 1e6))
+    print("{0:>8} {1:>12} {2:>10} {3:>10}".format("backend", "pages/s", "MB/s", "agreement"))
+    for name, stats in benchmark_parsers(pages, args.repeat).items():
+        print("{0:>8} {1:>12.1f} {2:>10.2f} {3:>10.2%}".format(
+            name,
+            stats["pages-per-second"],
+            stats["megabytes-per-second"],
+            stats["agreement"]
+        ))
+        for i in stats["disagreements"]:
+            print("{0:>8} disagrees on {1}".format(
+                "",
+                filenames[i] if i < len(filenames) else "synthetic page {0}".format(i - len(filenames))
+            ))
+
+if __name__ == "__main__":
+    main()
@@ -24,12 +24,22 @@
 # SOFTWARE.
 # 
 
-import sys, math, os, json
+import sys, math, os, json, gzip, lzma, re, hashlib, asyncio
 from datetime import date
-from urllib.request import urlopen, Request
-from urllib.error import HTTPError
+from concurrent.futures import ThreadPoolExecutor
+from http.client import responses
 from .text_length import calculateTextLength, calculateTextLength110Weighted
-from .calculator import BibliometricCalculator
+from .calculator import BibliometricCalculator, metric_dependencies
+from .incremental import IncrementalCalculator, state_filename
+from .scanner import StreamingPageParser, asMarker
+from .scanner import scanSummaryTable, scanCitesPerYear, scanPage, parse_cites_per_pub
+from .publications import parsePublications
+from .parsers import parserBackends
+from .fetch import UrllibFetcher, AsyncFetcher, chunkSize
+from .cache import CachingFetcher, ParseCache
+from .archive import ArchivingFetcher, PageArchive, compressions
+from .ratelimit import RateLimitedFetcher
+from .retry import RetryingFetcher, CircuitBreaker
 
 template = """<svg width="{0}" height="{1}" viewBox="0 0 {0} {1}" xmlns="http://www.w3.org/2000/svg" lang="en" xml:lang="en">
 <rect x="{2}" y="{2}" stroke-width="{3}" rx="{4}" width="{5}" height="{6}" stroke="{7}" fill="{8}"/>
@@ -56,7 +66,29 @@ lastUpdatedTemplate = """<g transform="translate({0}, {1})">
 <text lengthAdjust="spacingAndGlyphs" textLength="{3}" x="{4}" y="{5}">{6}</text>
 </g></g>"""
 
-urlTemplate = "https://scholar.google.com/citations?user={0}&pagesize=100"
+scholarURL = "https://scholar.google.com"
+
+urlTemplate = scholarURL + "/citations?user={0}&pagesize=100"
+
+pageUrlTemplate = urlTemplate + "&cstart={1}"
+
+pageSize = 100
+
+# Charsets in which the markup and digits of a page are ASCII, such that
+# the page can be parsed as bytes without decoding it
+asciiCompatibleCharsets = {
+    "utf-8",
+    "utf8",
+    "us-ascii",
+    "ascii",
+    "iso-8859-1",
+    "latin-1",
+    "windows-1252"
+}
+
+# The first bytes of gzip and xz (lzma) compressed saved pages
+gzipMagic = b"\x1f\x8b"
+xzMagic = b"\xfd7zXZ\x00"
 
 scholarLogoTemplate = """
 <svg x="{0}" y="{1}" width="{2}" height="{2}" viewBox="0 0 512 512"><path fill="#4285f4" d="M256 411.12L0 202.667 256 0z"/><path fill="#356ac3" d="M256 411.12l256-208.453L256 0z"/><circle fill="#a0c3ff" cx="256" cy="362.667" r="149.333"/><path fill="#76a7fa" d="M121.037 298.667c23.968-50.453 75.392-85.334 134.963-85.334s110.995 34.881 134.963 85.334H121.037z"/></svg>
@@ -72,7 +104,6 @@ def generateBibliometricsImage(metrics, colors, titleText, stats) :
     stats - a list of the keys of the metrics to include in the order to
         include them
     """
-    stats = [ key for key in stats if key in metrics ]
     titleSize = 18
     titleLineHeight = 2 * titleSize + 1
     textSize = 14
@@ -88,6 +119,8 @@ def generateBibliometricsImage(metrics, colors, titleText, stats) :
     stat_labels = {
         "total-cites" : "Total citations",
         "five-year-cites" : "Five-year citations",
+        "five-year-h-index" : "Five-year h-index",
+        "five-year-i10-index" : "Five-year i10-index",
         "most-cited" : "Most-cited paper",
         "h-index" : "h-index",
         "m-quotient" : "m-quotient",
@@ -104,6 +137,9 @@ def generateBibliometricsImage(metrics, colors, titleText, stats) :
         "a-index" : "a-index"
     }
 
+    # Only those that are numbers are included (e.g., not cites-per-year).
+    stats = [ key for key in stats if key in metrics and key in stat_labels ]
+
     lastUpdatedText = "Last updated: " + date.today().strftime("%d %B %Y")
     lastUpdatedLength = calculateTextLength(
         lastUpdatedText,
@@ -202,103 +238,75 @@ def scrapePage(page) :
     """Scrapes some bibliometrics from the scholar profile page.
 
     Keyword arguments:
-    page - The user profile page
-    """
-    metrics = {}
-    i = page.find("</td>")
-    if i < 0 :
-        return metrics
-    i += 5
-    endStat = page.find("</td>", i)
-    if endStat < 0 :
-        return metrics
-    startStat = page.rfind(">", i, endStat)
-    if startStat < 0 :
-        return metrics
-    totalCitations = page[startStat+1:endStat]
-    metrics["total-cites"] = int(totalCitations.strip())
-    i = endStat + 6
-    endStat = page.find("</td>", i)
-    if endStat < 0 :
-        return metrics
-    i += 5
-    startStat = page.rfind(">", i, endStat)
-    if startStat < 0 :
-        return metrics
-    fiveYearCitations = page[startStat+1:endStat]
-    metrics["five-year-cites"] = int(fiveYearCitations.strip())
-    i = endStat + 6
-    i = page.find("</td>", i+1)
-    if i < 0 :
-        return metrics
-    endStat = page.find("</td>", i+1)
-    if endStat < 0 :
-        return metrics
-    i += 5
-    startStat = page.rfind(">", i, endStat)
-    if startStat < 0 :
-        return metrics
-    h = page[startStat+1:endStat]
-    metrics["h-index"] = int(h.strip())
-    i = endStat + 6
-    i = page.find("</td>", i+1)
-    if i < 0 :
-        return metrics
-    i = i + 6
-    i = page.find("</td>", i+1)
-    if i < 0 :
-        return metrics
-    endStat = page.find("</td>", i+1)
-    if endStat < 0 :
-        return metrics
-    i += 5
-    startStat = page.rfind(">", i, endStat)
-    if startStat < 0 :
-        return metrics
-    i10 = page[startStat+1:endStat]
-    metrics["i10-index"] = int(i10.strip())
+    page - The user profile page, either a str or bytes-like
+    """
+    metrics, i = scanSummaryTable(page)
+    scanCitesPerYear(page, metrics, i)
     return metrics
-    
-def parseBibliometrics(page, year) :
+
+def parseBibliometrics(page, year, morePages=(), parser=None, stats=None, state=None) :
     """Parses a Scholar Profile for the bibliometrics.
 
     Keyword arguments:
-    page - The user profile page
+    page - The user profile page, either a str or bytes-like
     year - The year of the first publication, which will be None if user
         didn't provide in the configuration (i.e., this is not scraped
         from profile)
+    morePages - The subsequent pages of the user profile, in order, if
+        any were retrieved
+    parser - The parser backend for the pages (see getParser), or None
+        to scan them with scanPage and parse_cites_per_pub
+    stats - The keys of the bibliometrics to calculate, or None for all
+    state - An IncrementalCalculator with the citations per publication of
+        the prior run, which is updated to those of the pages, or None
     """
-    calc = BibliometricCalculator(
-        scrapePage(page),
-        parse_cites_per_pub(page),
-        year
+    scraped, citesList = scanPage(page) if parser == None else parser.scan(page)
+    for p in morePages :
+        citesList.extend(parse_cites_per_pub(p) if parser == None else parser.cites(p))
+    return calculateBibliometrics(
+        scraped,
+        citesList,
+        year,
+        pageSize * (1 + len(morePages)),
+        stats,
+        state
     )
-    metrics = calc.to_dict()
-    validateMetrics(metrics)
-    return metrics
-    
-def parse_cites_per_pub(page) :
-    """Parses the cites per publication for calculating g-index,
-    e-index, i100-index, etc.
+
+def calculateBibliometrics(scraped, citesList, year, limit, stats=None, state=None) :
+    """Calculates the bibliometrics from those scraped from the summary
+    table and the cites per publication.
 
     Keyword arguments:
-    page - The user profile page
+    scraped - The dict of bibliometrics scraped from the summary table
+    citesList - The list of cites per publication, in the order of the
+        profile, which is by decreasing citations
+    year - The year of the first publication, or None
+    limit - The maximum number of publications that the pages parsed
+        could have listed, such that citesList is known to be complete
+        if it is shorter
+    stats - The keys of the bibliometrics to calculate, along with those
+        that they depend on, or None for all
+    state - An IncrementalCalculator with the citations per publication of
+        the prior run, which is updated from the changes to those of
+        citesList rather than calculating from scratch, or None
     """
-    marker = "class=\"gsc_a_ac gs_ibl\">"
-    citesList = []
-    nextLeft = page.find(marker)
-    while nextLeft >= 0 :
-        nextLeft += len(marker)
-        right = page.find("</a>", nextLeft)
-        if right >= 0 :
-            cites = page[nextLeft:right].strip()
-            if len(cites) > 0 :
-                citesList.append(int(cites))
-        else :
-            right = nextLeft + 1
-        nextLeft = page.find(marker, right)
-    return citesList
-
+    if state != None :
+        state.update_to(
+            citesList,
+            scraped["h-index"] if "h-index" in scraped else None
+        )
+        metrics = state.calculate(scraped, year, limit, stats)
+    else :
+        metrics = BibliometricCalculator(
+            scraped,
+            citesList,
+            year,
+            limit,
+            stats
+        ).to_dict()
+    validateMetrics(metrics, stats)
+    return metrics
+    
 def outputImage(image, filename) :
     """Outputs the SVG to a file.
 
@@ -344,11 +352,7 @@ def outputJSON(filename, metrics) :
     """
     # Create the directory if it doesn't exist.
     directoryName = os.path.dirname(filename)
-    converted_metrics = {
-        key : (
-            float(value) if isinstance(value, str) else value
-            ) for key, value in metrics.items()
-    }
+    converted_metrics = convertMetrics(metrics)
     if len(directoryName) > 0 :
         os.makedirs(directoryName, exist_ok=True, mode=0o777)
     try:
@@ -359,6 +363,74 @@ def outputJSON(filename, metrics) :
         print("Error: An error occurred while writing the metrics to a json file.")
         exit(1)
 
+def convertMetrics(metrics) :
+    """Converts the bibliometrics to the form in which they are output
+    as JSON, with those formatted as strings (e.g., the e-index) as
+    floats.
+
+    Keyword arguments:
+    metrics - The dictionary of bibliometrics
+    """
+    return {
+        key : (
+            float(value) if isinstance(value, str) else value
+            ) for key, value in metrics.items()
+    }
+
+def pagesRecordFilename(jsonOutputFile) :
+    """Gets the filename of the record of the pages and configuration
+    that produced the outputs of a profile, which is kept next to its
+    JSON output.
+
+    Keyword arguments:
+    jsonOutputFile - The filename of the JSON output with path
+    """
+    return os.path.splitext(jsonOutputFile)[0] + ".pages.json"
+
+def pagesRecord(configuration, digests) :
+    """Computes the record of the pages and configuration that produce
+    the outputs of a profile.
+
+    Keyword arguments:
+    configuration - The configuration for the profile
+    digests - The list of the hashes of the pages, in order
+    """
+    return {
+        "configuration" : hashlib.sha256(
+            json.dumps(configuration, sort_keys=True).encode("utf-8")
+        ).hexdigest(),
+        "pages" : digests
+    }
+
+def outputPagesRecord(filename, record) :
+    """Outputs the record of the pages and configuration that produced
+    the outputs of a profile, or removes any previous record if the pages
+    weren't retrieved through the response cache.
+
+    Keyword arguments:
+    filename - The name of the record with path
+    record - The record, or None if there isn't one
+    """
+    try:
+        if record == None :
+            if os.path.isfile(filename) :
+                os.remove(filename)
+        else :
+            with open(filename, "w") as f :
+                json.dump(record, f)
+    except OSError:
+        print("WARNING: An error occurred while writing the record of the pages.")
+
+def outputsExist(configuration) :
+    """Checks if all of the output files of a profile exist.
+
+    Keyword arguments:
+    configuration - The configuration for the profile
+    """
+    return ("jsonOutputFile" not in configuration or os.path.isfile(
+        configuration["jsonOutputFile"])) and all(
+        os.path.isfile(colors["filename"]) for colors in configuration["svgConfig"])
+
 def readPreviousBibliometrics(filename) :
     """Reads the previous bibliometrics from the json file
     if it exists. Returns None if it doesn't exist or otherwise cannot be read.
@@ -374,29 +446,399 @@ def readPreviousBibliometrics(filename) :
             return None
     return None
 
-def getScholarProfilePage(profileID, user_agent='Mozilla/5.0') :
+def readSavedPage(filename, raw=False, parser=None) :
+    """Reads a saved page of a Scholar profile, which may be gzip or
+    xz (lzma) compressed.
+
+    Keyword arguments:
+    filename - The filename of the page with path
+    raw - If True, the page is returned as bytes without decoding it
+    parser - A StreamingPageParser that is fed the page in chunks, and
+        which is returned instead of the page, or None
+    """
+    try :
+        if parser != None :
+            with open(filename, "rb") as f :
+                magic = f.read(6)
+            with (
+                    gzip.open if magic[:2] == gzipMagic else
+                    lzma.open if magic == xzMagic else open
+                    )(filename, "rb") as f :
+                while True :
+                    chunk = f.read(chunkSize)
+                    if not chunk or not parser.feed(chunk) :
+                        break
+            parser.close()
+            return parser
+        with open(filename, "rb") as f :
+            page = decompressPage(f.read())
+        return page if raw else page.decode("utf-8")
+    except (OSError, EOFError, lzma.LZMAError, UnicodeDecodeError) :
+        print("Error while reading saved page", filename)
+        exit(1)
+
+def decompressPage(page) :
+    """Decompresses a saved page if it is gzip or xz (lzma) compressed,
+    and otherwise returns it as is.
+
+    Keyword arguments:
+    page - The saved page, as bytes-like
+    """
+    if page[:2] == gzipMagic :
+        return gzip.decompress(page)
+    if page[:6] == xzMagic :
+        return lzma.decompress(page)
+    return page
+
+def readSavedPages(path, raw=False, streaming=False) :
+    """Reads the saved pages of a Scholar profile, either from a file
+    with a single page or from a directory of pages, ordered by the
+    numbers in their filenames (e.g., page2 before page10). Returns a
+    list of the pages in order.
+
+    Keyword arguments:
+    path - The file or directory with path
+    raw - If True, the pages are returned as bytes without decoding them
+    streaming - If True, each page is parsed in chunks as it is read, and
+        a list of the StreamingPageParsers is returned instead of the pages
+    """
+    if os.path.isfile(path) :
+        return [ readSavedPage(path, raw, StreamingPageParser() if streaming else None) ]
+    if not os.path.isdir(path) :
+        print("Saved pages", path, "not found.")
+        exit(1)
+    filenames = sorted(
+        (name for name in os.listdir(path) if (
+            os.path.isfile(os.path.join(path, name)) and not name.startswith("."))),
+        key=lambda name : [
+            int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)
+        ]
+    )
+    if len(filenames) == 0 :
+        print("No saved pages found in", path)
+        exit(1)
+    return [
+        readSavedPage(
+            os.path.join(path, name),
+            raw,
+            StreamingPageParser() if streaming else None
+        ) for name in filenames
+    ]
+
+def getFetcher(configuration) :
+    """Gets the fetcher for the requests, as configured by the
+    fetchBackend field, either "urllib" (default) or "asyncio", the
+    latter of which reuses connections and is limited to fetchConcurrency
+    requests at a time (default 8). The requests are limited to a rate of
+    requestsPerSecond, in bursts of up to burst requests (default 1), with
+    at most maxPerHost requests in progress to a host, and each is delayed
+    by a random time of up to jitter seconds (default 0). If the retries
+    field is set, transient failures are retried, after retryBackoff seconds
+    (default 1) doubling with each retry up to maxRetryBackoff (default 60).
+    If the breakerThreshold field is set, all requests pause for breakerPause
+    seconds (default 60) once that fraction of the last breakerWindow
+    (default 20) requests failed. If the archiveDirectory field is set, the
+    pages retrieved are added to an archive in that directory, compressed
+    as set by the archiveCompression field, either "gzip" (default) or
+    "lzma". If the cacheDirectory field is set, the responses are cached
+    in that directory, with a time-to-live in seconds set by the cacheTTL
+    field (default 0), and responses from the cache are neither rate
+    limited, retried, nor archived again.
+
+    Keyword arguments:
+    configuration - The configuration
+    """
+    fetcher = getBackendFetcher(configuration)
+    if "requestsPerSecond" in configuration or "maxPerHost" in configuration or (
+            "jitter" in configuration) :
+        fetcher = RateLimitedFetcher(
+            fetcher,
+            configuration["requestsPerSecond"] if "requestsPerSecond" in configuration else None,
+            configuration["burst"] if "burst" in configuration else 1,
+            configuration["maxPerHost"] if "maxPerHost" in configuration else None,
+            configuration["jitter"] if "jitter" in configuration else 0
+        )
+    if "retries" in configuration or "breakerThreshold" in configuration :
+        fetcher = RetryingFetcher(
+            fetcher,
+            configuration["retries"] if "retries" in configuration else 0,
+            configuration["retryBackoff"] if "retryBackoff" in configuration else 1,
+            configuration["maxRetryBackoff"] if "maxRetryBackoff" in configuration else 60,
+            CircuitBreaker(
+                configuration["breakerThreshold"],
+                configuration["breakerWindow"] if "breakerWindow" in configuration else 20,
+                configuration["breakerPause"] if "breakerPause" in configuration else 60
+            ) if "breakerThreshold" in configuration else None
+        )
+    if "archiveDirectory" in configuration :
+        compression = configuration["archiveCompression"].lower() if (
+            "archiveCompression" in configuration) else "gzip"
+        if compression not in compressions :
+            print("Unknown archiveCompression", configuration["archiveCompression"])
+            print("Exiting....")
+            exit(1)
+        fetcher = ArchivingFetcher(
+            fetcher,
+            PageArchive(configuration["archiveDirectory"], compression)
+        )
+    if "cacheDirectory" in configuration :
+        return CachingFetcher(
+            fetcher,
+            configuration["cacheDirectory"],
+            configuration["cacheTTL"] if "cacheTTL" in configuration else 0
+        )
+    return fetcher
+
+def getBackendFetcher(configuration) :
+    """Gets the fetcher for the requests, as configured by the
+    fetchBackend field.
+
+    Keyword arguments:
+    configuration - The configuration
+    """
+    backend = configuration["fetchBackend"].lower() if (
+        "fetchBackend" in configuration) else "urllib"
+    if backend == "asyncio" :
+        return AsyncFetcher(
+            configuration["fetchConcurrency"] if (
+                "fetchConcurrency" in configuration) else 8
+        )
+    if backend != "urllib" :
+        print("Unknown fetchBackend", configuration["fetchBackend"])
+        print("Exiting....")
+        exit(1)
+    return UrllibFetcher()
+
+def getParserName(configuration) :
+    """Gets the name of the parser backend for the profile pages, as
+    configured by the parser field, with a default of "scanner".
+
+    Keyword arguments:
+    configuration - The configuration
+    """
+    return configuration["parser"].lower() if "parser" in configuration else "scanner"
+
+def getParser(configuration) :
+    """Gets the parser backend for the profile pages, as configured by
+    the parser field, either "scanner" (default), which scans for the
+    markers of the bibliometrics, "regex", which matches compiled regular
+    expressions, or "html", which parses the structure of the page with
+    html.parser.
+
+    Keyword arguments:
+    configuration - The configuration
+    """
+    name = getParserName(configuration)
+    if name not in parserBackends :
+        print("Unknown parser", configuration["parser"])
+        print("Exiting....")
+        exit(1)
+    return parserBackends[name]()
+
+def getProfilePageUrl(profileID, cstart=0, baseUrl=None) :
+    """Gets the url of a page of the Scholar profile.
+
+    Keyword arguments:
+    profileID - Scholar profile ID
+    cstart - The index of the first publication on the page
+    baseUrl - The scheme and host of a server standing in for Scholar,
+        or None for Scholar itself
+    """
+    url = pageUrlTemplate.format(profileID, cstart) if (
+        cstart > 0) else urlTemplate.format(profileID)
+    if baseUrl != None :
+        url = baseUrl.rstrip("/") + url[len(scholarURL):]
+    return url
+
+def getScholarProfilePage(profileID, user_agent='Mozilla/5.0', cstart=0, fetcher=None, baseUrl=None, raw=False, parser=None) :
     """Gets the Scholar profile page.
 
     Keyword arguments:
     profileID - Scholar profile ID
+    user_agent - The user-agent string for the request
+    cstart - The index of the first publication on the page
+    fetcher - The fetcher for the request, or None for a UrllibFetcher
+    baseUrl - The scheme and host of a server standing in for Scholar,
+        or None for Scholar itself
+    raw - If True, the page is returned as the undecoded bytes of the
+        response, provided that its charset is ASCII-compatible
+    parser - A StreamingPageParser that is fed the page as it arrives,
+        and which is returned instead of the page, or None
     """
-    url = urlTemplate.format(profileID)
-    try :
-        with urlopen(Request(url, headers={'User-Agent' : user_agent})) as response :
-            return response.read().decode(response.headers.get_content_charset())
-    except HTTPError as e:
+    url = getProfilePageUrl(profileID, cstart, baseUrl)
+    if fetcher == None :
+        fetcher = UrllibFetcher()
+    requestHeaders = {'User-Agent' : user_agent}
+    status, headers, body = fetcher.fetch(url, requestHeaders) if (
+        parser == None) else fetcher.fetch(url, requestHeaders, parser)
+    return readProfilePageResponse(status, headers, body, raw, parser)
+
+def readProfilePageResponse(status, headers, body, raw=False, parser=None) :
+    """Gets the Scholar profile page from the response to its request.
+
+    Keyword arguments:
+    status - The status code of the response
+    headers - The headers of the response
+    body - The body of the response as bytes
+    raw - If True, the page is returned as the undecoded bytes of the
+        response, provided that its charset is ASCII-compatible
+    parser - The StreamingPageParser that was fed the page as it arrived,
+        and which is returned instead of the page, or None
+    """
+    if status != 200 :
         print("ERROR: Failed to retrieve the profile page!")
-        print(e.status)
-        print(e.reason)
-        print(e.headers)
+        print(status)
+        print(responses[status] if status in responses else "")
+        print(headers)
         print("Exiting....")
         exit(1)
+    if parser != None :
+        parser.close()
+        return parser
+    charset = headers.get_content_charset("utf-8")
+    if raw and charset.lower() in asciiCompatibleCharsets :
+        return body
+    return body.decode(charset)
+
+def getScholarProfilePages(profileID, user_agent='Mozilla/5.0', maxPages=1, workers=4, stats=None, fetcher=None, baseUrl=None, raw=False, streaming=False) :
+    """Gets the pages of the Scholar profile, following the cstart
+    offsets until a page that is not full, maxPages pages, or, if stats
+    is provided, enough pages for the bibliometrics in stats. The first
+    page is retrieved on its own. If stats is provided, each later page
+    is requested once the pages before it show that more may be needed,
+    with the page after it requested speculatively (if workers is more
+    than 1), such that at most one page is requested needlessly.
+    Otherwise, the remaining pages are retrieved concurrently, up to
+    workers pages at a time. Returns a list of the pages in order.
+
+    Keyword arguments:
+    profileID - Scholar profile ID
+    user_agent - The user-agent string for the requests
+    maxPages - The maximum number of pages to retrieve
+    workers - The maximum number of concurrent requests, or with stats,
+        1 to retrieve the pages one at a time
+    stats - A list of the keys of the bibliometrics that are needed, or
+        None to retrieve all pages up to maxPages
+    fetcher - The fetcher for the requests, or None for a UrllibFetcher
+    baseUrl - The scheme and host of a server standing in for Scholar,
+        or None for Scholar itself
+    raw - If True, the pages are returned as the undecoded bytes of the
+        responses where possible
+    streaming - If True, each page is parsed as it arrives, and a list of
+        the StreamingPageParsers is returned instead of the pages; the
+        retrieval of a page stops early once the bibliometrics in stats
+        are determined by it and the pages before it
+    """
+    citesList = []
+    pagesParsed = []
+
+    def getPage(i) :
+        if not streaming :
+            return getScholarProfilePage(profileID, user_agent, i * pageSize, fetcher, baseUrl, raw)
+        # the page can stop early only once all prior pages are parsed
+        stop = (lambda metrics, cites : len(pagesParsed) == i and (
+            not BibliometricCalculator.needs_more_data(
+                metrics if i == 0 else pagesParsed[0].metrics,
+                citesList + cites,
+                stats))) if stats != None else None
+        return getScholarProfilePage(
+            profileID,
+            user_agent,
+            i * pageSize,
+            fetcher,
+            baseUrl,
+            raw,
+            StreamingPageParser(stop))
+
+    pages = [ getPage(0) ]
+    scraped = None if stats == None else (
+        pages[0].metrics if streaming else scrapePage(pages[0]))
+
+    def isLastPage(page) :
+        pageCites = page.cites if streaming else parse_cites_per_pub(page)
+        citesList.extend(pageCites)
+        pagesParsed.append(page)
+        return (streaming and page.stopped) or len(pageCites) < pageSize or (
+            stats != None and not BibliometricCalculator.needs_more_data(
+                scraped, citesList, stats))
+
+    if maxPages <= 1 or isLastPage(pages[0]) :
+        return pages
+    if stats != None :
+        with ThreadPoolExecutor(max_workers=2) as executor :
+            requested = { 1 : executor.submit(getPage, 1) }
+            while True :
+                i = len(pages)
+                if workers > 1 and i + 1 < maxPages and i + 1 not in requested :
+                    requested[i + 1] = executor.submit(getPage, i + 1)
+                pages.append(requested.pop(i).result())
+                if isLastPage(pages[-1]) or len(pages) >= maxPages :
+                    return pages
+    with ThreadPoolExecutor(max_workers=workers) as executor :
+        while len(pages) < maxPages :
+            batch = range(len(pages), min(maxPages, len(pages) + workers))
+            for page in executor.map(getPage, batch) :
+                pages.append(page)
+                if isLastPage(page) :
+                    return pages
+    return pages
+
+async def getScholarProfilePagesAsync(profileID, user_agent, maxPages, stats, fetcher, baseUrl=None, raw=False, streaming=False) :
+    """Gets the pages of the Scholar profile, as getScholarProfilePages
+    does, but as a coroutine within the event loop of an AsyncFetcher,
+    such that many profiles are retrieved concurrently without a thread
+    each. Each page is requested once the pages before it show that more
+    are needed. Returns a list of the pages in order.
+
+    Keyword arguments:
+    profileID - Scholar profile ID
+    user_agent - The user-agent string for the requests
+    maxPages - The maximum number of pages to retrieve
+    stats - A list of the keys of the bibliometrics that are needed, or
+        None to retrieve all pages up to maxPages
+    fetcher - The AsyncFetcher for the requests
+    baseUrl - The scheme and host of a server standing in for Scholar,
+        or None for Scholar itself
+    raw - If True, the pages are returned as the undecoded bytes of the
+        responses where possible
+    streaming - If True, each page is parsed as it arrives, and a list of
+        the StreamingPageParsers is returned instead of the pages
+    """
+    citesList = []
+    pages = []
+    scraped = None
+    while len(pages) < maxPages :
+        parser = None
+        if streaming :
+            parser = StreamingPageParser((lambda metrics, cites : (
+                not BibliometricCalculator.needs_more_data(
+                    metrics if scraped == None else scraped,
+                    citesList + cites,
+                    stats))) if stats != None else None)
+        status, headers, body = await fetcher.request(
+            getProfilePageUrl(profileID, len(pages) * pageSize, baseUrl),
+            {'User-Agent' : user_agent},
+            parser
+        )
+        page = readProfilePageResponse(status, headers, body, raw, parser)
+        pages.append(page)
+        if scraped == None and stats != None :
+            scraped = page.metrics if streaming else scrapePage(page)
+        pageCites = page.cites if streaming else parse_cites_per_pub(page)
+        citesList.extend(pageCites)
+        if (streaming and page.stopped) or len(pageCites) < pageSize or (
+                stats != None and not BibliometricCalculator.needs_more_data(
+                    scraped, citesList, stats)) :
+            break
+    return pages
 
-def validateMetrics(metrics):
+def validateMetrics(metrics, stats=None):
     """Checks for parsing errors.
 
     Keyword arguments:
     metrics - The parsed and computed bibliometrics
+    stats - The keys of the bibliometrics that were calculated, or None
+        if all were, such that only those are warned about
     """
     valid = True
     if "total-cites" not in metrics:
@@ -411,56 +853,87 @@ def validateMetrics(metrics):
     if "i10-index" not in metrics:
         valid = False
         print("ERROR: Failed to parse i10-index.")
-    if "g-index" not in metrics :
+    if "g-index" not in metrics and (stats == None or "g-index" in stats) :
         print("WARNING: Failed to parse data needed to compute g-index.")
-    if "h-median" not in metrics:
+    if "h-median" not in metrics and (stats == None or "h-median" in stats) :
         print("WARNING: Failed to parse data needed to compute h-median.")
-    if "e-index" not in metrics:
+    if "e-index" not in metrics and (stats == None or "e-index" in stats) :
         print("WARNING: Failed to parse data needed to compute e-index.")
-    if "r-index" not in metrics:
+    if "r-index" not in metrics and (stats == None or "r-index" in stats) :
         print("WARNING: Failed to parse data needed to compute R-index.")
-    if "a-index" not in metrics:
+    if "a-index" not in metrics and (stats == None or "a-index" in stats) :
         print("WARNING: Failed to parse data needed to compute A-index.")
-    if "most-cited" not in metrics:
+    if "most-cited" not in metrics and (stats == None or "most-cited" in stats) :
         print("WARNING: Failed to parse data needed to compute most-cited paper.")
-    if "w-index" not in metrics:
+    if "w-index" not in metrics and (stats == None or "w-index" in stats) :
         print("WARNING: Failed to parse data needed to compute w-index.")
-    if "o-index" not in metrics:
+    if "o-index" not in metrics and (stats == None or "o-index" in stats) :
         print("WARNING: Failed to parse data needed to compute o-index.")
     if not valid :
         print("Exiting....")
         exit(1)
 
-def main() :
-    """Entry point for the utility."""
-    configuration = getConfiguration(".bibliometrics.config.json")
-
-    previousMetrics = readPreviousBibliometrics(
-        configuration["jsonOutputFile"]) if "jsonOutputFile" in configuration else None
+def isMQuotientCurrent(previousMetrics, year) :
+    """Checks if the m-quotient of the bibliometrics from the prior run
+    is still current, which depends upon the year (the other bibliometrics
+    depend only upon the profile).
 
-    scholarID = os.environ["SCHOLAR_ID"] if "SCHOLAR_ID" in os.environ else None
-    if scholarID == None :
-        if "scholarID" in configuration :
-            scholarID = configuration["scholarID"]
+    Keyword arguments:
+    previousMetrics - The bibliometrics from the prior run
+    year - The year of the first publication, or None if not configured
+    """
+    if "h-index" not in previousMetrics :
+        return False
+    m = BibliometricCalculator(
+        { "h-index" : previousMetrics["h-index"] },
+        [],
+        year
+    ).to_dict()
+    return (float(m["m-quotient"]) if "m-quotient" in m else None) == (
+        previousMetrics["m-quotient"] if "m-quotient" in previousMetrics else None)
 
-    if scholarID == None :
-        print("No Scholar ID provided.")
-        print("Set either via SCHOLAR_ID environment variable or scholarID field in config file.")
-        print("Exiting....")
-        exit(1)
+def getUserAgent(configuration) :
+    """Gets the user-agent string for the requests, either from the
+    USER_AGENT_BIB environment variable or the userAgent field of the
+    configuration, with a default of Mozilla/5.0 if neither is set.
 
-    user_agent = os.environ["USER_AGENT_BIB"] if (
+    Keyword arguments:
+    configuration - The configuration
+    """
+    return os.environ["USER_AGENT_BIB"] if (
         "USER_AGENT_BIB" in os.environ) else (
             configuration["userAgent"] if (
                 "userAgent" in configuration) else 'Mozilla/5.0')
 
-    page = getScholarProfilePage(scholarID, user_agent)
+def getProfileConfigurations(configuration) :
+    """Gets the configurations of the profiles of a batch configuration,
+    where each profile's fields override those at the top-level.
 
-    metrics = parseBibliometrics(
-        page,
-        configuration["firstPubYear"] if "firstPubYear" in configuration else None
-    )
-    
+    Keyword arguments:
+    configuration - The batch configuration, with a list of profile
+        configurations in the field "profiles"
+    """
+    defaults = {
+        key : value for key, value in configuration.items() if (
+            key not in ("profiles", "workers"))
+    }
+    profiles = []
+    for profile in configuration["profiles"] :
+        profileConfiguration = dict(defaults)
+        profileConfiguration.update(profile)
+        profiles.append(profileConfiguration)
+    return profiles
+
+def getProfileStats(configuration) :
+    """Gets the bibliometrics of a profile that are output. Returns a
+    tuple of the list of the keys of the bibliometrics in the SVGs
+    without their own include field, in order, the set of those in any
+    of the SVGs, the set of those to calculate (or None for all of them),
+    and the set of those that determine the pages retrieved.
+
+    Keyword arguments:
+    configuration - The configuration for the profile
+    """
     # default metrics in default order
     stats = [
         "total-cites",
@@ -485,7 +958,132 @@ def main() :
     if "include" in configuration :
         stats = [ key.lower() for key in configuration["include"] ]
 
-    if previousMetrics != metrics :
+    # the bibliometrics included in any of the SVGs
+    neededStats = set()
+    for colors in configuration["svgConfig"] :
+        neededStats.update([
+            key.lower() for key in colors["include"]
+            ] if "include" in colors else stats)
+
+    # Only the bibliometrics in the SVGs are needed, unless all of them
+    # are output to the JSON file. These determine the pages retrieved,
+    # where a streamed page stops, and the bibliometrics calculated. The
+    # retrieval for the JSON output still stops early, once all of the
+    # bibliometrics that depend on the cites per publication are known.
+    calculated = None if "jsonOutputFile" in configuration else neededStats
+    retrieved = set(metric_dependencies) if calculated == None else calculated
+    return stats, neededStats, calculated, retrieved
+
+def processProfile(configuration, scholarID, user_agent, fetcher=None, pages=None) :
+    """Retrieves a Scholar profile, computes the bibliometrics, and
+    outputs the JSON and the SVGs.
+
+    Keyword arguments:
+    configuration - The configuration for the profile, which may
+        specify saved pages via the offlineInput field, in which case
+        they are used instead of retrieving the profile
+    scholarID - Scholar profile ID
+    user_agent - The user-agent string for the requests
+    fetcher - The fetcher for the requests, or None for a UrllibFetcher
+    pages - The pages of the profile, if already retrieved (see
+        getScholarProfilePagesAsync), or None to retrieve them
+    """
+    previousMetrics = readPreviousBibliometrics(
+        configuration["jsonOutputFile"]) if "jsonOutputFile" in configuration else None
+
+    stats, neededStats, calculated, retrieved = getProfileStats(configuration)
+
+    baseUrl = configuration["scholarURL"] if "scholarURL" in configuration else None
+
+    streaming = "streamingParser" in configuration and configuration["streamingParser"]
+    parser = getParser(configuration)
+
+    # The pages are kept as undecoded bytes, which the parser scans
+    # directly, avoiding a decoded copy of every page. If streaming,
+    # each page is instead parsed as it arrives, and never kept.
+    if pages != None :
+        pass
+    elif "offlineInput" in configuration :
+        pages = readSavedPages(configuration["offlineInput"], True, streaming)
+    else :
+        pages = getScholarProfilePages(
+            scholarID,
+            user_agent,
+            configuration["maxPages"] if "maxPages" in configuration else 1,
+            configuration["fetchWorkers"] if "fetchWorkers" in configuration else 4,
+            retrieved,
+            fetcher,
+            baseUrl,
+            True,
+            streaming
+        )
+
+    year = configuration["firstPubYear"] if "firstPubYear" in configuration else None
+
+    # The hashes of the pages, if retrieved through the response cache,
+    # which are recorded with the outputs that they produced.
+    digests = [
+        fetcher.digest(getProfilePageUrl(scholarID, i * pageSize, baseUrl))
+        for i in range(len(pages))
+        ] if "offlineInput" not in configuration and (
+            isinstance(fetcher, CachingFetcher)) else None
+    record = pagesRecord(configuration, digests) if digests != None and (
+        "jsonOutputFile" in configuration) else None
+
+    # If the cache reports every page unchanged since the prior run, and
+    # the outputs exist and were produced from those pages with the same
+    # configuration, then so are the bibliometrics, so skip parsing and
+    # output altogether.
+    if previousMetrics != None and record != None and all(
+            fetcher.is_unchanged(getProfilePageUrl(scholarID, i * pageSize, baseUrl))
+            for i in range(len(pages))) and isMQuotientCurrent(previousMetrics, year) and (
+            outputsExist(configuration)) and record == readPreviousBibliometrics(
+            pagesRecordFilename(configuration["jsonOutputFile"])) :
+        return
+
+    # The sorted citations per publication of the prior run, kept next to
+    # the JSON output, are updated from the publications whose citations
+    # changed, rather than calculating the bibliometrics from scratch.
+    state = None
+    if "incremental" in configuration and configuration["incremental"] and (
+            "jsonOutputFile" in configuration) :
+        stateFile = state_filename(configuration["jsonOutputFile"])
+        state = IncrementalCalculator.load(stateFile)
+        if state == None :
+            state = IncrementalCalculator()
+
+    if streaming :
+        citesList = [ cites for parser in pages for cites in parser.cites ]
+        metrics = calculateBibliometrics(
+            pages[0].metrics,
+            citesList,
+            year,
+            # a page that stopped early may have had more publications
+            len(citesList) if pages[-1].stopped else pageSize * len(pages),
+            calculated,
+            state
+        )
+    elif "parseCacheDirectory" in configuration :
+        # Identical pages give identical bibliometrics with the same parser
+        # backend, so parse them only if they aren't in the cache.
+        parseCache = ParseCache(configuration["parseCacheDirectory"])
+        key = parseCache.key(pages, year, calculated, getParserName(configuration))
+        metrics = parseCache.get(key)
+        if metrics == None :
+            metrics = parseBibliometrics(pages[0], year, pages[1:], parser, calculated, state)
+            parseCache.put(key, metrics)
+        else :
+            # The state wasn't updated, so there is nothing to save, and
+            # the next run updates it from the changes since the state's
+            # own run instead.
+            state = None
+    else :
+        metrics = parseBibliometrics(pages[0], year, pages[1:], parser, calculated, state)
+
+    if state != None :
+        state.save(stateFile)
+
+    if previousMetrics != metrics or not outputsExist(configuration) :
         if "jsonOutputFile" in configuration :
             outputJSON(configuration["jsonOutputFile"], metrics)
             
@@ -500,3 +1098,141 @@ def main() :
                 stats_to_include
             )
             outputImage(image, colors["filename"])
+
+    # The record is written last, such that it only matches outputs that
+    # were written completely.
+    if "jsonOutputFile" in configuration :
+        outputPagesRecord(
+            pagesRecordFilename(configuration["jsonOutputFile"]),
+            record
+        )
+
+def processBatch(configuration, fetcher=None) :
+    """Processes all of the profiles of a batch configuration, up to
+    the number in the "workers" field (default 4) at a time. Each profile
+    is processed in its own thread, such that the parsing, calculations,
+    and output of some profiles overlap the retrieval of others. All of
+    the profiles share the same fetcher, and thus with the asyncio
+    backend, the same connections. With the asyncio backend, without any
+    rate limits, retries, archive, or cache wrapping it, the profiles are
+    instead all retrieved concurrently as coroutines in its event loop
+    (limited by its fetchConcurrency), and only their parsing,
+    calculations, and output take up the workers threads.
+
+    Keyword arguments:
+    configuration - The batch configuration, with a list of profile
+        configurations in the field "profiles"
+    fetcher - The fetcher for the requests, or None for the fetcher
+        specified by the configuration
+    """
+    profiles = getProfileConfigurations(configuration)
+    for profile in profiles :
+        if "scholarID" not in profile and "offlineInput" not in profile :
+            print("No Scholar ID provided for one of the profiles.")
+            print("Set the scholarID field of each of the profiles in the config file.")
+            print("Exiting....")
+            exit(1)
+    ownFetcher = fetcher == None
+    if ownFetcher :
+        fetcher = getFetcher(configuration)
+    try :
+        with ThreadPoolExecutor(
+                max_workers=configuration["workers"] if "workers" in configuration else 4
+                ) as executor :
+            if isinstance(fetcher, AsyncFetcher) :
+                processed = fetcher.run(processProfilesAsync(profiles, fetcher, executor))
+                if not all(processed) :
+                    exit(1)
+                return
+            futures = [
+                executor.submit(
+                    processProfile,
+                    profile,
+                    profile["scholarID"] if "scholarID" in profile else None,
+                    getUserAgent(profile),
+                    fetcher) for profile in profiles
+            ]
+            for future in futures :
+                future.result()
+    finally :
+        if ownFetcher :
+            fetcher.close()
+
+async def processProfilesAsync(profiles, fetcher, executor) :
+    """Processes all of the profiles concurrently as coroutines within the
+    event loop of an AsyncFetcher (see processProfileAsync). Returns a list
+    of whether each of the profiles succeeded.
+
+    Keyword arguments:
+    profiles - The list of the configurations of the profiles
+    fetcher - The AsyncFetcher for the requests
+    executor - The executor for the parsing, calculations, and output
+    """
+    return await asyncio.gather(*(
+        processProfileAsync(profile, fetcher, executor) for profile in profiles
+    ))
+
+async def processProfileAsync(configuration, fetcher, executor) :
+    """Retrieves a Scholar profile as a coroutine within the event loop of
+    an AsyncFetcher, and then computes the bibliometrics and outputs the
+    JSON and the SVGs in a thread of the executor. Returns False if the
+    profile failed, with its error already printed, and otherwise True.
+
+    Keyword arguments:
+    configuration - The configuration for the profile
+    fetcher - The AsyncFetcher for the requests
+    executor - The executor for the parsing, calculations, and output
+    """
+    scholarID = configuration["scholarID"] if "scholarID" in configuration else None
+    # A SystemExit would stop the event loop, so it ends the coroutine
+    # instead, and the batch once all of the profiles are done.
+    try :
+        pages = None
+        if "offlineInput" not in configuration :
+            pages = await getScholarProfilePagesAsync(
+                scholarID,
+                getUserAgent(configuration),
+                configuration["maxPages"] if "maxPages" in configuration else 1,
+                getProfileStats(configuration)[3],
+                fetcher,
+                configuration["scholarURL"] if "scholarURL" in configuration else None,
+                True,
+                "streamingParser" in configuration and configuration["streamingParser"]
+            )
+        await asyncio.get_running_loop().run_in_executor(
+            executor,
+            processProfile,
+            configuration,
+            scholarID,
+            getUserAgent(configuration),
+            fetcher,
+            pages
+        )
+        return True
+    except SystemExit :
+        return False
+
+def main() :
+    """Entry point for the utility."""
+    configuration = getConfiguration(".bibliometrics.config.json")
+
+    if "profiles" in configuration :
+        processBatch(configuration)
+        return
+
+    scholarID = os.environ["SCHOLAR_ID"] if "SCHOLAR_ID" in os.environ else None
+    if scholarID == None :
+        if "scholarID" in configuration :
+            scholarID = configuration["scholarID"]
+
+    if scholarID == None and "offlineInput" not in configuration :
+        print("No Scholar ID provided.")
+        print("Set either via SCHOLAR_ID environment variable or scholarID field in config file.")
+        print("Exiting....")
+        exit(1)
+
+    fetcher = getFetcher(configuration)
+    try :
+        processProfile(configuration, scholarID, getUserAgent(configuration), fetcher)
+    finally :
+        fetcher.close()
@@ -0,0 +1,306 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import hashlib, io, json, os, threading, time
+from datetime import date
+from http.client import parse_headers
+from importlib.metadata import version, PackageNotFoundError
+
+def package_version():
+    """Gets the version of the installed package, or None if it is
+    running from source without being installed."""
+    try:
+        return version("bibliometrics")
+    except PackageNotFoundError:
+        return None
+
+# The modules whose code the cached bibliometrics depend on, which
+# include the code that parses the pages and calculates the bibliometrics
+calculation_modules = [
+    "bibliometrics.py",
+    "calculator.py",
+    "incremental.py",
+    "parsers.py",
+    "scanner.py"
+]
+
+def calculation_digest():
+    """Gets a hash of the source of the modules that parse the pages and
+    calculate the bibliometrics, such that a change to any of them,
+    including in a source checkout without a package version, changes
+    the keys of the ParseCache."""
+    h = hashlib.blake2b(digest_size=20)
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in calculation_modules:
+        h.update(name.encode("utf-8"))
+        try:
+            with open(os.path.join(directory, name), "rb") as f:
+                h.update(f.read())
+        except OSError:
+            h.update(b"\0")
+    return h.hexdigest()
+
+class CachingFetcher:
+    """Wraps a fetcher with an on-disk cache of the responses. A cached
+    response younger than the time-to-live is used without a request.
+    Otherwise, the request is conditional on the cached ETag and
+    Last-Modified headers, and a 304 (Not Modified) response is answered
+    from the cache."""
+
+    __slots__ = [ '_fetcher', '_directory', '_ttl', '_unchanged', '_digests' ]
+
+    def __init__(self, fetcher, directory, ttl=0):
+        """Initializes the CachingFetcher.
+
+        Keyword arguments:
+        fetcher - the fetcher for requests that the cache can't answer
+        directory - the directory of the cache, which is created if
+            it doesn't exist
+        ttl - the time-to-live in seconds of a cached response
+        """
+        self._fetcher = fetcher
+        self._directory = directory
+        self._ttl = ttl
+        self._unchanged = set()
+        self._digests = {}
+        os.makedirs(directory, exist_ok=True, mode=0o777)
+
+    def fetch(self, url, headers, sink=None):
+        """Retrieves a page, from the cache if it is unchanged. Returns
+        a tuple of the status code, the response headers, and the body
+        as bytes.
+
+        Keyword arguments:
+        url - the url of the page
+        headers - a dict of the request headers
+        sink - an object that is passed the body of a 200 response, or
+            None; as the cache needs the complete body, the sink is passed
+            it all at once
+        """
+        response = self._fetch(url, headers)
+        if response[0] == 200:
+            self._digests[url] = hashlib.sha256(response[2]).hexdigest()
+        else:
+            self._digests.pop(url, None)
+        if sink != None and response[0] == 200:
+            sink.feed(response[2])
+        return response
+
+    def _fetch(self, url, headers):
+        """Retrieves a page, from the cache if it is unchanged.
+
+        Keyword arguments:
+        url - the url of the page
+        headers - a dict of the request headers
+        """
+        filename = os.path.join(
+            self._directory,
+            hashlib.sha256(url.encode("utf-8")).hexdigest()
+        )
+        entry = self._read_entry(filename)
+        if entry != None:
+            metadata, body = entry
+            if time.time() - metadata["fetched"] < self._ttl:
+                self._unchanged.add(url)
+                return 200, self._headers(metadata), body
+            headers = dict(headers)
+            if "etag" in metadata:
+                headers["If-None-Match"] = metadata["etag"]
+            if "last-modified" in metadata:
+                headers["If-Modified-Since"] = metadata["last-modified"]
+        status, response_headers, response_body = self._fetcher.fetch(
+            url,
+            headers
+        )
+        if status == 304 and entry != None:
+            metadata["fetched"] = time.time()
+            self._write_entry(filename, metadata, None)
+            self._unchanged.add(url)
+            return 200, self._headers(metadata), body
+        if status == 200:
+            metadata = {
+                "url" : url,
+                "fetched" : time.time(),
+                "headers" : str(response_headers),
+                "sha256" : hashlib.sha256(response_body).hexdigest()
+            }
+            if "ETag" in response_headers:
+                metadata["etag"] = response_headers["ETag"]
+            if "Last-Modified" in response_headers:
+                metadata["last-modified"] = response_headers["Last-Modified"]
+            self._write_entry(filename, metadata, response_body)
+        self._unchanged.discard(url)
+        return status, response_headers, response_body
+
+    def is_unchanged(self, url):
+        """Checks if the most recent retrieval of a page was answered
+        from the cache, either because it was younger than the
+        time-to-live or because the server reported it unchanged.
+
+        Keyword arguments:
+        url - the url of the page
+        """
+        return url in self._unchanged
+
+    def digest(self, url):
+        """Gets the SHA-256 hash of the body of the most recent retrieval
+        of a page, or None if it wasn't retrieved successfully.
+
+        Keyword arguments:
+        url - the url of the page
+        """
+        return self._digests.get(url)
+
+    def close(self):
+        """Releases any resources held by the wrapped fetcher."""
+        self._fetcher.close()
+
+    def _headers(self, metadata):
+        """Parses the cached headers of a response.
+
+        Keyword arguments:
+        metadata - the metadata of the cached response
+        """
+        return parse_headers(io.BytesIO(metadata["headers"].encode("latin-1")))
+
+    def _read_entry(self, filename):
+        """Reads a cached response, returning a tuple of its metadata and
+        body, or None if it isn't cached or otherwise cannot be read. The
+        body and the metadata are replaced separately, so the body must
+        match the hash in the metadata, such that a body is never paired
+        with the metadata (e.g., the ETag) of another.
+
+        Keyword arguments:
+        filename - the filename, without extension, of the cached response
+        """
+        try:
+            with open(filename + ".json", "r") as f:
+                metadata = json.load(f)
+            with open(filename + ".body", "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if "sha256" not in metadata or (
+                hashlib.sha256(body).hexdigest() != metadata["sha256"]):
+            return None
+        return metadata, body
+
+    def _write_entry(self, filename, metadata, body):
+        """Writes a cached response, replacing any previous version of the
+        files such that concurrent readers see either the old or the new.
+
+        Keyword arguments:
+        filename - the filename, without extension, of the cached response
+        metadata - the metadata of the response
+        body - the body of the response, or None to only update the metadata
+        """
+        temp = ".{0}.{1}.tmp".format(os.getpid(), threading.get_ident())
+        try:
+            if body != None:
+                with open(filename + ".body" + temp, "wb") as f:
+                    f.write(body)
+                os.replace(filename + ".body" + temp, filename + ".body")
+            with open(filename + ".json" + temp, "w") as f:
+                json.dump(metadata, f)
+            os.replace(filename + ".json" + temp, filename + ".json")
+        except OSError:
+            print("WARNING: An error occurred while writing to the response cache.")
+
+class ParseCache:
+    """An on-disk cache of the bibliometrics computed from the pages of
+    a profile, keyed by a hash of the pages, such that unchanged pages
+    aren't parsed again. The key also covers everything else that the
+    bibliometrics depend on: the year of the first publication, the
+    current year (for the m-quotient), the bibliometrics calculated, the
+    parser backend, and the version and the calculation code of the
+    package."""
+
+    __slots__ = [ '_directory', '_version', '_code' ]
+
+    def __init__(self, directory):
+        """Initializes the ParseCache.
+
+        Keyword arguments:
+        directory - the directory of the cache, which is created if
+            it doesn't exist
+        """
+        self._directory = directory
+        self._version = package_version()
+        self._code = calculation_digest()
+        os.makedirs(directory, exist_ok=True, mode=0o777)
+
+    def key(self, pages, year, stats=None, parser="scanner"):
+        """Computes the key of the bibliometrics of a profile.
+
+        Keyword arguments:
+        pages - the pages of the profile, in order, as str or bytes
+        year - the year of the first publication, or None
+        stats - the keys of the bibliometrics calculated, or None for all
+        parser - the name of the parser backend of the pages
+        """
+        h = hashlib.blake2b(digest_size=20)
+        h.update(json.dumps([
+            self._version,
+            self._code,
+            year,
+            date.today().year,
+            len(pages),
+            None if stats == None else sorted(stats),
+            parser
+        ]).encode("utf-8"))
+        for page in pages:
+            page = page.encode("utf-8") if isinstance(page, str) else page
+            h.update(len(page).to_bytes(8, "big"))
+            h.update(page)
+        return h.hexdigest()
+
+    def get(self, key):
+        """Gets the cached bibliometrics, or None if there are none.
+
+        Keyword arguments:
+        key - the key of the bibliometrics
+        """
+        try:
+            with open(os.path.join(self._directory, key + ".json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, metrics):
+        """Caches bibliometrics.
+
+        Keyword arguments:
+        key - the key of the bibliometrics
+        metrics - the dict of the bibliometrics
+        """
+        filename = os.path.join(self._directory, key + ".json")
+        temp = filename + ".{0}.{1}.tmp".format(os.getpid(), threading.get_ident())
+        try:
+            with open(temp, "w") as f:
+                json.dump(metrics, f)
+            os.replace(temp, filename)
+        except OSError:
+            print("WARNING: An error occurred while writing to the parse cache.")
@@ -24,15 +24,46 @@
 # SOFTWARE.
 #
 
-import math
+import heapq, math
+from collections import Counter
 from datetime import datetime
 
+ixx_thresholds = {
+    "i100-index" : 100,
+    "i1000-index" : 1000,
+    "i10000-index" : 10000
+}
+
+# The number of citations per publication at and above which they are
+# counted by value rather than sorted
+histogram_cutoff = 20000
+
+# The bibliometrics calculated from the citations per publication, in the
+# order in which they are calculated, each with the intermediate results and
+# other bibliometrics (those that are keys of this dict) that it depends on.
+# The intermediate results are computed once, when first needed, and shared.
+metric_dependencies = {
+    "most-cited" : ("most",),
+    "o-index" : ("most-cited",),
+    "g-index" : ("count", "least", "total", "walk"),
+    "h-median" : ("h-core",),
+    "e-index" : ("h-core-sum",),
+    "r-index" : ("h-core-sum",),
+    "a-index" : ("h-core-sum",),
+    "i100-index" : ("least", "walk"),
+    "i1000-index" : ("least", "walk"),
+    "i10000-index" : ("least", "walk"),
+    "w-index" : ("count", "least", "walk")
+}
+
 class BibliometricCalculator:
-    """Calculates the various bibliometrics."""
+    """Calculates the various bibliometrics, either all of them, or only
+    those requested and the intermediate results that they depend on."""
 
-    __slots__ = [ '_metrics' ]
+    __slots__ = [ '_metrics', '_complete', '_cites', '_memo' ]
 
-    def __init__(self, metrics, cites_list, year):
+    def __init__(self, metrics, cites_list, year, limit=100, stats=None,
+            intermediates=None):
         """Initializes the BibliometricCalculator.
 
         Keyword arguments:
@@ -41,40 +72,211 @@ class BibliometricCalculator:
         year - The year of the first publication, which will be None if user
             didn't provide in the configuration (i.e., this is not scraped
             from profile)
+        limit - The maximum number of cited articles that could have been
+            scraped (e.g., 100 per page of the profile), or None if cites_list
+            is known to be complete. If cites_list is shorter than limit, then
+            it is complete. Otherwise, bibliometrics that could be changed by
+            articles missing from cites_list are not computed.
+        stats - the keys of the bibliometrics to calculate, along with those
+            that they depend on, or None to calculate all of them
+        intermediates - a dict of intermediate results (see _get) that are
+            already known, such as from an IncrementalCalculator, or None
         """
         self._metrics = dict(metrics)
+        self._complete = limit is None or len(cites_list) < limit
+        self._cites = cites_list
+        self._memo = dict(intermediates) if intermediates != None else {}
         if "h-index" not in self._metrics:
             return
-        self._calulate_m_quotient(year)
-        if len(cites_list) == 0:
+        if stats is None or "m-quotient" in stats:
+            self._calulate_m_quotient(year)
+        if stats is not None and not any(
+                key in metric_dependencies for key in stats):
             return
-        sorted_cites = sorted(cites_list, reverse=True)
-        if sorted_cites[0] <= 0:
+        if len(cites_list) == 0 or self._get("most") <= 0:
+            return
+        for key in metric_dependencies:
+            if stats is None or key in stats:
+                self._calculate(key)
+
+    def _calculate(self, key):
+        """Calculates a bibliometric, after those that it depends on.
+
+        Keyword arguments:
+        key - the key of the bibliometric, one of metric_dependencies
+        """
+        if key in self._memo:
             return
-        self._calculate_most(sorted_cites)
-        self._calculate_o_index()
-        self._calculate_g_index(sorted_cites)
-        self._calculate_h_median(sorted_cites)
-        h_core_sum = self._calculate_h_core_citations(sorted_cites)
-        self._calculate_e_index(h_core_sum)
-        self._calculate_R_index(h_core_sum)
-        self._calculate_A_index(h_core_sum)
-        self._calculate_ixx_index(sorted_cites, 100)
-        self._calculate_ixx_index(sorted_cites, 1000)
-        self._calculate_ixx_index(sorted_cites, 10000)
-        self._calculate_w_index(sorted_cites)
+        self._memo[key] = True
+        for dependency in metric_dependencies[key]:
+            if dependency in metric_dependencies:
+                self._calculate(dependency)
+        if key == "most-cited":
+            self._calculate_most(self._get("most"))
+        elif key == "o-index":
+            self._calculate_o_index()
+        elif key == "g-index":
+            self._calculate_g_index(
+                self._get("count"),
+                self._get("least"),
+                self._get("walk")[1],
+                self._get("total")
+            )
+        elif key == "h-median":
+            self._calculate_h_median(self._get("h-core"))
+        elif key == "e-index":
+            self._calculate_e_index(self._get("h-core-sum"))
+        elif key == "r-index":
+            self._calculate_R_index(self._get("h-core-sum"))
+        elif key == "a-index":
+            self._calculate_A_index(self._get("h-core-sum"))
+        elif key in ixx_thresholds:
+            self._calculate_ixx_index(
+                self._get("least"),
+                ixx_thresholds[key],
+                self._get("walk")[3][list(ixx_thresholds).index(key)]
+            )
+        elif key == "w-index":
+            self._calculate_w_index(
+                self._get("count"),
+                self._get("least"),
+                self._get("walk")[2]
+            )
+
+    def _get(self, name):
+        """Gets an intermediate result of the citations, computing it the
+        first time that it is needed: the number of articles (count), the
+        citations of the most-cited (most) and least-cited (least), the total
+        citations (total), the citations in decreasing order (sorted), those
+        of the h-core in decreasing order (h-core), their sum (h-core-sum),
+        and the tuple of the prefix sums, g-index, w-index, and ixx-indexes
+        from a walk over the citations (walk). The citations are only sorted
+        if there are fewer than histogram_cutoff of them.
+
+        Keyword arguments:
+        name - the name of the intermediate result
+        """
+        if name in self._memo:
+            return self._memo[name]
+        small = len(self._cites) < histogram_cutoff
+        if name == "count":
+            value = len(self._cites)
+        elif name == "most":
+            value = self._get("sorted")[0] if small else max(self._cites)
+        elif name == "least":
+            value = self._get("sorted")[-1] if small else min(self._cites)
+        elif name == "total":
+            value = self._get("walk")[0][-1] if small else sum(self._cites)
+        elif name == "sorted":
+            value = sorted(self._cites, reverse=True)
+        elif name == "h-core":
+            # Avoids sorting all of the citations, if there are many, by
+            # selecting the h-core
+            value = self._get("sorted") if small else heapq.nlargest(
+                max(0, self._metrics["h-index"]),
+                self._cites
+            )
+        elif name == "h-core-sum":
+            value = self._calculate_h_core_citations(
+                self._get("h-core"),
+                self._memo["walk"][0] if "walk" in self._memo else None
+            )
+        elif name == "walk":
+            # Counts the citations by value, if there are many, rather than
+            # sorting them
+            value = self._walk(self._get("sorted")) if small else (
+                (None,) + self._walk_histogram(Counter(self._cites)))
+        else:
+            raise KeyError(name)
+        self._memo[name] = value
+        return value
+
+    @staticmethod
+    def needs_more_data(metrics, cites_list, stats):
+        """Checks if citations of additional articles, beyond those in
+        cites_list, could change any of the requested bibliometrics. This
+        assumes that each article not in cites_list is cited no more than
+        the least-cited article in cites_list, which is the case for the
+        pages of a Scholar profile sorted by citations.
+
+        Keyword arguments:
+        metrics - a dict of the metrics scraped directly from Scholar profile
+        cites_list - a list of the citations of articles retrieved so far
+        stats - a list of the keys of the bibliometrics that are needed
+        """
+        if "h-index" not in metrics:
+            return False
+        if len(cites_list) == 0:
+            return True
+        n = len(cites_list)
+        least = min(cites_list)
+        h = metrics["h-index"]
+        for key in stats:
+            if key == "g-index":
+                if not BibliometricCalculator._is_g_index_known(
+                        n, sum(cites_list), least):
+                    return True
+            elif key == "w-index":
+                if not BibliometricCalculator._is_w_index_known(n, least):
+                    return True
+            elif key in ixx_thresholds:
+                if not BibliometricCalculator._is_ixx_index_known(
+                        least, ixx_thresholds[key]):
+                    return True
+            elif key == "h-median":
+                if n <= h // 2:
+                    return True
+            elif key in ("e-index", "r-index", "a-index"):
+                if n < h:
+                    return True
+        return False
+
+    @staticmethod
+    def _is_g_index_known(n, cites_sum, least):
+        """Checks if the g-index computed from the n most-cited articles
+        cannot be changed by the remaining articles, i.e., if the remaining
+        articles cannot raise the sum of citations up to (n+1)^2.
+
+        Keyword arguments:
+        n - the number of articles retrieved
+        cites_sum - the total citations of the n articles
+        least - the citations of the least-cited of the n articles
+        """
+        return cites_sum < n*n and least <= 2*n + 1
+
+    @staticmethod
+    def _is_ixx_index_known(least, xx):
+        """Checks if the ixx-index computed from the most-cited articles
+        cannot be changed by the remaining articles.
+
+        Keyword arguments:
+        least - the citations of the least-cited article retrieved
+        xx - 100 for i100-index, 1000 for i1000-index, etc.
+        """
+        return least < xx
+
+    @staticmethod
+    def _is_w_index_known(n, least):
+        """Checks if the w-index computed from the n most-cited articles
+        cannot be changed by the remaining articles.
+
+        Keyword arguments:
+        n - the number of articles retrieved
+        least - the citations of the least-cited of the n articles
+        """
+        return least < 10*(n+1)
 
     def to_dict(self):
         """Returns a dict of the bibliometrics."""
         return dict(self._metrics)
 
-    def _calculate_most(self, sorted_cites):
+    def _calculate_most(self, most):
         """Initializes the most cited.
 
         Keyword arguments:
-        sorted_cites - a list of the citations per publication sorted decreasing
+        most - the citations of the most-cited publication
         """
-        self._metrics["most-cited"] = sorted_cites[0]
+        self._metrics["most-cited"] = most
 
     def _calculate_o_index(self):
         """Calculates the o-index, which is the geometric mean
@@ -88,18 +290,88 @@ class BibliometricCalculator:
                 )
             )
 
-    def _calculate_g_index(self, sorted_cites) :
-        """Calculates the g-index.
+    @staticmethod
+    def _walk(sorted_cites):
+        """Walks the citations once, from the most cited, computing all of
+        the sums and counts that the bibliometrics depend on. Returns a tuple
+        of the list of prefix sums of the citations (the i-th of which is the
+        total of the i+1 most-cited papers), the g-index, the w-index, and a
+        list of the ixx-indexes, in the order of ixx_thresholds.
 
         Keyword arguments:
         sorted_cites - List of citations of papers in decreasing order.
         """
-        rolling_sum = [ sorted_cites[0] ]
-        for i in range(1, len(sorted_cites)) :
-            rolling_sum.append(sorted_cites[i] + rolling_sum[i-1])
-        rolling_sum = [ (i+1, x) for i, x in enumerate(rolling_sum) ]
-        g = max(y for y, x in rolling_sum if x >= y*y)
-        if g > 0 and g < 100 :
+        thresholds = list(ixx_thresholds.values())
+        least_threshold = min(thresholds)
+        ixx_counts = [0] * len(thresholds)
+        prefix_sums = []
+        total = g = w = 0
+        for rank, c in enumerate(sorted_cites, start=1):
+            total += c
+            prefix_sums.append(total)
+            if total >= rank*rank:
+                g = rank
+            if c >= 10*rank:
+                w = rank
+            if c >= least_threshold:
+                for k, xx in enumerate(thresholds):
+                    if c >= xx:
+                        ixx_counts[k] = rank
+        return prefix_sums, g, w, ixx_counts
+
+    @staticmethod
+    def _walk_histogram(counts):
+        """Computes the same g-index, w-index, and ixx-indexes as _walk, but
+        from the number of papers with each number of citations, walking the
+        distinct numbers of citations from the greatest, rather than all of
+        the papers in sorted order, and stopping once none of them can
+        change. Returns a tuple of the g-index, the w-index, and a list of
+        the ixx-indexes, in the order of ixx_thresholds.
+
+        Keyword arguments:
+        counts - a dict from each number of citations to the number of
+            papers with that many
+        """
+        thresholds = list(ixx_thresholds.values())
+        least_threshold = min(thresholds)
+        ixx_counts = [0] * len(thresholds)
+        rank = total = g = w = 0
+        g_known = w_known = False
+        for c in sorted(counts, reverse=True):
+            if g_known and w_known and c < least_threshold:
+                break
+            k = counts[c]
+            if not g_known:
+                # the ranks for which the total of the papers up to them
+                # is at least their square are consecutive from the first
+                j = 0
+                while j < k and total + (j+1)*c >= (rank+j+1)*(rank+j+1):
+                    j += 1
+                if j > 0:
+                    g = rank + j
+                g_known = j < k
+            if not w_known:
+                w = max(w, min(rank + k, c // 10))
+                w_known = c // 10 < rank + k
+            for i, xx in enumerate(thresholds):
+                if c >= xx:
+                    ixx_counts[i] += k
+            rank += k
+            total += k*c
+        return g, w, ixx_counts
+
+    def _calculate_g_index(self, n, least, g, cites_sum) :
+        """Calculates the g-index.
+
+        Keyword arguments:
+        n - the number of papers
+        least - the citations of the least-cited paper
+        g - the largest number g such that the g most-cited papers have at
+            least g*g citations in total, as computed by _walk
+        cites_sum - the total citations of the papers
+        """
+        if g > 0 and (self._complete or self._is_g_index_known(
+                n, cites_sum, least)) :
             self._metrics["g-index"] = g
 
     def _calculate_h_median(self, sorted_cites) :
@@ -107,10 +379,11 @@ class BibliometricCalculator:
         the h-core, i.e., the h most-cited papers.
 
         Keyword arguments:
-        sorted_cites - List of citations of papers in decreasing order.
+        sorted_cites - List of citations of papers in decreasing order,
+            at least those in the h-core.
         """
         h = self._metrics["h-index"]
-        if h >= 200:
+        if h <= 0:
             return
         if h % 2 == 0:
             m1 = h // 2
@@ -126,18 +399,20 @@ class BibliometricCalculator:
             self._metrics["h-median"] = median if (
                 isinstance(median, int)) else "{0:.1f}".format(median)
 
-    def _calculate_h_core_citations(self, sorted_cites) :
+    def _calculate_h_core_citations(self, sorted_cites, prefix_sums=None) :
         """Calculates the total number of citations to the publications
         in the h-core, i.e., the h most-cited papers.
 
         Keyword arguments:
-        sorted_cites - List of citations of papers in decreasing order.
+        sorted_cites - List of citations of papers in decreasing order,
+            at least those in the h-core.
+        prefix_sums - The prefix sums of sorted_cites, as computed by _walk,
+            or None to sum the h-core directly
         """
-        if self._metrics["h-index"] > 100:
-            return 0
-        if len(sorted_cites) < self._metrics["h-index"]:
+        h = self._metrics["h-index"]
+        if len(sorted_cites) < h or h <= 0:
             return 0
-        return sum(sorted_cites[i] for i in range(self._metrics["h-index"]))
+        return prefix_sums[h-1] if prefix_sums != None else sum(sorted_cites[:h])
 
     def _calculate_e_index(self, h_core_sum) :
         """Calculates the e-index.
@@ -146,7 +421,7 @@ class BibliometricCalculator:
         h_core_sum - sum of the citations to the h publications in the h-core.
         """
         h = self._metrics["h-index"]
-        e = math.sqrt(h_core_sum - h*h) if h <= 100 else 0
+        e = math.sqrt(h_core_sum - h*h) if h_core_sum > h*h else 0
         if e > 0.0 :
             self._metrics["e-index"] = "{0:.2f}".format(e)
 
@@ -156,7 +431,7 @@ class BibliometricCalculator:
         Keyword arguments:
         h_core_sum - sum of the citations to the h publications in the h-core.
         """
-        r = math.sqrt(h_core_sum) if self._metrics["h-index"] <= 100 else 0
+        r = math.sqrt(h_core_sum)
         if r > 0.0 :
             self._metrics["r-index"] = "{0:.2f}".format(r)
 
@@ -167,29 +442,33 @@ class BibliometricCalculator:
         h_core_sum - sum of the citations to the h publications in the h-core.
         """
         h = self._metrics["h-index"]
-        a = h_core_sum / h if h > 0 and h <= 100 else 0
+        a = h_core_sum / h if h > 0 else 0
         if a > 0.0 :
             self._metrics["a-index"] = "{0:.2f}".format(a)
 
-    def _calculate_ixx_index(self, sorted_cites, xx):
+    def _calculate_ixx_index(self, least, xx, ixx):
         """Calculates i100, i1000, etc.
 
         Keyword arguments:
-        sorted_cites - List of citations of papers in decreasing order.
+        least - the citations of the least-cited paper
         xx - 100 for i100-index, 1000 for i1000-index, etc.
+        ixx - the number of papers with at least xx citations, as computed
+            by _walk
         """
-        ixx = sum(1 for y in sorted_cites if y >= xx)
-        if ixx > 0 and ixx < 100:
+        if ixx > 0 and (
+                self._complete or self._is_ixx_index_known(least, xx)):
             self._metrics["i{0}-index".format(xx)] = ixx
 
-    def _calculate_w_index(self, sorted_cites):
+    def _calculate_w_index(self, n, least, w):
         """Calculates the w-index.
 
         Keyword arguments:
-        sorted_cites - List of citations of papers in decreasing order.
+        n - the number of papers
+        least - the citations of the least-cited paper
+        w - the largest number w such that the w most-cited papers each have
+            at least 10*w citations, as computed by _walk
         """
-        w = sum(1 for i, c in enumerate(sorted_cites) if c >= 10*(i+1))
-        if w > 0 and w < 100:
+        if w > 0 and (self._complete or self._is_w_index_known(n, least)):
             self._metrics["w-index"] = w
 
     def _calulate_m_quotient(self, year):
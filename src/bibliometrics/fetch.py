@@ -0,0 +1,397 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import asyncio, io, ssl, threading, zlib
+from http.client import parse_headers
+from urllib.parse import urlsplit, urljoin
+from urllib.request import urlopen, Request
+from urllib.error import HTTPError
+
+maxRedirects = 5
+
+chunkSize = 65536
+
+acceptEncoding = "gzip, deflate"
+
+class BodyDecoder:
+    """Accumulates the body of a response as it arrives, decompressing
+    it along the way if it is gzip or deflate encoded, or passes each
+    decompressed chunk to a sink instead."""
+
+    __slots__ = [ '_chunks', '_decompressor', '_sink', '_consumed' ]
+
+    def __init__(self, headers, sink=None):
+        """Initializes the BodyDecoder. If the body is compressed, then
+        the Content-Encoding and Content-Length headers are removed, such
+        that the headers describe the decompressed body.
+
+        Keyword arguments:
+        headers - the headers of the response
+        sink - an object whose feed method is passed each decompressed
+            chunk, returning False once it needs no more of the body, in
+            which case the body isn't accumulated; or None to accumulate it
+        """
+        self._chunks = []
+        self._sink = sink
+        encoding = headers.get("Content-Encoding", "").strip().lower()
+        # The body received before any of it is decompressed, in case a
+        # deflate body turns out to be raw deflate, without a zlib header,
+        # or None once that is ruled out
+        self._consumed = b"" if encoding == "deflate" else None
+        if encoding in ("gzip", "x-gzip", "deflate"):
+            # wbits of 32 + MAX_WBITS detects either a gzip or zlib header
+            self._decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+            del headers["Content-Encoding"]
+            del headers["Content-Length"]
+        else:
+            self._decompressor = None
+
+    def feed(self, chunk):
+        """Adds the next chunk of the body. Returns False once the sink
+        needs no more of the body, and otherwise True.
+
+        Keyword arguments:
+        chunk - the next chunk of the body as bytes
+        """
+        if self._decompressor != None:
+            chunk = self._decompress(chunk)
+        if self._sink != None:
+            return self._sink.feed(chunk)
+        self._chunks.append(chunk)
+        return True
+
+    def _decompress(self, chunk):
+        """Decompresses the next chunk of the body, falling back to raw
+        deflate if a deflate body doesn't start with a zlib header.
+
+        Keyword arguments:
+        chunk - the next chunk of the body as bytes
+        """
+        if self._consumed == None:
+            return self._decompressor.decompress(chunk)
+        self._consumed += chunk
+        try:
+            decompressed = self._decompressor.decompress(chunk)
+        except zlib.error:
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            decompressed = self._decompressor.decompress(self._consumed)
+            self._consumed = None
+            return decompressed
+        if len(decompressed) > 0:
+            self._consumed = None
+        return decompressed
+
+    def body(self):
+        """Returns the complete body as bytes, which is empty if it was
+        passed to a sink."""
+        if self._decompressor != None:
+            chunk = self._decompressor.flush()
+            if self._sink != None:
+                self._sink.feed(chunk)
+            else:
+                self._chunks.append(chunk)
+        return b"".join(self._chunks)
+
+def with_accept_encoding(headers):
+    """Returns a copy of the request headers that accepts compressed
+    responses, unless the headers already specify the encodings.
+
+    Keyword arguments:
+    headers - a dict of the request headers
+    """
+    headers = dict(headers)
+    if not any(k.lower() == "accept-encoding" for k in headers):
+        headers["Accept-Encoding"] = acceptEncoding
+    return headers
+
+class UrllibFetcher:
+    """Retrieves pages with urllib, opening a new connection for
+    each request."""
+
+    __slots__ = []
+
+    def fetch(self, url, headers, sink=None):
+        """Retrieves a page, accepting a gzip or deflate compressed
+        response. Returns a tuple of the status code, the response headers
+        (an http.client.HTTPMessage), and the decompressed body as bytes.
+
+        Keyword arguments:
+        url - the url of the page
+        headers - a dict of the request headers
+        sink - an object whose feed method is passed the body of a 200
+            response in chunks as they arrive, instead of returning it,
+            and which can stop the retrieval early (see BodyDecoder)
+        """
+        request = Request(url, headers=with_accept_encoding(headers))
+        try:
+            with urlopen(request) as response:
+                return response.status, response.headers, self._read_body(
+                    response,
+                    sink if response.status == 200 else None)
+        except HTTPError as e:
+            return e.status, e.headers, self._read_body(e)
+
+    def _read_body(self, response, sink=None):
+        """Reads the body of a response in chunks, decompressing each
+        as it arrives.
+
+        Keyword arguments:
+        response - the response
+        sink - an object that is passed the chunks, or None
+        """
+        decoder = BodyDecoder(response.headers, sink)
+        while True:
+            chunk = response.read(chunkSize)
+            if not chunk:
+                return decoder.body()
+            if not decoder.feed(chunk):
+                return b""
+
+    def close(self):
+        """Releases any resources held by the fetcher."""
+        pass
+
+class AsyncFetcher:
+    """Retrieves pages with an asyncio event loop, running in a
+    background thread, that reuses persistent HTTP/1.1 connections
+    for all requests to the same host, and limits the number of
+    requests in progress at any one time. The fetch method can be
+    called concurrently from any number of threads."""
+
+    __slots__ = [
+        '_loop',
+        '_thread',
+        '_semaphore',
+        '_idle',
+        '_timeout',
+        '_ssl'
+    ]
+
+    def __init__(self, concurrency=8, timeout=30):
+        """Initializes the AsyncFetcher.
+
+        Keyword arguments:
+        concurrency - the maximum number of requests in progress, which
+            is also the maximum number of open connections to a host
+        timeout - the timeout in seconds for each request
+        """
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._idle = {}
+        self._timeout = timeout
+        self._ssl = ssl.create_default_context()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            daemon=True
+        )
+        self._thread.start()
+
+    def fetch(self, url, headers, sink=None):
+        """Retrieves a page. Returns a tuple of the status code, the
+        response headers (an http.client.HTTPMessage), and the body
+        as bytes.
+
+        Keyword arguments:
+        url - the url of the page
+        headers - a dict of the request headers
+        sink - an object whose feed method is passed the body of a 200
+            response in chunks as they arrive, instead of returning it,
+            and which can stop the retrieval early (see BodyDecoder)
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.request(url, headers, sink),
+            self._loop
+        ).result()
+
+    def run(self, coroutine):
+        """Runs a coroutine, such as one that awaits many requests, in
+        the fetcher's event loop, and returns its result.
+
+        Keyword arguments:
+        coroutine - the coroutine
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def request(self, url, headers, sink=None):
+        """Retrieves a page within the fetcher's event loop, following
+        any redirects. Returns a tuple of the status code, the response
+        headers, and the body.
+
+        Keyword arguments:
+        url - the url of the page
+        headers - a dict of the request headers
+        sink - an object that is passed the body of a 200 response, or None
+        """
+        for redirects in range(maxRedirects + 1):
+            status, response_headers, body = await self._request_once(
+                url,
+                headers,
+                sink
+            )
+            if status not in (301, 302, 303, 307, 308) or (
+                    "Location" not in response_headers):
+                break
+            url = urljoin(url, response_headers["Location"])
+        return status, response_headers, body
+
+    async def _request_once(self, url, headers, sink=None):
+        """Retrieves a page within the fetcher's event loop, reusing
+        an idle connection to the host if one is available. Returns a
+        tuple of the status code, the response headers, and the body.
+
+        Keyword arguments:
+        url - the url of the page
+        headers - a dict of the request headers
+        sink - an object that is passed the body of a 200 response, or None
+        """
+        parts = urlsplit(url)
+        secure = parts.scheme == "https"
+        key = (
+            parts.scheme,
+            parts.hostname,
+            parts.port if parts.port else (443 if secure else 80)
+        )
+        target = parts.path if parts.path else "/"
+        if parts.query:
+            target += "?" + parts.query
+        lines = [
+            "GET {0} HTTP/1.1".format(target),
+            "Host: {0}".format(parts.netloc)
+        ]
+        lines.extend(
+            "{0}: {1}".format(k, v) for k, v in with_accept_encoding(
+                headers).items()
+        )
+        lines.append("Connection: keep-alive")
+        message = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        async with self._semaphore:
+            idle = self._idle.setdefault(key, [])
+            while True:
+                reused = len(idle) > 0
+                reader, writer = idle.pop() if reused else (
+                    await asyncio.wait_for(
+                        asyncio.open_connection(
+                            key[1],
+                            key[2],
+                            ssl=self._ssl if secure else None
+                        ),
+                        self._timeout
+                    )
+                )
+                try:
+                    writer.write(message)
+                    status, response_headers, body, keep_alive = (
+                        await asyncio.wait_for(
+                            self._read_response(reader, sink),
+                            self._timeout
+                        )
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    # The server may have closed an idle connection,
+                    # in which case retry with another connection.
+                    if reused:
+                        if sink != None:
+                            sink.reset()
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep_alive:
+                    idle.append((reader, writer))
+                else:
+                    writer.close()
+                return status, response_headers, body
+
+    async def _read_response(self, reader, sink=None):
+        """Reads an HTTP/1.1 response from a connection. Returns a tuple
+        of the status code, the headers, the body, and whether the
+        connection can be reused, which it can't if the sink stopped the
+        response early.
+
+        Keyword arguments:
+        reader - the asyncio.StreamReader of the connection
+        sink - an object that is passed the body of a 200 response, or None
+        """
+        statusLine = await reader.readline()
+        if not statusLine:
+            raise ConnectionResetError("Connection closed by server")
+        version, status = statusLine.split(None, 2)[:2]
+        status = int(status)
+        headerLines = []
+        while True:
+            line = await reader.readline()
+            headerLines.append(line)
+            if line in (b"\r\n", b"\n", b""):
+                break
+        headers = parse_headers(io.BytesIO(b"".join(headerLines)))
+        keep_alive = version == b"HTTP/1.1" and (
+            headers.get("Connection", "").lower() != "close")
+        chunked = headers.get("Transfer-Encoding", "").lower() == "chunked"
+        length = int(headers["Content-Length"]) if (
+            "Content-Length" in headers) else None
+        decoder = BodyDecoder(headers, sink if status == 200 else None)
+        if status in (204, 304) or status < 200:
+            pass
+        elif chunked:
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    # skip any trailers through the terminating blank line
+                    while (await reader.readline()) not in (b"\r\n", b""):
+                        pass
+                    break
+                if not decoder.feed(await reader.readexactly(size)):
+                    return status, headers, b"", False
+                await reader.readexactly(2)
+        elif length != None:
+            while length > 0:
+                chunk = await reader.readexactly(min(length, chunkSize))
+                if not decoder.feed(chunk):
+                    return status, headers, b"", False
+                length -= len(chunk)
+        else:
+            while True:
+                chunk = await reader.read(chunkSize)
+                if not chunk:
+                    break
+                if not decoder.feed(chunk):
+                    break
+            keep_alive = False
+        return status, headers, decoder.body(), keep_alive
+
+    def close(self):
+        """Closes all of the idle connections and stops the event loop."""
+        async def close_all():
+            for connections in self._idle.values():
+                for reader, writer in connections:
+                    writer.close()
+            self._idle.clear()
+        asyncio.run_coroutine_threadsafe(close_all(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
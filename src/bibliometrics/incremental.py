@@ -0,0 +1,370 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import json, os, threading
+from bisect import bisect_right
+from collections import Counter
+from .calculator import BibliometricCalculator, ixx_thresholds
+
+# The state is rebuilt from scratch, rather than updated, if more than
+# this fraction of the publications changed
+rebuild_fraction = 0.125
+
+class _Decreasing:
+    """A read-only view of a list sorted in increasing order, indexed
+    in decreasing order, without a reversed copy of the list."""
+
+    __slots__ = [ '_ascending' ]
+
+    def __init__(self, ascending):
+        """Initializes the view.
+
+        Keyword arguments:
+        ascending - the list sorted in increasing order
+        """
+        self._ascending = ascending
+
+    def __len__(self):
+        return len(self._ascending)
+
+    def __getitem__(self, i):
+        if i < 0 or i >= len(self._ascending):
+            raise IndexError(i)
+        return self._ascending[len(self._ascending) - 1 - i]
+
+class IncrementalCalculator:
+    """Maintains the citations per publication of a profile in sorted
+    order, along with the sums and counts that the bibliometrics depend
+    on (the total, the sums of the h-core and of the g most-cited, the
+    g-index, the w-index, and the ixx-indexes), updating them from the
+    changes in the citations of individual publications in time that
+    depends on the number of changes rather than of publications."""
+
+    __slots__ = [ '_ascending', '_h', '_h_sum', '_g', '_g_sum', '_w', '_total', '_ixx' ]
+
+    def __init__(self, cites_list=(), h=0):
+        """Initializes the IncrementalCalculator.
+
+        Keyword arguments:
+        cites_list - the citations per publication, in any order
+        h - the h-index, which determines the publications in the h-core
+        """
+        self._rebuild(sorted(cites_list), h)
+
+    def _rebuild(self, ascending, h):
+        """Recomputes all of the state from the citations.
+
+        Keyword arguments:
+        ascending - the citations per publication, in increasing order
+        h - the h-index
+        """
+        prefix_sums, g, w, ixx = BibliometricCalculator._walk(ascending[::-1])
+        self._ascending = ascending
+        self._h = max(0, h)
+        self._h_sum = prefix_sums[min(self._h, len(ascending)) - 1] if (
+            self._h > 0 and len(ascending) > 0) else 0
+        self._g = g
+        self._g_sum = prefix_sums[g-1] if g > 0 else 0
+        self._w = w
+        self._total = prefix_sums[-1] if len(prefix_sums) > 0 else 0
+        self._ixx = ixx
+
+    def cites(self):
+        """Returns a list of the citations per publication, in decreasing order."""
+        return self._ascending[::-1]
+
+    def changes(self, cites_list):
+        """Computes the changes from the citations per publication of this
+        state to those of cites_list, as a list of tuples of the citations
+        of a publication before and after, with None before for an added
+        publication, and None after for a removed one. Publications aren't
+        identified, so those with the same number of citations before and
+        after are unchanged. This counts both complete lists, so it takes
+        time linear in the number of publications, however few changed.
+
+        Keyword arguments:
+        cites_list - the citations per publication, in any order
+        """
+        before = Counter(self._ascending)
+        after = Counter(cites_list)
+        removed = sorted((before - after).elements())
+        added = sorted((after - before).elements())
+        pairs = list(zip(removed, added))
+        pairs.extend((old, None) for old in removed[len(added):])
+        pairs.extend((None, new) for new in added[len(removed):])
+        return pairs
+
+    def update(self, changes, h=None):
+        """Updates the state from the changes in the citations of
+        individual publications.
+
+        Keyword arguments:
+        changes - an iterable of tuples of the citations of a publication
+            before and after, with None before for an added publication,
+            and None after for a removed one
+        h - the new h-index, or None if it is unchanged
+        """
+        changes = list(changes)
+        if len(changes) > rebuild_fraction * len(self._ascending):
+            counts = Counter(self._ascending)
+            counts.subtract(old for old, new in changes if old != None)
+            if any(count < 0 for count in counts.values()):
+                raise ValueError("Changes of publications that don't exist")
+            ascending = list(counts.elements())
+            ascending.extend(new for old, new in changes if new != None)
+            ascending.sort()
+            self._rebuild(ascending, self._h if h == None else h)
+            return
+        for old, new in changes:
+            if old != None:
+                self._remove(old)
+            if new != None:
+                self._insert(new)
+        if h != None:
+            self._set_h(max(0, h))
+        self._adjust()
+
+    def update_to(self, cites_list, h=None):
+        """Updates the state to the citations per publication of cites_list,
+        from the changes between them (see changes). The time is linear in
+        the number of publications, for finding the changes and for moving
+        the changed citations within the sorted list, but the sorted order
+        and the sums are maintained rather than recomputed.
+
+        Keyword arguments:
+        cites_list - the citations per publication, in any order
+        h - the new h-index, or None if it is unchanged
+        """
+        self.update(self.changes(cites_list), h)
+
+    def _remove(self, cites):
+        """Removes a publication, adjusting the sums of the most-cited.
+
+        Keyword arguments:
+        cites - the citations of the publication
+        """
+        a = self._ascending
+        i = bisect_right(a, cites) - 1
+        if i < 0 or a[i] != cites:
+            raise ValueError("No publication with {0} citations".format(cites))
+        del a[i]
+        # The rank of the publication removed, counting from the most cited
+        rank = len(a) - i
+        self._total -= cites
+        for k, xx in enumerate(ixx_thresholds.values()):
+            if cites >= xx:
+                self._ixx[k] -= 1
+        self._h_sum = self._removed_from_sum(self._h_sum, self._h, rank, cites)
+        self._g_sum = self._removed_from_sum(self._g_sum, self._g, rank, cites)
+
+    def _removed_from_sum(self, total, k, rank, cites):
+        """Adjusts the sum of the k most-cited for the removal of a
+        publication, after which the next most-cited joins them.
+
+        Keyword arguments:
+        total - the sum of the k most-cited
+        k - the number of the most-cited
+        rank - the rank of the publication removed, from 0
+        cites - the citations of the publication removed
+        """
+        if rank >= k:
+            return total
+        a = self._ascending
+        return total - cites + (a[len(a) - k] if k <= len(a) else 0)
+
+    def _insert(self, cites):
+        """Adds a publication, adjusting the sums of the most-cited.
+
+        Keyword arguments:
+        cites - the citations of the publication
+        """
+        a = self._ascending
+        i = bisect_right(a, cites)
+        a.insert(i, cites)
+        # The rank of the publication added, counting from the most cited
+        rank = len(a) - 1 - i
+        self._total += cites
+        for k, xx in enumerate(ixx_thresholds.values()):
+            if cites >= xx:
+                self._ixx[k] += 1
+        self._h_sum = self._inserted_into_sum(self._h_sum, self._h, rank, cites)
+        self._g_sum = self._inserted_into_sum(self._g_sum, self._g, rank, cites)
+
+    def _inserted_into_sum(self, total, k, rank, cites):
+        """Adjusts the sum of the k most-cited for the addition of a
+        publication, which pushes the least of them out.
+
+        Keyword arguments:
+        total - the sum of the k most-cited
+        k - the number of the most-cited
+        rank - the rank of the publication added, from 0
+        cites - the citations of the publication added
+        """
+        if rank >= k:
+            return total
+        a = self._ascending
+        return total + cites - (a[len(a) - 1 - k] if k < len(a) else 0)
+
+    def _set_h(self, h):
+        """Changes the h-index, adjusting the sum of the h-core by the
+        publications that join or leave it.
+
+        Keyword arguments:
+        h - the new h-index
+        """
+        a = self._ascending
+        n = len(a)
+        while self._h < h:
+            if self._h < n:
+                self._h_sum += a[n - 1 - self._h]
+            self._h += 1
+        while self._h > h:
+            self._h -= 1
+            if self._h < n:
+                self._h_sum -= a[n - 1 - self._h]
+
+    def _adjust(self):
+        """Moves the g-index and w-index to their new values, one rank at
+        a time, from their previous values. The ranks for which either
+        condition holds are consecutive from the most cited, so each moves
+        by as many ranks as it changed."""
+        a = self._ascending
+        n = len(a)
+        if self._g > n:
+            self._g = n
+        while self._g < n and self._g_sum + a[n - 1 - self._g] >= (self._g + 1)**2:
+            self._g_sum += a[n - 1 - self._g]
+            self._g += 1
+        while self._g > 0 and self._g_sum < self._g**2:
+            self._g -= 1
+            self._g_sum -= a[n - 1 - self._g]
+        w = min(self._w, n)
+        while w < n and a[n - 1 - w] >= 10*(w + 1):
+            w += 1
+        while w > 0 and a[n - w] < 10*w:
+            w -= 1
+        self._w = w
+
+    def intermediates(self):
+        """Returns a dict of the intermediate results of the bibliometrics,
+        for the BibliometricCalculator, without sorting or walking the
+        citations."""
+        a = self._ascending
+        n = len(a)
+        decreasing = _Decreasing(a)
+        return {
+            "count" : n,
+            "most" : a[-1] if n > 0 else 0,
+            "least" : a[0] if n > 0 else 0,
+            "total" : self._total,
+            "sorted" : decreasing,
+            "h-core" : decreasing,
+            "h-core-sum" : self._h_sum if 0 < self._h <= n else 0,
+            "walk" : (None, self._g, self._w, list(self._ixx))
+        }
+
+    def calculate(self, metrics, year, limit=100, stats=None):
+        """Calculates the bibliometrics from this state, which must be
+        current, along with those scraped from the summary table.
+
+        Keyword arguments:
+        metrics - a dict of the metrics scraped directly from Scholar profile,
+            with the same h-index as this state
+        year - The year of the first publication, or None
+        limit - The maximum number of cited articles that could have been
+            scraped, or None if the citations are known to be complete
+        stats - the keys of the bibliometrics to calculate, or None for all
+        """
+        return BibliometricCalculator(
+            metrics,
+            self._ascending,
+            year,
+            limit,
+            stats,
+            self.intermediates()
+        ).to_dict()
+
+    def save(self, filename):
+        """Saves the state to a file, replacing any previous version of the
+        file such that a concurrent reader sees either the old or the new.
+
+        Keyword arguments:
+        filename - the name of the file with path
+        """
+        temp = filename + ".{0}.{1}.tmp".format(os.getpid(), threading.get_ident())
+        directoryName = os.path.dirname(filename)
+        try:
+            if len(directoryName) > 0:
+                os.makedirs(directoryName, exist_ok=True)
+            with open(temp, "w") as f:
+                json.dump({
+                    "cites" : self._ascending,
+                    "h" : self._h,
+                    "h-sum" : self._h_sum,
+                    "g" : self._g,
+                    "g-sum" : self._g_sum,
+                    "w" : self._w,
+                    "total" : self._total,
+                    "ixx" : self._ixx
+                }, f)
+            os.replace(temp, filename)
+        except OSError:
+            print("WARNING: An error occurred while writing the incremental state.")
+
+    @classmethod
+    def load(cls, filename):
+        """Loads the state from a file, or returns None if it doesn't
+        exist or otherwise cannot be read.
+
+        Keyword arguments:
+        filename - the name of the file with path
+        """
+        try:
+            with open(filename, "r") as f:
+                saved = json.load(f)
+            state = cls.__new__(cls)
+            state._ascending = saved["cites"]
+            state._h = saved["h"]
+            state._h_sum = saved["h-sum"]
+            state._g = saved["g"]
+            state._g_sum = saved["g-sum"]
+            state._w = saved["w"]
+            state._total = saved["total"]
+            state._ixx = saved["ixx"]
+            if len(state._ixx) != len(ixx_thresholds):
+                return None
+            return state
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+def state_filename(jsonOutputFile):
+    """Gets the filename of the incremental state of a profile, which is
+    kept next to its JSON output file.
+
+    Keyword arguments:
+    jsonOutputFile - the filename of the JSON output with path
+    """
+    return os.path.splitext(jsonOutputFile)[0] + ".state.json"
@@ -0,0 +1,458 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# A stand-in for Google Scholar that serves synthetic profile pages, and
+# a harness that runs the batch pipeline against it and reports throughput,
+# latency, and memory. Run with: python3 -m bibliometrics.loadtest --help
+
+import argparse, gzip, hashlib, math, os, random, tempfile, threading, time
+from collections import Counter
+from datetime import date
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from . import bibliometrics as bib
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+summaryRowTemplate = """<tr><td class="gsc_rsb_sc1"><a href="javascript:void(0)" class="gsc_rsb_f gs_ibl">{0}</a></td><td class="gsc_rsb_std">{1}</td><td class="gsc_rsb_std">{2}</td></tr>"""
+
+yearTemplate = """<span class="gsc_g_t" style="right:{0}px">{1}</span>"""
+
+barTemplate = """<a href="javascript:void(0)" class="gsc_g_a" style="right:{0}px;top:{1}px;height:{2}px;z-index:{3}"><span class="gsc_g_al">{4}</span></a>"""
+
+rowTemplate = """<tr class="gsc_a_tr"><td class="gsc_a_t"><a href="/citations?view_op=view_citation&amp;hl=en&amp;user={0}&amp;citation_for_view={0}:{1}" class="gsc_a_at">Synthetic Article {1}</a><div class="gs_gray">A Lastname{2}, A Lastname{3}</div><div class="gs_gray">Journal {4}<span class="gs_oph">, {5}</span></div></td><td class="gsc_a_c"><a href="{6}" class="gsc_a_ac gs_ibl">{7}</a></td><td class="gsc_a_y"><span class="gsc_a_h gsc_a_hc gs_ibl">{5}</span></td></tr>"""
+
+pageTemplate = """<!doctype html><html><head><title>{0} - Google Scholar</title></head><body><div id="gsc_bdy"><div class="gsc_rsb"><table id="gsc_rsb_st"><thead><tr><th class="gsc_rsb_sth"></th><th class="gsc_rsb_sth">All</th><th class="gsc_rsb_sth">Since {1}</th></tr></thead><tbody>{2}</tbody></table><div class="gsc_g_hist_wrp" dir="rtl"><div class="gsc_md_hist_w"><div class="gsc_md_hist_b">{3}</div></div></div></div><form><table id="gsc_a_t"><tbody id="gsc_a_b">{4}</tbody></table><div id="gsc_lwp"><span id="gsc_a_nn">Articles {5}&ndash;{6}</span></div></form></div></body></html>"""
+
+def synthetic_profile(profileID, publications):
+    """Generates the publications of a synthetic profile, deterministically
+    from its ID, with citations that decrease roughly as a power law.
+    Returns a list of (citations, year) tuples, in decreasing order of
+    citations.
+
+    Keyword arguments:
+    profileID - the profile ID
+    publications - the number of publications
+    """
+    rng = random.Random(profileID)
+    scale = rng.uniform(50, 5000)
+    exponent = rng.uniform(0.6, 1.4)
+    thisYear = date.today().year
+    return [
+        (int(scale / (i + 1) ** exponent), rng.randint(thisYear - 30, thisYear))
+        for i in range(publications)
+    ]
+
+def synthetic_profile_page(profileID, profile, cstart=0, pagesize=100):
+    """Generates a page of a synthetic profile, in the format of a
+    Scholar profile page.
+
+    Keyword arguments:
+    profileID - the profile ID
+    profile - the publications of the profile, as returned by
+        synthetic_profile
+    cstart - the index of the first publication on the page
+    pagesize - the number of publications per page
+    """
+    thisYear = date.today().year
+    cites = [ c for c, y in profile ]
+    total = sum(cites)
+    recent = [ c // (1 + max(0, thisYear - y - 5)) for c, y in profile ]
+    h = sum(1 for i, c in enumerate(cites) if c >= i + 1)
+    recentSorted = sorted(recent, reverse=True)
+    summary = "".join([
+        summaryRowTemplate.format("Citations", total, sum(recent)),
+        summaryRowTemplate.format(
+            "h-index",
+            h,
+            sum(1 for i, c in enumerate(recentSorted) if c >= i + 1)
+        ),
+        summaryRowTemplate.format(
+            "i10-index",
+            sum(1 for c in cites if c >= 10),
+            sum(1 for c in recent if c >= 10)
+        )
+    ])
+    perYear = Counter()
+    for c, y in profile:
+        for year in range(y, thisYear + 1):
+            perYear[year] += c // (thisYear - y + 1)
+    years = list(range(thisYear - len(perYear) + 1, thisYear + 1)) if (
+        len(perYear) > 0) else []
+    tallest = max(perYear.values()) if len(perYear) > 0 else 1
+    histogram = "".join(
+        yearTemplate.format(32 * (len(years) - 1 - i) + 3, y)
+        for i, y in enumerate(years)
+    ) + "".join(
+        barTemplate.format(
+            32 * (len(years) - 1 - i) + 8,
+            160 - 160 * perYear[y] // max(1, tallest),
+            160 * perYear[y] // max(1, tallest),
+            len(years) - i,
+            perYear[y]
+        ) for i, y in enumerate(years) if perYear[y] > 0
+    )
+    rows = "".join(
+        rowTemplate.format(
+            profileID,
+            i,
+            i % 7 + 1,
+            i % 13 + 1,
+            i % 11,
+            y,
+            "https://scholar.google.com/scholar?cites={0}".format(
+                hashlib.sha256("{0}:{1}".format(profileID, i).encode()).hexdigest()[:16]
+            ) if c > 0 else "",
+            c if c > 0 else ""
+        ) for i, (c, y) in enumerate(profile[cstart:cstart + pagesize], start=cstart)
+    )
+    return pageTemplate.format(
+        profileID,
+        thisYear - 5,
+        summary,
+        histogram,
+        rows,
+        cstart + 1,
+        min(len(profile), cstart + pagesize)
+    )
+
+class StandInScholarHandler(BaseHTTPRequestHandler):
+    """Handles requests for the pages of synthetic profiles."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        if server.latency > 0:
+            time.sleep(server.latency)
+        status = server.draw_status()
+        if parts.path != "/citations" or "user" not in query:
+            status = 404
+        if status != 200:
+            server.record(status)
+            self.send_response(status)
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        profileID = query["user"][0]
+        cstart = int(query["cstart"][0]) if "cstart" in query else 0
+        pagesize = int(query["pagesize"][0]) if "pagesize" in query else 20
+        body = synthetic_profile_page(
+            profileID,
+            server.profile(profileID),
+            cstart,
+            pagesize
+        ).encode("utf-8")
+        etag = '"{0}"'.format(hashlib.sha256(body).hexdigest()[:32])
+        if self.headers["If-None-Match"] == etag:
+            server.record(304)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        accepted = self.headers["Accept-Encoding"] if (
+            "Accept-Encoding" in self.headers) else ""
+        server.record(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", etag)
+        if "gzip" in accepted:
+            body = gzip.compress(body, 6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class StandInScholarServer(ThreadingHTTPServer):
+    """An HTTP server, standing in for Google Scholar, that serves the
+    pages of synthetic profiles at /citations?user=ID, with pagination
+    via the cstart and pagesize parameters. It can add latency to each
+    request, and fail a random fraction of requests with a 500 or a 429
+    (with Retry-After: 0). The profiles are generated deterministically
+    from their IDs, so any ID is valid."""
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), publications=150, latency=0, errorRate=0, throttleRate=0, seed=0):
+        """Initializes the StandInScholarServer.
+
+        Keyword arguments:
+        address - the address and port, where port 0 picks a free port
+        publications - the number of publications of each profile
+        latency - the time in seconds added to each request
+        errorRate - the fraction of requests that fail with a 500
+        throttleRate - the fraction of requests that fail with a 429
+        seed - the seed for the random failures
+        """
+        super().__init__(address, StandInScholarHandler)
+        self.publications = publications
+        self.latency = latency
+        self.errorRate = errorRate
+        self.throttleRate = throttleRate
+        self.statuses = Counter()
+        self._rng = random.Random(seed)
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """The scheme, host, and port of the server."""
+        return "http://{0}:{1}".format(*self.server_address[:2])
+
+    def profile(self, profileID):
+        """Gets the publications of a synthetic profile.
+
+        Keyword arguments:
+        profileID - the profile ID
+        """
+        with self._lock:
+            if profileID not in self._profiles:
+                self._profiles[profileID] = synthetic_profile(
+                    profileID,
+                    self.publications
+                )
+            return self._profiles[profileID]
+
+    def draw_status(self):
+        """Randomly chooses the status of a request, per the error and
+        throttle rates."""
+        with self._lock:
+            r = self._rng.random()
+        if r < self.errorRate:
+            return 500
+        if r < self.errorRate + self.throttleRate:
+            return 429
+        return 200
+
+    def record(self, status):
+        """Records the status of a response.
+
+        Keyword arguments:
+        status - the status code
+        """
+        with self._lock:
+            self.statuses[status] += 1
+
+    def start(self):
+        """Starts serving in a background thread, and returns the server."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the server."""
+        self.shutdown()
+        self.server_close()
+
+class TimingFetcher:
+    """Wraps a fetcher, recording the latency and status of each
+    retrieval."""
+
+    __slots__ = [ '_fetcher', 'latencies', 'statuses', '_lock' ]
+
+    def __init__(self, fetcher):
+        """Initializes the TimingFetcher.
+
+        Keyword arguments:
+        fetcher - the fetcher for the requests
+        """
+        self._fetcher = fetcher
+        self.latencies = []
+        self.statuses = Counter()
+        self._lock = threading.Lock()
+
+    def fetch(self, url, headers, sink=None):
+        """Retrieves a page with the wrapped fetcher, timing it.
+
+        Keyword arguments:
+        url - the url of the page
+        headers - a dict of the request headers
+        sink - an object that is passed the body as it arrives, or None
+        """
+        start = time.perf_counter()
+        response = self._fetcher.fetch(url, headers) if (
+            sink == None) else self._fetcher.fetch(url, headers, sink)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies.append(elapsed)
+            self.statuses[response[0]] += 1
+        return response
+
+    def close(self):
+        """Releases any resources held by the wrapped fetcher."""
+        self._fetcher.close()
+
+def percentile(values, p):
+    """Computes a percentile by the nearest-rank method.
+
+    Keyword arguments:
+    values - a list of numbers
+    p - the percentile, from 0 to 100
+    """
+    if len(values) == 0:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def peak_memory():
+    """Gets the peak resident memory of the process in bytes, or None
+    if the platform doesn't support measuring it."""
+    if resource == None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux, but in bytes on macOS
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+def run_load_test(profiles=20, publications=150, latency=0, errorRate=0, throttleRate=0, options=None):
+    """Runs the batch pipeline, with the retrieval, parsing, calculation,
+    and output of the real utility, for a number of synthetic profiles
+    retrieved from a StandInScholarServer. Returns a dict of statistics.
+
+    Keyword arguments:
+    profiles - the number of profiles
+    publications - the number of publications of each profile
+    latency - the time in seconds added by the server to each request
+    errorRate - the fraction of requests that fail with a 500
+    throttleRate - the fraction of requests that fail with a 429
+    options - a dict of additional fields of the batch configuration,
+        such as fetchBackend, workers, maxPages, retries, etc
+    """
+    server = StandInScholarServer(
+        publications=publications,
+        latency=latency,
+        errorRate=errorRate,
+        throttleRate=throttleRate
+    ).start()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            configuration = dict(options) if options != None else {}
+            configuration["scholarURL"] = server.base_url
+            configuration["profiles"] = [
+                {
+                    "scholarID" : "P{0}".format(i),
+                    "jsonOutputFile" : os.path.join(directory, "P{0}.json".format(i)),
+                    "svgConfig" : [
+                        {
+                            "background" : "#010409",
+                            "border" : "rgba(56,139,253,0.4)",
+                            "filename" : os.path.join(directory, "P{0}.svg".format(i)),
+                            "text" : "#c9d1d9",
+                            "title" : "#58a6ff"
+                        }
+                    ]
+                } for i in range(profiles)
+            ]
+            fetcher = TimingFetcher(bib.getFetcher(configuration))
+            completed = True
+            start = time.perf_counter()
+            try:
+                bib.processBatch(configuration, fetcher)
+            except SystemExit:
+                completed = False
+            finally:
+                elapsed = time.perf_counter() - start
+                fetcher.close()
+            outputs = sum(
+                1 for name in os.listdir(directory) if name.endswith(".json")
+            )
+    finally:
+        server.stop()
+    requests = sum(server.statuses.values())
+    return {
+        "completed" : completed,
+        "profiles" : profiles,
+        "profiles-output" : outputs,
+        "elapsed" : elapsed,
+        "requests" : requests,
+        "requests-per-second" : requests / elapsed if elapsed > 0 else None,
+        "profiles-per-second" : profiles / elapsed if elapsed > 0 else None,
+        "latency-p50" : percentile(fetcher.latencies, 50),
+        "latency-p99" : percentile(fetcher.latencies, 99),
+        "server-statuses" : dict(server.statuses),
+        "peak-memory" : peak_memory()
+    }
+
+def main():
+    """Entry point for the load test."""
+    parser = argparse.ArgumentParser(
+        prog="python3 -m bibliometrics.loadtest",
+        description="Load test the bibliometrics pipeline against a local stand-in for Scholar."
+    )
+    parser.add_argument("--profiles", type=int, default=20, help="number of profiles")
+    parser.add_argument("--publications", type=int, default=150, help="publications per profile")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to each request")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests failing with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0, help="fraction of requests failing with 429")
+    parser.add_argument("--backend", default="urllib", help="fetch backend: urllib or asyncio")
+    parser.add_argument("--workers", type=int, default=4, help="profiles processed at a time")
+    parser.add_argument("--fetch-workers", type=int, default=4, help="pages of a profile retrieved at a time")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests at a time for the asyncio backend")
+    parser.add_argument("--max-pages", type=int, default=1, help="maximum pages per profile")
+    parser.add_argument("--retries", type=int, default=0, help="retries of transient failures")
+    parser.add_argument("--rate", type=float, default=None, help="maximum requests per second")
+    parser.add_argument("--streaming", action="store_true", help="parse pages as they arrive")
+    args = parser.parse_args()
+    options = {
+        "fetchBackend" : args.backend,
+        "workers" : args.workers,
+        "fetchWorkers" : args.fetch_workers,
+        "fetchConcurrency" : args.concurrency,
+        "maxPages" : args.max_pages,
+        "retries" : args.retries,
+        "retryBackoff" : 0.01,
+        "streamingParser" : args.streaming
+    }
+    if args.rate != None:
+        options["requestsPerSecond"] = args.rate
+        options["burst"] = max(1, int(args.rate))
+    stats = run_load_test(
+        args.profiles,
+        args.publications,
+        args.latency,
+        args.error_rate,
+        args.throttle_rate,
+        options
+    )
+    for key, value in stats.items():
+        print("{0:>20}: {1}".format(
+            key,
+            "{0:.4f}".format(value) if isinstance(value, float) else value
+        ))
+
+if __name__ == "__main__":
+    main()
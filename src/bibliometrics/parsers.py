@@ -0,0 +1,295 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import re
+from array import array
+from html.parser import HTMLParser
+from .scanner import scanPage, parse_cites_per_pub, addSummaryCell
+from .scanner import citesPerYearMetric, summaryCellCount, histogramMarker
+
+class ScanningParser:
+    """Parses the profile pages by scanning for the markers of the
+    bibliometrics with str.find, or bytes.find, in a single forward
+    pass over each page."""
+
+    __slots__ = []
+
+    def scan(self, page):
+        """Parses a profile page, the first, for the bibliometrics in
+        its summary table and histogram, and its cites per publication.
+        Returns a tuple of a dict of the scraped bibliometrics and the
+        list of cites per publication.
+
+        Keyword arguments:
+        page - the profile page, either a str or bytes-like
+        """
+        return scanPage(page)
+
+    def cites(self, page):
+        """Parses a profile page for its cites per publication.
+
+        Keyword arguments:
+        page - the profile page, either a str or bytes-like
+        """
+        return parse_cites_per_pub(page)
+
+def _compile(pattern, flags=0):
+    """Compiles a pattern for both str and bytes pages. Returns a dict
+    from the type of page to the compiled pattern.
+
+    Keyword arguments:
+    pattern - the pattern as a str, which must be ASCII
+    flags - the flags of the pattern
+    """
+    return {
+        str : re.compile(pattern, flags),
+        bytes : re.compile(pattern.encode("ascii"), flags)
+    }
+
+class RegexParser:
+    """Parses the profile pages with compiled regular expressions, one
+    for each part of the page, which are matched in the same order as
+    the parts appear in the page."""
+
+    __slots__ = []
+
+    _cell = _compile(r'<td\b[^>]*>(.*?)</td>', re.S)
+    _tag = _compile(r'<[^>]*>')
+    _histogram = _compile(
+        re.escape(histogramMarker.decode("ascii")) + r'(.*?)(?:</div>|\Z)',
+        re.S
+    )
+    _year = _compile(r'class="gsc_g_t"[^>]*>([^<]*)<')
+    _bar = _compile(
+        r'class="gsc_g_a"[^>]*?z-index:(\d+)[^>]*>.*?class="gsc_g_al">(\d+)<',
+        re.S
+    )
+    _cites = _compile(r'class="gsc_a_ac gs_ibl">(.*?)</a>', re.S)
+
+    def scan(self, page):
+        """Parses a profile page, the first, for the bibliometrics in
+        its summary table and histogram, and its cites per publication.
+        Returns a tuple of a dict of the scraped bibliometrics and the
+        list of cites per publication.
+
+        Keyword arguments:
+        page - the profile page, either a str or bytes-like
+        """
+        kind = str if isinstance(page, str) else bytes
+        metrics = {}
+        rows = []
+        i = 0
+        for cell, match in zip(range(summaryCellCount), self._cell[kind].finditer(page)):
+            texts = [ t.strip() for t in self._tag[kind].split(match.group(1)) ]
+            text = next((t for t in reversed(texts) if len(t) > 0), texts[0][:0])
+            if not addSummaryCell(
+                    metrics,
+                    cell,
+                    text if kind == str else text.decode("utf-8", "replace"),
+                    rows):
+                break
+            i = match.end()
+        match = self._histogram[kind].search(page, i)
+        if match != None:
+            histogram = self._parse_histogram(kind, match.group(1))
+            if histogram != None:
+                metrics["cites-per-year"] = citesPerYearMetric(histogram)
+            i = match.end(1)
+        return metrics, self._parse_cites(kind, page, i)
+
+    def cites(self, page):
+        """Parses a profile page for its cites per publication.
+
+        Keyword arguments:
+        page - the profile page, either a str or bytes-like
+        """
+        return self._parse_cites(str if isinstance(page, str) else bytes, page, 0)
+
+    def _parse_cites(self, kind, page, start):
+        """Parses the cites per publication from an index in the page.
+
+        Keyword arguments:
+        kind - the type of the patterns, str or bytes
+        page - the profile page
+        start - the index in the page at which to start
+        """
+        citesList = []
+        for match in self._cites[kind].finditer(page, start):
+            cites = match.group(1).strip()
+            if len(cites) > 0:
+                citesList.append(int(cites))
+        return citesList
+
+    def _parse_histogram(self, kind, histogram):
+        """Parses the histogram of citations per year. Returns a tuple
+        of the first year and an array of the citations in each year,
+        or None if it has no years.
+
+        Keyword arguments:
+        kind - the type of the patterns, str or bytes
+        histogram - the part of the page with the histogram
+        """
+        years = []
+        for match in self._year[kind].finditer(histogram):
+            year = match.group(1).strip()
+            if not year.isdigit():
+                break
+            years.append(int(year))
+        if len(years) == 0:
+            return None
+        counts = array('i', [0]) * (years[-1] - years[0] + 1)
+        for match in self._bar[kind].finditer(histogram):
+            index = len(years) - int(match.group(1))
+            if 0 <= index < len(years):
+                counts[years[index] - years[0]] = int(match.group(2))
+        return years[0], counts
+
+class StructuralParser:
+    """Parses the profile pages with html.parser, by the structure of
+    their elements rather than by searching for markers in the text,
+    which decodes each page to a str."""
+
+    __slots__ = []
+
+    def scan(self, page):
+        """Parses a profile page, the first, for the bibliometrics in
+        its summary table and histogram, and its cites per publication.
+        Returns a tuple of a dict of the scraped bibliometrics and the
+        list of cites per publication.
+
+        Keyword arguments:
+        page - the profile page, either a str or bytes-like
+        """
+        parser = _ProfileHTMLParser()
+        parser.feed(page if isinstance(page, str) else bytes(page).decode("utf-8", "replace"))
+        parser.close()
+        metrics = parser.metrics
+        if len(parser.years) > 0:
+            counts = array('i', [0]) * (parser.years[-1] - parser.years[0] + 1)
+            for z, count in parser.bars:
+                index = len(parser.years) - z
+                if 0 <= index < len(parser.years):
+                    counts[parser.years[index] - parser.years[0]] = count
+            metrics["cites-per-year"] = citesPerYearMetric((parser.years[0], counts))
+        return metrics, parser.cites
+
+    def cites(self, page):
+        """Parses a profile page for its cites per publication.
+
+        Keyword arguments:
+        page - the profile page, either a str or bytes-like
+        """
+        return self.scan(page)[1]
+
+class _ProfileHTMLParser(HTMLParser):
+    """Collects the cells of the summary table, the years and bars of
+    the histogram, and the cites per publication, as the elements of a
+    profile page are parsed."""
+
+    _zIndex = re.compile(r'z-index:\s*(\d+)')
+
+    def __init__(self):
+        """Initializes the _ProfileHTMLParser."""
+        super().__init__()
+        self.metrics = {}
+        self.years = []
+        self.bars = []
+        self.cites = []
+        self._rows = []
+        self._cell = 0
+        self._texts = None
+        self._histogram = None
+        self._yearsDone = False
+        self._field = None
+        self._z = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        classes = attributes["class"] if "class" in attributes else None
+        if tag == "td" and self._cell < summaryCellCount:
+            self._texts = []
+        elif tag == "div" and classes == "gsc_md_hist_b" and self._histogram == None:
+            self._histogram = True
+        elif self._histogram == True and tag == "span" and classes == "gsc_g_t":
+            if not self._yearsDone:
+                self._field = "year"
+                self._texts = []
+        elif self._histogram == True and tag == "a" and classes == "gsc_g_a":
+            style = attributes["style"] if "style" in attributes and attributes["style"] else ""
+            match = self._zIndex.search(style)
+            self._z = int(match.group(1)) if match != None else None
+        elif self._histogram == True and tag == "span" and classes == "gsc_g_al":
+            if self._z != None:
+                self._field = "bar"
+                self._texts = []
+        elif tag == "a" and classes == "gsc_a_ac gs_ibl":
+            self._field = "cites"
+            self._texts = []
+
+    def handle_endtag(self, tag):
+        if tag == "td" and self._field == None and self._texts != None:
+            texts = [ t.strip() for t in self._texts ]
+            text = next((t for t in reversed(texts) if len(t) > 0), "")
+            self._texts = None
+            if addSummaryCell(self.metrics, self._cell, text, self._rows):
+                self._cell += 1
+            else:
+                self._cell = summaryCellCount
+        elif tag == "div" and self._histogram == True:
+            self._histogram = False
+        elif tag == "span" and self._field == "year":
+            year = "".join(self._texts).strip()
+            if year.isdigit():
+                self.years.append(int(year))
+            else:
+                self._yearsDone = True
+            self._field = None
+            self._texts = None
+        elif tag == "span" and self._field == "bar":
+            count = "".join(self._texts).strip()
+            if count.isdigit():
+                self.bars.append((self._z, int(count)))
+            self._field = None
+            self._texts = None
+            self._z = None
+        elif tag == "a" and self._field == "cites":
+            cites = "".join(self._texts).strip()
+            if len(cites) > 0:
+                self.cites.append(int(cites))
+            self._field = None
+            self._texts = None
+
+    def handle_data(self, data):
+        if self._texts != None:
+            self._texts.append(data)
+
+# The parser backends, by the name with which the parser field of the
+# configuration selects them
+parserBackends = {
+    "scanner" : ScanningParser,
+    "regex" : RegexParser,
+    "html" : StructuralParser
+}
@@ -0,0 +1,208 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import sys, html
+from array import array
+from collections import namedtuple
+from .scanner import asMarker
+
+Publication = namedtuple(
+    "Publication",
+    [ "title", "authors", "venue", "year", "cites", "cluster" ]
+)
+
+class PublicationTable:
+    """The publications of one or more Scholar profiles, stored by
+    column: the citations and years in arrays of machine ints, with 0
+    where Scholar lists none, and the venues as interned strings, such
+    that the many publications in the same venue share one string. Each
+    row can be retrieved as a Publication."""
+
+    __slots__ = [ 'titles', 'authors', 'venues', 'years', 'cites', 'clusters' ]
+
+    def __init__(self):
+        """Initializes an empty PublicationTable."""
+        self.titles = []
+        self.authors = []
+        self.venues = []
+        self.years = array('i')
+        self.cites = array('i')
+        self.clusters = []
+
+    def append(self, title, authors, venue, year, cites, cluster):
+        """Adds a publication.
+
+        Keyword arguments:
+        title - the title
+        authors - the authors, as listed by Scholar
+        venue - the venue, such as the journal, without the year
+        year - the year of publication, or 0 if unknown
+        cites - the number of citations
+        cluster - the ID of the citation cluster, which is the value
+            of the cites parameter of the link to the citing articles,
+            or the empty string if there are none
+        """
+        self.titles.append(title)
+        self.authors.append(authors)
+        self.venues.append(sys.intern(venue))
+        self.years.append(year)
+        self.cites.append(cites)
+        self.clusters.append(cluster)
+
+    def extend(self, other):
+        """Adds all of the publications of another PublicationTable.
+
+        Keyword arguments:
+        other - the other PublicationTable
+        """
+        self.titles.extend(other.titles)
+        self.authors.extend(other.authors)
+        self.venues.extend(other.venues)
+        self.years.extend(other.years)
+        self.cites.extend(other.cites)
+        self.clusters.extend(other.clusters)
+
+    def cites_list(self):
+        """Gets a list of the citations of the publications that have
+        any, in order, which is the input of a BibliometricCalculator."""
+        return [ c for c in self.cites if c > 0 ]
+
+    def to_records(self):
+        """Gets the publications as a list of dicts, such as for output
+        as JSON."""
+        return [ p._asdict() for p in self ]
+
+    def __len__(self):
+        return len(self.cites)
+
+    def __getitem__(self, i):
+        return Publication(
+            self.titles[i],
+            self.authors[i],
+            self.venues[i],
+            self.years[i],
+            self.cites[i],
+            self.clusters[i]
+        )
+
+    def __iter__(self):
+        return map(
+            Publication._make,
+            zip(
+                self.titles,
+                self.authors,
+                self.venues,
+                self.years,
+                self.cites,
+                self.clusters
+            )
+        )
+
+def parsePublications(page, table=None) :
+    """Parses the publications listed on the scholar profile page, with
+    their titles, authors, venues, years, citations, and citation
+    clusters. Returns a PublicationTable. Each field is searched for
+    only within its own cell of its own row, such that a field missing
+    from a row is left empty rather than taken from a later cell or row.
+
+    Keyword arguments:
+    page - The user profile page, either a str or bytes-like
+    table - A PublicationTable to which the publications are added, or
+        None for a new PublicationTable
+    """
+    if table == None :
+        table = PublicationTable()
+    rowStart = asMarker('<tr class="gsc_a_tr">', page)
+    rowEnd = asMarker("</tr>", page)
+    i = page.find(rowStart)
+    while i >= 0 :
+        nextRow = page.find(rowStart, i + len(rowStart))
+        rowLimit = nextRow if nextRow >= 0 else len(page)
+        end = page.find(rowEnd, i, rowLimit)
+        if end < 0 :
+            end = rowLimit
+        citesCell = cellStart('class="gsc_a_c"', page, i, end)
+        yearCell = cellStart('class="gsc_a_y"', page, citesCell, end)
+        title, j = textBetween(page, 'class="gsc_a_at">', "</a>", i, citesCell)
+        authors, j = textBetween(page, '<div class="gs_gray">', "</div>", j, citesCell)
+        venue = ""
+        if j > i :
+            venue = textBetween(page, '<div class="gs_gray">', "</div>", j, citesCell)[0]
+            venue = venue.split('<span class="gs_oph">')[0].strip()
+        k = page.find(asMarker('class="gsc_a_ac gs_ibl">', page), citesCell, yearCell)
+        href = page.rfind(asMarker('href="', page), citesCell, k) if k >= 0 else -1
+        link = textBetween(page, 'href="', '"', href, k)[0] if href >= 0 else ""
+        cites = textBetween(page, 'class="gsc_a_ac gs_ibl">', "</a>", citesCell, yearCell)[0]
+        year = textBetween(page, 'class="gsc_a_h gsc_a_hc gs_ibl">', "</span>", yearCell, end)[0]
+        table.append(
+            html.unescape(title),
+            html.unescape(authors),
+            html.unescape(venue),
+            int(year) if year.isdigit() else 0,
+            int(cites) if cites.isdigit() else 0,
+            link.split("cites=")[1].split("&")[0] if "cites=" in link else ""
+        )
+        i = nextRow
+    return table
+
+def cellStart(marker, page, start, end) :
+    """Finds the start of a cell of a publication row, or end if the
+    row has no such cell.
+
+    Keyword arguments:
+    marker - The class attribute of the cell
+    page - The user profile page, either a str or bytes-like
+    start - The index of the page at which to start searching
+    end - The index of the end of the row
+    """
+    i = page.find(asMarker(marker, page), start, end)
+    return i if i >= 0 else end
+
+def textBetween(page, left, right, start, end) :
+    """Finds the text between two markers, within a range of the page.
+    Returns a tuple of the text, decoded if the page is bytes-like and
+    stripped of surrounding whitespace, and the index just past it; or
+    the empty string and start if either marker isn't found.
+
+    Keyword arguments:
+    page - The user profile page, either a str or bytes-like
+    left - The marker preceding the text
+    right - The marker following the text
+    start - The index of the page at which to start searching
+    end - The index of the page at which to stop searching
+    """
+    i = page.find(asMarker(left, page), start, end)
+    if i < 0 :
+        return "", start
+    i += len(left)
+    j = page.find(asMarker(right, page), i, end)
+    if j < 0 :
+        return "", start
+    text = page[i:j]
+    if not isinstance(text, str) :
+        text = text.decode("utf-8", "replace")
+    return text.strip(), j
@@ -0,0 +1,129 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import random, threading, time
+from urllib.parse import urlsplit
+
+class TokenBucket:
+    """A thread-safe token bucket, which allows requests at a sustained
+    rate, with bursts of up to a maximum number of requests."""
+
+    __slots__ = [ '_rate', '_burst', '_tokens', '_last', '_lock' ]
+
+    def __init__(self, rate, burst=1):
+        """Initializes the TokenBucket, which starts full.
+
+        Keyword arguments:
+        rate - the sustained rate in requests per second
+        burst - the maximum number of requests in a burst
+        """
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Waits until a token is available, and takes it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._burst,
+                    self._tokens + (now - self._last) * self._rate
+                )
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+class RateLimitedFetcher:
+    """Wraps a fetcher such that the requests stay under a rate limit,
+    as set by a token bucket, with a limit on the number of requests
+    in progress to each host, and optionally with random delays that
+    spread the requests over a time window rather than sending them
+    in bursts."""
+
+    __slots__ = [ '_fetcher', '_bucket', '_perHost', '_hosts', '_jitter', '_lock' ]
+
+    def __init__(self, fetcher, rate=None, burst=1, perHost=None, jitter=0):
+        """Initializes the RateLimitedFetcher.
+
+        Keyword arguments:
+        fetcher - the fetcher for the requests
+        rate - the maximum sustained rate in requests per second, or None
+            for no limit on the rate
+        burst - the maximum number of requests in a burst
+        perHost - the maximum number of requests in progress to any one
+            host, or None for no limit
+        jitter - the maximum random delay in seconds before each request
+        """
+        self._fetcher = fetcher
+        self._bucket = TokenBucket(rate, burst) if rate else None
+        self._perHost = perHost
+        self._hosts = {}
+        self._jitter = jitter
+        self._lock = threading.Lock()
+
+    def fetch(self, url, headers, sink=None):
+        """Retrieves a page once the rate limit and the limit on requests
+        to its host allow. Returns a tuple of the status code, the response
+        headers, and the body as bytes.
+
+        Keyword arguments:
+        url - the url of the page
+        headers - a dict of the request headers
+        sink - an object that is passed the body as it arrives, or None
+        """
+        if self._jitter > 0:
+            time.sleep(random.uniform(0, self._jitter))
+        if self._perHost == None:
+            if self._bucket != None:
+                self._bucket.acquire()
+            return self._fetcher.fetch(url, headers) if (
+                sink == None) else self._fetcher.fetch(url, headers, sink)
+        with self._host_semaphore(urlsplit(url).netloc):
+            if self._bucket != None:
+                self._bucket.acquire()
+            return self._fetcher.fetch(url, headers) if (
+                sink == None) else self._fetcher.fetch(url, headers, sink)
+
+    def close(self):
+        """Releases any resources held by the wrapped fetcher."""
+        self._fetcher.close()
+
+    def _host_semaphore(self, host):
+        """Gets the semaphore limiting the requests in progress to a host.
+
+        Keyword arguments:
+        host - the host
+        """
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self._perHost)
+            return self._hosts[host]
@@ -0,0 +1,264 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Recomputes the bibliometrics of archived profile pages, such as after a
+# change to the calculations, from each retrieval of a profile in a page
+# archive or from each page on its own, memory mapping each plain page or
+# parsing each compressed page as it is decompressed, and spreading them
+# across a pool of processes, with one line of JSON output per retrieval or
+# page. Run with: python3 -m bibliometrics.reprocess --help
+
+import argparse, contextlib, io, json, lzma, mmap, os, sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from . import bibliometrics as bib
+from .archive import PageArchive
+from .parsers import parserBackends
+from .scanner import StreamingPageParser
+
+def archived_pages(paths):
+    """Lists the archived profile retrievals and pages under each of the
+    paths, as tuples of a dict that identifies them in the output and the
+    list of the filenames of their pages, in order. A path is either a
+    file with a single page or a directory that is searched recursively,
+    each directory's files in order by name before its subdirectories,
+    skipping hidden files and directories. A directory with an index.jsonl
+    is a PageArchive, whose pages are grouped into the retrievals of its
+    profiles by its index (see archive_retrievals) rather than listed
+    one by one.
+
+    Keyword arguments:
+    paths - the files and directories
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield { "page" : path }, [ path ]
+            continue
+        for directory, subdirectories, filenames in os.walk(path):
+            if "index.jsonl" in filenames:
+                subdirectories[:] = []
+                yield from archive_retrievals(directory)
+                continue
+            subdirectories[:] = sorted(d for d in subdirectories if not d.startswith("."))
+            for name in sorted(filenames):
+                if not name.startswith("."):
+                    filename = os.path.join(directory, name)
+                    yield { "page" : filename }, [ filename ]
+
+def archive_retrievals(directory):
+    """Lists the retrievals of the profiles of a PageArchive, in the order
+    of the index, as tuples of a dict of the profile ID (profile) and the
+    time of retrieval of its first page (fetched), and the list of the
+    filenames of the pages retrieved, in order from the first up to the
+    first that wasn't. A retrieval of a profile ends where the index lists
+    a page of the profile that it already has, which starts the next.
+
+    Keyword arguments:
+    directory - the directory of the archive
+    """
+    archive = PageArchive(directory)
+    retrievals = []
+    current = {}
+    for e in archive.entries():
+        if e["profile"] not in current or e["cstart"] in current[e["profile"]]:
+            current[e["profile"]] = {}
+            retrievals.append(current[e["profile"]])
+        current[e["profile"]][e["cstart"]] = e
+    for entries in retrievals:
+        first = entries[0] if 0 in entries else entries[min(entries)]
+        filenames = []
+        while len(filenames) * bib.pageSize in entries:
+            filename = archive.object_path(entries[len(filenames) * bib.pageSize]["sha256"])
+            if filename == None:
+                break
+            filenames.append(filename)
+        yield { "profile" : first["profile"], "fetched" : first["fetched"] }, filenames
+
+def map_page(filename):
+    """Memory maps an archived page, such that the parser scans it in
+    place, without reading it into memory, unless it is gzip or xz (lzma)
+    compressed, in which case it is decompressed into memory. Returns the page as a
+    bytes-like object, which the caller closes if it is an mmap.
+
+    Keyword arguments:
+    filename - the filename of the page with path
+    """
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        page = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if is_compressed(page):
+        try:
+            return bib.decompressPage(page)
+        finally:
+            page.close()
+    return page
+
+def is_compressed(page):
+    """Checks if a page, or its first six bytes, is gzip or xz (lzma)
+    compressed, as are the pages of a PageArchive.
+
+    Keyword arguments:
+    page - the page, or its start, as bytes-like
+    """
+    return page[:2] == bib.gzipMagic or page[:6] == bib.xzMagic
+
+def read_page(filename, parser="scanner"):
+    """Reads an archived page for parsing, with memory bounded by the
+    chunks of the page rather than its size where possible: a plain page
+    is memory mapped, and a compressed page is parsed by a
+    StreamingPageParser in chunks as it is decompressed, if the parser
+    backend is the scanner. Other parser backends need the complete page,
+    so a compressed page is decompressed into memory for them. Returns
+    either the page as a bytes-like object, which the caller closes if it
+    is an mmap, or the StreamingPageParser.
+
+    Keyword arguments:
+    filename - the filename of the page with path
+    parser - the name of the parser backend
+    """
+    if parser == "scanner":
+        with open(filename, "rb") as f:
+            compressed = is_compressed(f.read(6))
+        if compressed:
+            return bib.readSavedPage(filename, True, StreamingPageParser())
+    return map_page(filename)
+
+def reprocess_page(filename, year=None, parser="scanner"):
+    """Computes the bibliometrics of an archived page, as the first page
+    of a profile. Returns a tuple of a line of JSON with the filename and
+    either the bibliometrics, as in the JSON output, or the error if they
+    couldn't be computed, and whether there was an error.
+
+    Keyword arguments:
+    filename - the filename of the page with path
+    year - the year of the first publication, or None
+    parser - the name of the parser backend
+    """
+    return reprocess_retrieval(({ "page" : filename }, [ filename ]), year, parser)
+
+def reprocess_retrieval(retrieval, year=None, parser="scanner"):
+    """Computes the bibliometrics of an archived retrieval of a profile,
+    from all of its pages. Returns a tuple of a line of JSON with the dict
+    that identifies the retrieval and either the bibliometrics, as in the
+    JSON output, or the error if they couldn't be computed, such as the
+    output of the failed validation, and whether there was an error.
+
+    Keyword arguments:
+    retrieval - a tuple of the dict that identifies the retrieval and the
+        list of the filenames of its pages, in order (see archived_pages)
+    year - the year of the first publication, or None
+    parser - the name of the parser backend
+    """
+    result, filenames = retrieval
+    result = dict(result)
+    messages = io.StringIO()
+    pages = []
+    try:
+        if len(filenames) == 0:
+            raise ValueError("The first page of the profile isn't archived")
+        with contextlib.redirect_stdout(messages):
+            for filename in filenames:
+                pages.append(read_page(filename, parser))
+            backend = parserBackends[parser]()
+            if isinstance(pages[0], StreamingPageParser):
+                scraped, citesList = pages[0].metrics, list(pages[0].cites)
+            else:
+                scraped, citesList = backend.scan(pages[0])
+            for page in pages[1:]:
+                citesList.extend(page.cites if isinstance(page, StreamingPageParser) else backend.cites(page))
+            metrics = bib.calculateBibliometrics(scraped, citesList, year, bib.pageSize * len(pages))
+        result["metrics"] = bib.convertMetrics(metrics)
+    except (OSError, EOFError, lzma.LZMAError, ValueError) as e:
+        result["error"] = "{0}: {1}".format(type(e).__name__, e)
+    except SystemExit:
+        result["error"] = " ".join(
+            line for line in messages.getvalue().splitlines() if line.startswith(("ERROR", "Error"))
+        )
+    finally:
+        for page in pages:
+            if isinstance(page, mmap.mmap):
+                page.close()
+    return json.dumps(result, sort_keys=True), "error" in result
+
+def reprocess(paths, output, year=None, parser="scanner", workers=None, chunksize=16):
+    """Recomputes the bibliometrics of all of the archived retrievals of
+    profiles and pages under the paths (see archived_pages), across a pool
+    of processes, writing a line of JSON for each to the output in order.
+    Returns a tuple of the number of lines and the number of them with
+    errors.
+
+    Keyword arguments:
+    paths - the files and directories of the archived pages
+    output - a text file to which the lines of JSON are written
+    year - the year of the first publication, or None
+    parser - the name of the parser backend
+    workers - the number of processes, or None for one per CPU
+    chunksize - the number of retrievals and pages sent to a process at a time
+    """
+    if parser not in parserBackends:
+        raise ValueError("Unknown parser " + parser)
+    lines = errors = 0
+    with ProcessPoolExecutor(workers) as executor:
+        for line, failed in executor.map(
+                reprocess_retrieval,
+                archived_pages(paths),
+                repeat(year),
+                repeat(parser),
+                chunksize=chunksize):
+            output.write(line)
+            output.write("\n")
+            lines += 1
+            if failed:
+                errors += 1
+    return lines, errors
+
+def main():
+    """Entry point for reprocessing archived pages."""
+    argParser = argparse.ArgumentParser(
+        prog="python3 -m bibliometrics.reprocess",
+        description="Recompute the bibliometrics of archived profile retrievals and pages, as JSON Lines."
+    )
+    argParser.add_argument("paths", nargs="+", help="archived pages, plain or compressed, or directories of them or of page archives")
+    argParser.add_argument("--output", default="-", help="JSON Lines output file, or - for standard output")
+    argParser.add_argument("--first-pub-year", type=int, default=None, help="year of the first publication, for the m-quotient")
+    argParser.add_argument("--parser", default="scanner", choices=sorted(parserBackends), help="parser backend")
+    argParser.add_argument("--workers", type=int, default=None, help="processes, by default one per CPU")
+    argParser.add_argument("--chunksize", type=int, default=16, help="retrievals and pages sent to a process at a time")
+    args = argParser.parse_args()
+    with (open(args.output, "w") if args.output != "-" else contextlib.nullcontext(sys.stdout)) as output:
+        lines, errors = reprocess(
+            args.paths,
+            output,
+            args.first_pub_year,
+            args.parser,
+            args.workers,
+            args.chunksize
+        )
+    print("Reprocessed", lines, "retrievals and pages,", errors, "with errors.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import asyncio, random, threading, time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from http.client import HTTPException
+
+retryStatuses = { 429, 500, 502, 503, 504 }
+
+# The network errors that are retried, including a connection closed in
+# the middle of the body (e.g., http.client.IncompleteRead or
+# RemoteDisconnected from urllib, or asyncio.IncompleteReadError)
+retryExceptions = (
+    OSError,
+    HTTPException,
+    asyncio.TimeoutError,
+    asyncio.IncompleteReadError
+)
+
+class CircuitBreaker:
+    """Tracks the outcomes of recent requests, and pauses all requests
+    for a time once the fraction of them that failed reaches a
+    threshold."""
+
+    __slots__ = [ '_threshold', '_outcomes', '_pause', '_until', '_lock' ]
+
+    def __init__(self, threshold=0.5, window=20, pause=60):
+        """Initializes the CircuitBreaker.
+
+        Keyword arguments:
+        threshold - the fraction of failed requests that opens the breaker
+        window - the number of most recent requests considered, which
+            must all have completed before the breaker can open
+        pause - the time in seconds that requests are paused once open
+        """
+        self._threshold = threshold
+        self._outcomes = deque(maxlen=window)
+        self._pause = pause
+        self._until = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Waits until the breaker is closed."""
+        while True:
+            with self._lock:
+                wait = self._until - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def record(self, success):
+        """Records the outcome of a request, opening the breaker if the
+        failures have reached the threshold.
+
+        Keyword arguments:
+        success - True if the request succeeded, and otherwise False
+        """
+        with self._lock:
+            self._outcomes.append(success)
+            if len(self._outcomes) == self._outcomes.maxlen and (
+                    self._outcomes.count(False) >= self._threshold * len(self._outcomes)):
+                print("WARNING: Too many failed requests. Pausing for", self._pause, "seconds.")
+                self._until = time.monotonic() + self._pause
+                self._outcomes.clear()
+
+class RetryingFetcher:
+    """Wraps a fetcher such that requests that fail with a transient
+    error (429 or 5xx status, or a network error) are retried with
+    exponential backoff and jitter, honoring any Retry-After header,
+    and optionally with a circuit breaker shared by all requests."""
+
+    __slots__ = [ '_fetcher', '_retries', '_backoff', '_maxBackoff', '_breaker' ]
+
+    def __init__(self, fetcher, retries=3, backoff=1, maxBackoff=60, breaker=None):
+        """Initializes the RetryingFetcher.
+
+        Keyword arguments:
+        fetcher - the fetcher for the requests
+        retries - the maximum number of retries of a request
+        backoff - the delay in seconds before the first retry, which
+            doubles with each subsequent retry
+        maxBackoff - the maximum delay in seconds before a retry, including
+            as requested by a Retry-After header
+        breaker - a CircuitBreaker, or None for no circuit breaker
+        """
+        self._fetcher = fetcher
+        self._retries = retries
+        self._backoff = backoff
+        self._maxBackoff = maxBackoff
+        self._breaker = breaker
+
+    def fetch(self, url, headers, sink=None):
+        """Retrieves a page, retrying transient failures. Returns a tuple
+        of the status code, the response headers, and the body as bytes,
+        of the last attempt if all of them fail.
+
+        Keyword arguments:
+        url - the url of the page
+        headers - a dict of the request headers
+        sink - an object that is passed the body as it arrives, which is
+            reset before each retry, or None
+        """
+        attempt = 0
+        while True:
+            if self._breaker != None:
+                self._breaker.wait()
+            if attempt > 0 and sink != None:
+                sink.reset()
+            try:
+                response = self._fetcher.fetch(url, headers) if (
+                    sink == None) else self._fetcher.fetch(url, headers, sink)
+            except retryExceptions:
+                if self._breaker != None:
+                    self._breaker.record(False)
+                if attempt >= self._retries:
+                    raise
+                time.sleep(self._delay(attempt, None))
+                attempt += 1
+                continue
+            status, response_headers = response[0], response[1]
+            success = status not in retryStatuses
+            if self._breaker != None:
+                self._breaker.record(success)
+            if success or attempt >= self._retries:
+                return response
+            time.sleep(self._delay(
+                attempt,
+                response_headers["Retry-After"] if (
+                    "Retry-After" in response_headers) else None
+            ))
+            attempt += 1
+
+    def close(self):
+        """Releases any resources held by the wrapped fetcher."""
+        self._fetcher.close()
+
+    def _delay(self, attempt, retryAfter):
+        """Computes the delay before a retry.
+
+        Keyword arguments:
+        attempt - the number of retries so far
+        retryAfter - the value of the Retry-After header, either seconds
+            or an HTTP date, or None if the response didn't include one
+        """
+        if retryAfter != None:
+            try:
+                return min(self._maxBackoff, max(0, float(retryAfter)))
+            except ValueError:
+                try:
+                    return min(self._maxBackoff, max(0, (
+                        parsedate_to_datetime(retryAfter) - datetime.now(timezone.utc)
+                    ).total_seconds()))
+                except (TypeError, ValueError):
+                    pass
+        delay = min(self._maxBackoff, self._backoff * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
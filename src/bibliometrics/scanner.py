@@ -0,0 +1,389 @@
+# bibliometrics: Summarize your Google Scholar bibliometrics in an SVG
+#
+# Copyright (c) 2022-2025 Vincent A Cicirello
+# https://www.cicirello.org/
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+from array import array
+
+# The rows of the summary table, keyed by their labels, with the keys
+# of the bibliometrics in their columns, all-time and then recent (the
+# last five years), in the order in which the rows usually appear
+summaryRows = {
+    "citations" : ("total-cites", "five-year-cites"),
+    "h-index" : ("h-index", "five-year-h-index"),
+    "i10-index" : ("i10-index", "five-year-i10-index")
+}
+
+# The number of cells of the summary table, each row of which has a
+# label followed by a cell for each column
+summaryCellCount = 3 * len(summaryRows)
+
+citesMarker = b"class=\"gsc_a_ac gs_ibl\">"
+
+# The start of the histogram of citations per year, which follows the
+# summary table, and ends at the first </div> after it
+histogramMarker = b"class=\"gsc_md_hist_b\""
+
+def asMarker(marker, page) :
+    """Gets a marker in the same type as the page, str or bytes, as
+    all of the markers are ASCII.
+
+    Keyword arguments:
+    marker - The marker as a str
+    page - The user profile page, either a str or bytes-like
+    """
+    return marker if isinstance(page, str) else marker.encode("ascii")
+
+def cellText(page, start, end) :
+    """Gets the text of a cell of a table, which is the last text in
+    the cell outside of the tags, such as the text of a link. Returns
+    the text as a str, stripped of surrounding whitespace.
+
+    Keyword arguments:
+    page - The user profile page, either a str or bytes-like
+    start - The index in the page at which the cell starts
+    end - The index in the page at which the cell ends
+    """
+    tagEnd = asMarker(">", page)
+    tagStart = asMarker("<", page)
+    while True :
+        i = page.rfind(tagEnd, start, end)
+        text = page[max(start, i + 1):end].strip()
+        if len(text) > 0 or i < 0 :
+            break
+        # the cell ends with a tag, so look before it
+        end = page.rfind(tagStart, start, i)
+        if end < 0 :
+            break
+    return text if isinstance(text, str) else text.decode("utf-8", "replace")
+
+def addSummaryCell(metrics, cell, text, rows) :
+    """Adds a cell of the summary table to the bibliometrics. The
+    rows are identified by their labels, or if a label isn't one of
+    summaryRows, by their position. Returns False, after printing an
+    error, if the layout of the table isn't as expected, and otherwise
+    True.
+
+    Keyword arguments:
+    metrics - The dict of the bibliometrics scraped so far
+    cell - The index of the cell, counting across each row in turn
+    text - The text of the cell
+    rows - A list of the keys of the rows scanned so far, to which
+        the keys of the row are added when its label cell is scanned
+    """
+    row, column = divmod(cell, 3)
+    if column == 0 :
+        label = text.lower()
+        if label not in summaryRows :
+            print("WARNING: Unrecognized row", repr(text), "in the summary table of the profile.")
+        rows.append(summaryRows[label] if (
+            label in summaryRows) else list(summaryRows.values())[row])
+        return True
+    if not text.isdigit() :
+        print(
+            "ERROR: Unexpected layout of the summary table of the profile:",
+            repr(text),
+            "in column",
+            column + 1,
+            "of row",
+            row + 1
+        )
+        return False
+    metrics[rows[row][column - 1]] = int(text)
+    return True
+
+def parseCitesPerYear(page, start=0, end=None) :
+    """Parses the histogram of citations per year. The labels of the
+    years come first, followed by a bar for each year with citations,
+    whose z-index counts down to 1 for the last year. Returns a tuple of
+    the first year and an array of the citations in each year from the
+    first through the last, or None if there is no histogram.
+
+    Keyword arguments:
+    page - The user profile page, either a str or bytes-like
+    start - The index in the page at which the histogram starts
+    end - The index in the page at which the histogram ends, or None
+        for the end of the page
+    """
+    if end == None :
+        end = len(page)
+    tagEnd = asMarker(">", page)
+    tagStart = asMarker("<", page)
+    yearMarker = asMarker('class="gsc_g_t"', page)
+    years = []
+    i = page.find(yearMarker, start, end)
+    while i >= 0 :
+        left = page.find(tagEnd, i, end) + 1
+        right = page.find(tagStart, left, end)
+        if left <= 0 or right < 0 or not page[left:right].strip().isdigit() :
+            break
+        years.append(int(page[left:right]))
+        i = page.find(yearMarker, right, end)
+    if len(years) == 0 :
+        return None
+    counts = array('i', [0]) * (years[-1] - years[0] + 1)
+    barMarker = asMarker('class="gsc_g_a"', page)
+    zMarker = asMarker("z-index:", page)
+    labelMarker = asMarker('class="gsc_g_al">', page)
+    i = page.find(barMarker, start, end)
+    while i >= 0 :
+        z = page.find(zMarker, i, end)
+        label = page.find(labelMarker, i, end)
+        if z < 0 or label < 0 :
+            break
+        z += len(zMarker)
+        label += len(labelMarker)
+        right = page.find(tagStart, label, end)
+        if right < 0 :
+            break
+        try :
+            index = len(years) - int(page[z:page.find(asMarker('"', page), z, label)])
+            if 0 <= index < len(years) :
+                counts[years[index] - years[0]] = int(page[label:right])
+        except ValueError :
+            pass
+        i = page.find(barMarker, right, end)
+    return years[0], counts
+
+def citesPerYearMetric(histogram) :
+    """Converts the histogram of citations per year to the form in which
+    it is included in the bibliometrics, a dict from the years, as str,
+    to the citations in that year.
+
+    Keyword arguments:
+    histogram - A tuple of the first year and an array of the citations
+        per year, as returned by parseCitesPerYear
+    """
+    firstYear, counts = histogram
+    return { str(firstYear + k) : c for k, c in enumerate(counts) }
+
+def scanSummaryTable(page) :
+    """Scans the summary table of the scholar profile page, cell by
+    cell, front to back, for all of its cells: the total citations,
+    h-index, and i10-index, both all-time and for the last five years.
+    Returns a tuple of a dict of the bibliometrics scraped from the
+    table, and the index in the page just past the last cell scanned.
+
+    Keyword arguments:
+    page - The user profile page, either a str or bytes-like (e.g., the
+        undecoded body of the response, or an mmap of a saved page), in
+        which case only the cells themselves are copied out of it
+    """
+    cellEnd = asMarker("</td>", page)
+    metrics = {}
+    rows = []
+    i = 0
+    for cell in range(summaryCellCount) :
+        endStat = page.find(cellEnd, i)
+        if endStat < 0 :
+            break
+        if not addSummaryCell(metrics, cell, cellText(page, i, endStat), rows) :
+            break
+        i = endStat + 5
+    return metrics, i
+
+def scanCitesPerYear(page, metrics, start=0) :
+    """Scans the histogram of citations per year, adding it to the
+    bibliometrics as cites-per-year if the page has one. Returns the
+    index in the page just past the histogram, or start if there is
+    none.
+
+    Keyword arguments:
+    page - The user profile page, either a str or bytes-like
+    metrics - The dict of bibliometrics scraped from the page
+    start - The index in the page at which to start scanning
+    """
+    i = page.find(asMarker(histogramMarker.decode("ascii"), page), start)
+    if i < 0 :
+        return start
+    end = page.find(asMarker("</div>", page), i)
+    if end < 0 :
+        end = len(page)
+    histogram = parseCitesPerYear(page, i, end)
+    if histogram != None :
+        metrics["cites-per-year"] = citesPerYearMetric(histogram)
+    return end
+
+def scanPage(page) :
+    """Scans the scholar profile page in a single forward pass, first
+    for the bibliometrics in the summary table, then the histogram of
+    citations per year, and then the cites per publication, in the
+    order in which they appear in the page. Returns a tuple of a dict
+    of the scraped bibliometrics and the list of cites per publication.
+
+    Keyword arguments:
+    page - The user profile page, either a str or bytes-like
+    """
+    metrics, i = scanSummaryTable(page)
+    i = scanCitesPerYear(page, metrics, i)
+    return metrics, parse_cites_per_pub(page, i)
+
+def parse_cites_per_pub(page, start=0) :
+    """Parses the cites per publication for calculating g-index,
+    e-index, i100-index, etc.
+
+    Keyword arguments:
+    page - The user profile page, either a str or bytes-like
+    start - The index in the page at which to start scanning
+    """
+    marker = asMarker("class=\"gsc_a_ac gs_ibl\">", page)
+    linkEnd = asMarker("</a>", page)
+    citesList = []
+    nextLeft = page.find(marker, start)
+    while nextLeft >= 0 :
+        nextLeft += len(marker)
+        right = page.find(linkEnd, nextLeft)
+        if right >= 0 :
+            cites = page[nextLeft:right].strip()
+            if len(cites) > 0 :
+                citesList.append(int(cites))
+        else :
+            right = nextLeft + 1
+        nextLeft = page.find(marker, right)
+    return citesList
+
+class StreamingPageParser:
+    """Parses a Scholar profile page incrementally, as its chunks
+    arrive, for the bibliometrics in the summary table and then the
+    cites per publication, holding no more of the page than the part
+    not yet parsed. It can stop early, once a condition on what it has
+    parsed so far is met. Its results are the same as those of scanPage
+    for the complete page."""
+
+    __slots__ = [
+        'metrics',
+        'cites',
+        'stopped',
+        '_stop',
+        '_buffer',
+        '_cell',
+        '_rows',
+        '_histogram'
+    ]
+
+    def __init__(self, stop=None):
+        """Initializes the StreamingPageParser.
+
+        Keyword arguments:
+        stop - a function of the dict of bibliometrics scraped from the
+            summary table and the list of cites per publication parsed so
+            far, which returns True once no more of the page is needed, or
+            None to parse the complete page
+        """
+        self._stop = stop
+        self.reset()
+
+    def reset(self):
+        """Discards everything parsed so far, such as to parse the page
+        again from the start when a retrieval is retried."""
+        self.metrics = {}
+        self.cites = []
+        self.stopped = False
+        self._buffer = b""
+        self._cell = 0
+        self._rows = []
+        self._histogram = False
+
+    def feed(self, chunk):
+        """Parses the next chunk of the page. Returns False once no more
+        of the page is needed, and otherwise True.
+
+        Keyword arguments:
+        chunk - the next chunk of the page as bytes
+        """
+        if self.stopped:
+            return False
+        buffer = self._buffer + chunk if len(self._buffer) > 0 else chunk
+        i = 0
+        while self._cell < summaryCellCount:
+            endStat = buffer.find(b"</td>", i)
+            if endStat < 0:
+                # keep the text of the cell, which follows at most the
+                # last two tags (e.g., in a link), and any part of a
+                # "</td>" at the end of the chunk
+                last = buffer.rfind(b">", i)
+                keep = buffer.rfind(b">", i, last) if last >= 0 else -1
+                if keep < 0:
+                    keep = last if last >= 0 else max(i, len(buffer) - 4)
+                self._buffer = buffer[keep:]
+                return True
+            if not addSummaryCell(
+                    self.metrics,
+                    self._cell,
+                    cellText(buffer, i, endStat),
+                    self._rows):
+                self._cell = summaryCellCount
+                break
+            self._cell += 1
+            i = endStat + 5
+        if not self._histogram:
+            # the histogram, if any, precedes the first publication
+            start = buffer.find(histogramMarker, i)
+            first = buffer.find(citesMarker, i)
+            if start >= 0 and (first < 0 or start < first):
+                end = buffer.find(b"</div>", start)
+                if end < 0:
+                    self._buffer = buffer[start:]
+                    return True
+                histogram = parseCitesPerYear(buffer, start, end)
+                if histogram != None:
+                    self.metrics["cites-per-year"] = citesPerYearMetric(histogram)
+                i = end
+            elif first < 0:
+                # keep any part of either marker at the end of the chunk
+                self._buffer = buffer[max(i, len(buffer) - len(citesMarker) + 1):]
+                return True
+            self._histogram = True
+            if self._should_stop():
+                return False
+        while True:
+            left = buffer.find(citesMarker, i)
+            if left < 0:
+                # keep any part of the marker at the end of the chunk
+                self._buffer = buffer[max(i, len(buffer) - len(citesMarker) + 1):]
+                return True
+            right = buffer.find(b"</a>", left + len(citesMarker))
+            if right < 0:
+                self._buffer = buffer[left:]
+                return True
+            cites = buffer[left + len(citesMarker):right].strip()
+            i = right
+            if len(cites) > 0:
+                self.cites.append(int(cites))
+                if self._should_stop():
+                    return False
+
+    def close(self):
+        """Finishes parsing the page. Returns a tuple of the dict of the
+        scraped bibliometrics and the list of cites per publication."""
+        self._buffer = b""
+        return self.metrics, self.cites
+
+    def _should_stop(self):
+        """Checks the stop condition, and stops if it is met."""
+        if self._stop != None and self._stop(self.metrics, self.cites):
+            self.stopped = True
+            self._buffer = b""
+        return self.stopped
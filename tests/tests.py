@@ -25,12 +25,106 @@
 # 
 
 import unittest
+from unittest.mock import patch
 
-import sys, math
+import sys, math, os, json, tempfile, threading, gzip, lzma, zlib, random, hashlib, asyncio
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 sys.path.insert(0,'src')
+import bibliometrics
 import bibliometrics.bibliometrics as bib
 from bibliometrics.calculator import BibliometricCalculator
+import bibliometrics.calculator as calculator
+from bibliometrics.fetch import AsyncFetcher, UrllibFetcher
+from bibliometrics.cache import CachingFetcher, ParseCache
+import bibliometrics.cache as cache_module
+from bibliometrics.ratelimit import RateLimitedFetcher, TokenBucket
+from bibliometrics.retry import RetryingFetcher, CircuitBreaker
+from bibliometrics.scanner import StreamingPageParser, parseCitesPerYear
+from bibliometrics.publications import PublicationTable, Publication
+from bibliometrics.loadtest import StandInScholarServer, synthetic_profile, run_load_test
+from bibliometrics.parsers import parserBackends
+from bibliometrics.benchmark import benchmark_parsers, synthetic_pages
+from bibliometrics.reprocess import reprocess, reprocess_page, archived_pages
+from bibliometrics.archive import PageArchive, ArchivingFetcher
+from datetime import timezone, timedelta
+import bibliometrics.batch as batch
+from bibliometrics.incremental import IncrementalCalculator
+import time
+from http.client import parse_headers, IncompleteRead, RemoteDisconnected
+import io
+
+class KeepAliveHandler(BaseHTTPRequestHandler) :
+    """Request handler for testing the fetchers, which counts the
+    connections, redirects /redirect to /page, sends /chunked with
+    chunked transfer encoding, and compresses /gzip, /deflate, and
+    /rawdeflate (without a zlib header)."""
+
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self) :
+        with KeepAliveHandler.lock :
+            KeepAliveHandler.connections += 1
+        super().setup()
+
+    def log_message(self, format, *args) :
+        pass
+
+    def do_GET(self) :
+        if self.path == "/redirect" :
+            self.send_response(302)
+            self.send_header("Location", "/page")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = (self.path + " " + self.headers["User-Agent"]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        accepted = self.headers["Accept-Encoding"] if "Accept-Encoding" in self.headers else ""
+        if self.path == "/gzip" and "gzip" in accepted :
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        elif self.path == "/deflate" and "deflate" in accepted :
+            body = zlib.compress(body)
+            self.send_header("Content-Encoding", "deflate")
+        elif self.path == "/rawdeflate" and "deflate" in accepted :
+            compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+            self.send_header("Content-Encoding", "deflate")
+        if self.path == "/chunked" :
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(body), 3) :
+                chunk = body[i:i+3]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        else :
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+def synthetic_page(cites, summary=(2052, 364, 25, 10, 33, 14)) :
+    """Generates a page in the format of a Scholar profile page with
+    the given citations per publication and summary table."""
+    table = '<table id="gsc_rsb_st"><tbody>'
+    for label, i in zip(["Citations", "h-index", "i10-index"], range(0, 6, 2)) :
+        table += (
+            '<tr><td class="gsc_rsb_sc1"><a class="gsc_rsb_f gs_ibl">{0}</a></td>'
+            '<td class="gsc_rsb_std">{1}</td><td class="gsc_rsb_std">{2}</td></tr>'
+        ).format(label, summary[i], summary[i+1])
+    table += '</tbody></table>'
+    rows = ''.join(
+        '<tr class="gsc_a_tr"><td class="gsc_a_t"><a href="/citations" class="gsc_a_at">'
+        'Title {0}</a><div class="gs_gray">A Lastname1</div><div class="gs_gray">'
+        'Journal<span class="gs_oph">, 2001</span></div></td><td class="gsc_a_c">'
+        '<a href="https://scholar.google.com/scholar?cites={0}" class="gsc_a_ac gs_ibl">'
+        '{1}</a></td><td class="gsc_a_y"><span class="gsc_a_h gsc_a_hc gs_ibl">2001'
+        '</span></td></tr>'.format(i, c if c > 0 else "") for i, c in enumerate(cites)
+    )
+    return '<html><body>' + table + '<table id="gsc_a_t"><tbody>' + rows + '</tbody></table></body></html>'
 
 class TestBibiometrics(unittest.TestCase) :
 
@@ -275,12 +369,1160 @@ class TestBibiometrics(unittest.TestCase) :
         self.assertEqual(5, calc._metrics["i1000-index"])
         self.assertEqual(9, calc._metrics["i100-index"])
 
+    def test_calculator_walk(self):
+        rng = random.Random(42)
+        for n in [1, 2, 10, 100, 1000] :
+            cites = sorted((int(rng.paretovariate(0.7) * 5) for i in range(n)), reverse=True)
+            prefix_sums, g, w, ixx_counts = BibliometricCalculator._walk(cites)
+            self.assertEqual([ sum(cites[:i+1]) for i in range(n) ], prefix_sums)
+            self.assertEqual(max([0] + [ i+1 for i in range(n) if sum(cites[:i+1]) >= (i+1)**2 ]), g)
+            self.assertEqual(sum(1 for i, c in enumerate(cites) if c >= 10*(i+1)), w)
+            self.assertEqual([ sum(1 for c in cites if c >= xx) for xx in [100, 1000, 10000] ], ixx_counts)
+
+    def test_calculator_histogram(self):
+        rng = random.Random(7)
+        for n in [1, 2, 10, 100, 1000] :
+            cites = [ int(rng.paretovariate(0.7) * 5) - 1 for i in range(n) ]
+            prefix_sums, g, w, ixx_counts = BibliometricCalculator._walk(sorted(cites, reverse=True))
+            counts = {}
+            for c in cites :
+                counts[c] = counts.get(c, 0) + 1
+            self.assertEqual((g, w, ixx_counts), BibliometricCalculator._walk_histogram(counts))
+            h = sum(1 for i, c in enumerate(sorted(cites, reverse=True)) if c >= i+1)
+            for metrics, limit in [
+                    ({ "total-cites" : sum(cites), "five-year-cites" : 1, "h-index" : h, "i10-index" : 1 }, None),
+                    ({ "total-cites" : sum(cites), "five-year-cites" : 1, "h-index" : h + 1, "i10-index" : 1 }, n)] :
+                expected = BibliometricCalculator(metrics, cites, 2000, limit).to_dict()
+                with patch.object(calculator, "histogram_cutoff", 1) :
+                    self.assertEqual(expected, BibliometricCalculator(metrics, cites, 2000, limit).to_dict())
+
+    def test_calculator_lazy(self):
+        rng = random.Random(11)
+        cites = [ int(rng.paretovariate(0.7) * 5) for i in range(150) ]
+        h = sum(1 for i, c in enumerate(sorted(cites, reverse=True)) if c >= i+1)
+        metrics = { "total-cites" : sum(cites), "five-year-cites" : 1, "h-index" : h, "i10-index" : 1 }
+        expected = BibliometricCalculator(metrics, cites, 2000, None).to_dict()
+        for cutoff in [calculator.histogram_cutoff, 1] :
+            with patch.object(calculator, "histogram_cutoff", cutoff) :
+                for stats in [[], ["o-index"], ["a-index", "w-index"], ["m-quotient", "i100-index"], list(expected)] :
+                    computed = BibliometricCalculator(metrics, cites, 2000, None, stats).to_dict()
+                    needed = set(metrics) | set(stats)
+                    for key in stats :
+                        needed.update(calculator.metric_dependencies.get(key, ()))
+                    self.assertEqual({ key : expected[key] for key in needed if key in expected }, computed)
+        with patch.object(BibliometricCalculator, "_walk") as walk :
+            with patch.object(BibliometricCalculator, "_walk_histogram") as walk_histogram :
+                computed = BibliometricCalculator(metrics, cites, 2000, None, ["e-index", "h-median"]).to_dict()
+                walk.assert_not_called()
+                walk_histogram.assert_not_called()
+        self.assertEqual(expected["e-index"], computed["e-index"])
+        self.assertEqual(expected["h-median"], computed["h-median"])
+        self.assertNotIn("g-index", computed)
+        with patch.object(BibliometricCalculator, "_get") as get :
+            computed = BibliometricCalculator(metrics, cites, 2000, None, ["h-index", "total-cites", "m-quotient"]).to_dict()
+            get.assert_not_called()
+        self.assertEqual(expected["m-quotient"], computed["m-quotient"])
+
+    def test_incremental_calculator(self):
+        rng = random.Random(5)
+        cites = [ int(rng.paretovariate(0.7) * 5) for i in range(300) ]
+        state = IncrementalCalculator(cites, 1)
+        for step in range(40) :
+            for i in range(rng.randint(1, 4)) :
+                j = rng.randrange(len(cites))
+                cites[j] = max(0, cites[j] + rng.choice([-2, 1, 3, 40, 900]))
+            if step % 5 == 0 :
+                cites.append(rng.randint(0, 300))
+            if step % 7 == 0 :
+                cites.remove(rng.choice(cites))
+            h = sum(1 for k, c in enumerate(sorted(cites, reverse=True)) if c >= k+1)
+            metrics = { "total-cites" : sum(cites), "five-year-cites" : 1, "h-index" : h + step % 2, "i10-index" : 1 }
+            changes = state.changes(cites)
+            self.assertTrue(len(changes) <= 6)
+            with patch.object(BibliometricCalculator, "_walk") as walk :
+                state.update(changes, metrics["h-index"])
+                walk.assert_not_called()
+            self.assertEqual(sorted(cites, reverse=True), state.cites())
+            for limit in [None, len(cites)] :
+                self.assertEqual(
+                    BibliometricCalculator(metrics, cites, 2000, limit).to_dict(),
+                    state.calculate(metrics, 2000, limit))
+        with self.assertRaises(ValueError) :
+            state.update([(10**9, 1)])
+        with tempfile.TemporaryDirectory() as directory :
+            filename = os.path.join(directory, "state.json")
+            self.assertEqual(None, IncrementalCalculator.load(filename))
+            state.save(filename)
+            loaded = IncrementalCalculator.load(filename)
+            self.assertEqual(state.cites(), loaded.cites())
+            self.assertEqual(state.calculate(metrics, 2000), loaded.calculate(metrics, 2000))
+
+    def test_incremental_process_profile(self):
+        cites = list(range(250, 50, -1))
+        with tempfile.TemporaryDirectory() as directory :
+            configuration = {
+                "offlineInput" : os.path.join(directory, "pages"),
+                "jsonOutputFile" : os.path.join(directory, "out", "bibliometrics.json"),
+                "incremental" : True,
+                "svgConfig" : []
+            }
+            os.makedirs(configuration["offlineInput"])
+            for run in range(2) :
+                for i in range(0, len(cites), 100) :
+                    with open(os.path.join(configuration["offlineInput"], "page{0}.html".format(i)), "w") as f :
+                        f.write(synthetic_page(cites[i:i+100]))
+                bib.processProfile(configuration, None, "Mozilla/5.0")
+                with open(configuration["jsonOutputFile"], "r") as f :
+                    metrics = json.load(f)
+                state = IncrementalCalculator.load(os.path.join(directory, "out", "bibliometrics.state.json"))
+                self.assertEqual(cites, state.cites())
+                del configuration["incremental"]
+                bib.processProfile(configuration, None, "Mozilla/5.0")
+                with open(configuration["jsonOutputFile"], "r") as f :
+                    self.assertEqual(json.load(f), metrics)
+                configuration["incremental"] = True
+                cites[0] += 5000
+                cites[150] += 1
+            # the state isn't saved when the bibliometrics come from the
+            # parse cache, as it isn't updated
+            configuration["parseCacheDirectory"] = os.path.join(directory, "parsed")
+            bib.processProfile(configuration, None, "Mozilla/5.0")
+            os.remove(configuration["jsonOutputFile"])
+            with patch.object(IncrementalCalculator, "save") as mocked :
+                bib.processProfile(configuration, None, "Mozilla/5.0")
+                mocked.assert_not_called()
+            with open(configuration["jsonOutputFile"], "r") as f :
+                self.assertEqual(json.load(f), metrics)
+
+    def batch_profiles(self) :
+        rng = random.Random(3)
+        cites_lists, metrics, years, limits = [], [], [], []
+        for i in range(60) :
+            n = [0, 1, 2, 5, 50, 200][i % 6]
+            cites = [ max(0, int(rng.paretovariate([0.5, 0.8, 1.5][i % 3]) * [1, 5, 50, 400][i % 4]) - i % 2) for j in range(n) ]
+            if i % 10 == 0 :
+                cites = [0] * n
+            if i == 13 :
+                cites[0] = 2**40
+            rng.shuffle(cites)
+            h = sum(1 for k, c in enumerate(sorted(cites, reverse=True)) if c >= k+1)
+            scraped = { "total-cites" : sum(cites), "five-year-cites" : 1, "h-index" : max(0, h + [0, 0, 1, -1][i % 4]), "i10-index" : 1 }
+            if i == 7 :
+                del scraped["h-index"]
+            cites_lists.append(cites)
+            metrics.append(scraped)
+            years.append([None, 2000, datetime.now().year, 1990][i % 4])
+            limits.append([None, 100, n, n + 1][(i // 4) % 4])
+        expected = [ BibliometricCalculator(m, c, y, l).to_dict() for m, c, y, l in zip(metrics, cites_lists, years, limits) ]
+        return cites_lists, metrics, years, limits, expected
+
+    def test_batch_calculator(self):
+        cites_lists, metrics, years, limits, expected = self.batch_profiles()
+        flat, offsets = batch.ragged(cites_lists)
+        self.assertEqual(len(cites_lists) + 1, len(offsets))
+        table = batch.calculate_batch(metrics, flat, offsets, years, limits, False)
+        self.assertEqual(expected, table.to_dicts())
+        self.assertEqual(len(metrics), len(table))
+        self.assertEqual([ m["g-index"] if "g-index" in m else None for m in expected ], table.columns["g-index"])
+        self.assertEqual(expected[2:5], batch.calculate_batch(metrics[2:5], flat, offsets[2:6], years[2:5], limits[2:5], False).to_dicts())
+        with patch.object(batch, "numpy", None) :
+            self.assertEqual(expected, list(batch.calculate_batch(metrics, flat, offsets, years, limits)))
+            with self.assertRaises(ImportError) :
+                batch.calculate_batch(metrics, flat, offsets, years, limits, True)
+        with self.assertRaises(ValueError) :
+            batch.calculate_batch(metrics, flat, offsets[:-1])
+
+    @unittest.skipIf(batch.numpy == None, "NumPy is not installed")
+    def test_batch_calculator_vectorized(self):
+        cites_lists, metrics, years, limits, expected = self.batch_profiles()
+        flat, offsets = batch.ragged(cites_lists)
+        self.assertEqual(expected, batch.calculate_batch(metrics, flat, offsets, years, limits, True).to_dicts())
+        self.assertEqual(expected[2:5], batch.calculate_batch(metrics[2:5], flat, offsets[2:6], years[2:5], limits[2:5], True).to_dicts())
+        self.assertEqual(expected, batch.calculate_batch(metrics, batch.numpy.array(flat), offsets, years, limits, False).to_dicts())
+        self.assertEqual([{}, {}], batch.calculate_batch([{}, {}], [], [0, 0, 0]).to_dicts())
+
+    def test_calculator_limit(self):
+        metrics = {
+            "total-cites" : 100000,
+            "five-year-cites" : 6,
+            "h-index" : 100,
+            "i10-index" : 100
+        }
+        cites = [1000]*100
+        calc = BibliometricCalculator(metrics, cites, None)
+        for key in ["g-index", "i100-index"]:
+            self.assertFalse(key in calc._metrics)
+        self.assertEqual(100, calc._metrics["w-index"])
+        self.assertEqual(1000, calc._metrics["h-median"])
+        self.assertEqual("300.00", calc._metrics["e-index"])
+        calc = BibliometricCalculator(metrics, cites, None, None)
+        self.assertEqual(100, calc._metrics["g-index"])
+        self.assertEqual(100, calc._metrics["i100-index"])
+        self.assertEqual(100, calc._metrics["w-index"])
+        calc = BibliometricCalculator(metrics, cites, None, 200)
+        self.assertEqual(100, calc._metrics["g-index"])
+        cites = [150]*100
+        calc = BibliometricCalculator(metrics, cites, None)
+        self.assertFalse("g-index" in calc._metrics)
+        self.assertFalse("i100-index" in calc._metrics)
+        self.assertEqual(15, calc._metrics["w-index"])
+        metrics["h-index"] = 101
+        calc = BibliometricCalculator(metrics, cites, None)
+        for key in ["e-index", "r-index", "a-index"]:
+            self.assertFalse(key in calc._metrics)
+        calc = BibliometricCalculator(metrics, cites + [101, 50], None)
+        self.assertEqual("149.51", calc._metrics["a-index"])
+
+    def test_parse_multiple_pages(self):
+        cites = list(range(250, 0, -1))
+        pages = [ synthetic_page(cites[i:i+100]) for i in range(0, 250, 100) ]
+        metrics = bib.parseBibliometrics(pages[0], None)
+        self.assertFalse("g-index" in metrics)
+        self.assertFalse("i100-index" in metrics)
+        self.assertEqual(22, metrics["w-index"])
+        metrics = bib.parseBibliometrics(pages[0], None, pages[1:])
+        self.assertEqual(250, metrics["most-cited"])
+        self.assertEqual(151, metrics["i100-index"])
+        self.assertEqual(167, metrics["g-index"])
+        self.assertEqual(22, metrics["w-index"])
+        metrics = bib.parseBibliometrics(pages[0], None, pages[1:2])
+        self.assertEqual(167, metrics["g-index"])
+        self.assertEqual(151, metrics["i100-index"])
+
+    def test_get_pages(self):
+        cites = list(range(250, 0, -1))
+        pages = [ synthetic_page(cites[i:i+100]) for i in range(0, 400, 100) ]
+        requested = []
+        def fake_get(profileID, user_agent='Mozilla/5.0', cstart=0, *args) :
+            requested.append(cstart)
+            return pages[cstart // 100]
+        with patch.object(bib, "getScholarProfilePage", fake_get) :
+            self.assertEqual(pages[:1], bib.getScholarProfilePages("ID"))
+            self.assertEqual([0], requested)
+            self.assertEqual(pages[:3], bib.getScholarProfilePages("ID", maxPages=10))
+            self.assertEqual(pages[:2], bib.getScholarProfilePages("ID", maxPages=2))
+            requested.clear()
+            self.assertEqual(pages[:3], bib.getScholarProfilePages("ID", maxPages=10, workers=1))
+            self.assertEqual([0, 100, 200], requested)
+        with patch.object(bib, "getScholarProfilePage", lambda *args : pages[2]) :
+            self.assertEqual(pages[2:3], bib.getScholarProfilePages("ID", maxPages=10))
+
+    def test_get_pages_on_demand(self):
+        cites = list(range(250, 0, -1))
+        pages = [ synthetic_page(cites[i:i+100]) for i in range(0, 400, 100) ]
+        requested = []
+        def fake_get(profileID, user_agent='Mozilla/5.0', cstart=0, *args) :
+            requested.append(cstart)
+            return pages[cstart // 100]
+        cases = [
+            (["h-index", "w-index", "most-cited"], 1),
+            (["i100-index"], 2),
+            (["g-index", "w-index"], 2),
+            (["i10000-index"], 1),
+            (["total-cites", "g-index", "i1000-index"], 2),
+            ([], 1)
+        ]
+        with patch.object(bib, "getScholarProfilePage", fake_get) :
+            for workers in [1, 4] :
+                for stats, expected in cases :
+                    requested.clear()
+                    self.assertEqual(
+                        pages[:expected],
+                        bib.getScholarProfilePages("ID", maxPages=10, workers=workers, stats=stats))
+                    # with more than one worker, the page after each of those
+                    # after the first is requested speculatively
+                    self.assertEqual(
+                        [100*i for i in range(expected + (1 if workers > 1 and expected > 1 else 0))],
+                        sorted(requested))
+
+    def test_read_saved_pages(self):
+        cites = list(range(250, 0, -1))
+        pages = [ synthetic_page(cites[i:i+100]) for i in range(0, 250, 100) ]
+        with tempfile.TemporaryDirectory() as directory :
+            for i, page in enumerate(pages) :
+                filename = os.path.join(directory, "page{0}.html".format(1 + 9*i))
+                if i == 1 :
+                    with gzip.open(filename + ".gz", "wt", encoding="utf-8") as f :
+                        f.write(page)
+                else :
+                    with open(filename, "w", encoding="utf-8") as f :
+                        f.write(page)
+            self.assertEqual(pages, bib.readSavedPages(directory))
+            self.assertEqual(pages[2:], bib.readSavedPages(os.path.join(directory, "page19.html")))
+            jsonFile = os.path.join(directory, "out", "bibliometrics.json")
+            bib.processProfile(
+                { "offlineInput" : directory, "jsonOutputFile" : jsonFile, "svgConfig" : [] },
+                None,
+                "Mozilla/5.0")
+            with open(jsonFile, "r") as f :
+                metrics = json.load(f)
+            self.assertEqual(167, metrics["g-index"])
+            self.assertEqual(151, metrics["i100-index"])
+
+    def test_parse_cache(self):
+        pages = [ synthetic_page(list(range(250, 150, -1))), synthetic_page([20, 10]) ]
+        with tempfile.TemporaryDirectory() as directory :
+            cache = ParseCache(os.path.join(directory, "parsed"))
+            key = cache.key(pages, 2000)
+            self.assertEqual(key, cache.key([ p.encode("utf-8") for p in pages ], 2000))
+            self.assertNotEqual(key, cache.key(pages, 2001))
+            self.assertEqual(key, cache.key(pages, 2000, None, "scanner"))
+            self.assertNotEqual(key, cache.key(pages, 2000, None, "regex"))
+            self.assertNotEqual(key, cache.key(pages[:1], 2000))
+            self.assertNotEqual(key, cache.key([pages[0] + pages[1], ""], 2000))
+            # a change to the calculation code, such as in a source
+            # checkout without a package version, changes the keys
+            with patch.object(cache_module, "package_version", return_value=None) :
+                before = ParseCache(os.path.join(directory, "parsed"))
+                self.assertEqual(before.key(pages, 2000), ParseCache(os.path.join(directory, "parsed")).key(pages, 2000))
+                with patch.object(cache_module, "calculation_modules", cache_module.calculation_modules[1:]) :
+                    after = ParseCache(os.path.join(directory, "parsed"))
+            self.assertNotEqual(before.key(pages, 2000), after.key(pages, 2000))
+            self.assertEqual(None, cache.get(key))
+            cache.put(key[::-1], { "h-index" : 3 })
+            self.assertEqual({ "h-index" : 3 }, cache.get(key[::-1]))
+            self.assertEqual(None, cache.get(key))
+            configuration = {
+                "offlineInput" : os.path.join(directory, "pages"),
+                "parseCacheDirectory" : os.path.join(directory, "parsed"),
+                "jsonOutputFile" : os.path.join(directory, "bibliometrics.json"),
+                "firstPubYear" : 2000,
+                "svgConfig" : []
+            }
+            os.makedirs(configuration["offlineInput"])
+            for i, page in enumerate(pages) :
+                with open(os.path.join(configuration["offlineInput"], "page{0}.html".format(i)), "w") as f :
+                    f.write(page)
+            bib.processProfile(configuration, None, "Mozilla/5.0")
+            with open(configuration["jsonOutputFile"], "r") as f :
+                expected = json.load(f)
+            os.remove(configuration["jsonOutputFile"])
+            with patch.object(bib, "parseBibliometrics") as mocked :
+                bib.processProfile(configuration, None, "Mozilla/5.0")
+                mocked.assert_not_called()
+            with open(configuration["jsonOutputFile"], "r") as f :
+                self.assertEqual(expected, json.load(f))
+            self.assertEqual(
+                bib.parseBibliometrics(pages[0], 2000, pages[1:]),
+                cache.get(cache.key(pages, 2000))
+            )
+            # a different parser backend doesn't use the bibliometrics
+            # cached from the pages by another
+            cache.put(cache.key(pages, 2000, None, "html"), { "h-index" : 3 })
+            configuration["parser"] = "regex"
+            with patch.object(bib, "parseBibliometrics", wraps=bib.parseBibliometrics) as mocked :
+                bib.processProfile(configuration, None, "Mozilla/5.0")
+                mocked.assert_called_once()
+            self.assertEqual(expected, bib.convertMetrics(cache.get(cache.key(pages, 2000, None, "regex"))))
+
+    def test_profile_configurations(self):
+        configuration = {
+            "workers" : 8,
+            "firstPubYear" : 1999,
+            "include" : ["h-index"],
+            "profiles" : [
+                { "scholarID" : "A", "jsonOutputFile" : "a.json" },
+                { "scholarID" : "B", "include" : ["g-index"], "firstPubYear" : 2010 }
+            ]
+        }
+        expected = [
+            { "scholarID" : "A", "jsonOutputFile" : "a.json", "firstPubYear" : 1999, "include" : ["h-index"] },
+            { "scholarID" : "B", "firstPubYear" : 2010, "include" : ["g-index"] }
+        ]
+        self.assertEqual(expected, bib.getProfileConfigurations(configuration))
+
+    def test_process_batch(self):
+        pages = {
+            "A" : synthetic_page([228, 212, 166, 99, 91]),
+            "B" : synthetic_page([50, 40, 30], (120, 60, 3, 2, 3, 2))
+        }
+        colors = {
+            "title" : "#58a6ff",
+            "border" : "rgba(56,139,253,0.4)",
+            "background" : "#010409",
+            "text" : "#c9d1d9"
+        }
+        with tempfile.TemporaryDirectory() as directory :
+            configuration = {
+                "workers" : 2,
+                "profiles" : [
+                    {
+                        "scholarID" : scholarID,
+                        "jsonOutputFile" : os.path.join(directory, scholarID + ".json"),
+                        "svgConfig" : [ dict(colors, filename=os.path.join(directory, scholarID + ".svg")) ]
+                    } for scholarID in pages
+                ]
+            }
+            with patch.object(bib, "getScholarProfilePage", lambda scholarID, *args : pages[scholarID]) :
+                bib.processBatch(configuration)
+            for scholarID, expected in [("A", 228), ("B", 50)] :
+                with open(os.path.join(directory, scholarID + ".json"), "r") as f :
+                    self.assertEqual(expected, json.load(f)["most-cited"])
+                self.assertTrue(os.path.isfile(os.path.join(directory, scholarID + ".svg")))
+
+    def test_stand_in_server(self):
+        server = StandInScholarServer(publications=250).start()
+        try :
+            for backend in ["urllib", "asyncio"] :
+                with tempfile.TemporaryDirectory() as directory :
+                    configuration = {
+                        "scholarURL" : server.base_url,
+                        "fetchBackend" : backend,
+                        "maxPages" : 3,
+                        "profiles" : [
+                            {
+                                "scholarID" : scholarID,
+                                "jsonOutputFile" : os.path.join(directory, scholarID + ".json"),
+                                "svgConfig" : [ {
+                                    "title" : "#58a6ff",
+                                    "border" : "rgba(56,139,253,0.4)",
+                                    "background" : "#010409",
+                                    "text" : "#c9d1d9",
+                                    "filename" : os.path.join(directory, scholarID + ".svg")
+                                } ]
+                            } for scholarID in ["X", "Y"]
+                        ]
+                    }
+                    fetcher = bib.getFetcher(configuration)
+                    try :
+                        if backend == "asyncio" :
+                            # the profiles are retrieved as coroutines, not
+                            # in threads, and a failed profile fails the batch
+                            # without stopping the event loop
+                            with patch.object(bib, "getScholarProfilePages", side_effect=AssertionError) :
+                                with patch.object(bib, "parseBibliometrics", side_effect=SystemExit) :
+                                    with self.assertRaises(SystemExit) :
+                                        bib.processBatch(configuration, fetcher)
+                                configuration["streamingParser"] = True
+                                bib.processBatch(configuration, fetcher)
+                                del configuration["streamingParser"]
+                                streamed = {}
+                                for scholarID in ["X", "Y"] :
+                                    with open(os.path.join(directory, scholarID + ".json"), "r") as f :
+                                        streamed[scholarID] = json.load(f)
+                                    os.remove(os.path.join(directory, scholarID + ".json"))
+                                bib.processBatch(configuration, fetcher)
+                        else :
+                            bib.processBatch(configuration, fetcher)
+                    finally :
+                        fetcher.close()
+                    for scholarID in ["X", "Y"] :
+                        cites = [ c for c, y in synthetic_profile(scholarID, 250) ]
+                        with open(os.path.join(directory, scholarID + ".json"), "r") as f :
+                            metrics = json.load(f)
+                        self.assertEqual(cites[0], metrics["most-cited"])
+                        self.assertEqual(sum(cites), metrics["total-cites"])
+                        self.assertEqual(
+                            sum(1 for i, c in enumerate(cites) if c >= i + 1),
+                            metrics["h-index"])
+                        if backend == "asyncio" :
+                            self.assertEqual(metrics, streamed[scholarID])
+            server.throttleRate = 1
+            status, response_headers, body = UrllibFetcher().fetch(
+                bib.getProfilePageUrl("X", 0, server.base_url), {})
+            self.assertEqual(429, status)
+            self.assertEqual("0", response_headers["Retry-After"])
+        finally :
+            server.stop()
+
+    def test_run_load_test(self):
+        stats = run_load_test(3, 50, 0, 0, 0.5, { "retries" : 10, "retryBackoff" : 0.001 })
+        self.assertTrue(stats["completed"])
+        self.assertEqual(3, stats["profiles-output"])
+        self.assertEqual(3, stats["server-statuses"][200])
+        self.assertEqual(stats["requests"], sum(stats["server-statuses"].values()))
+        self.assertTrue(stats["latency-p50"] <= stats["latency-p99"])
+        stats = run_load_test(3, 50, 0, 1, 0)
+        self.assertFalse(stats["completed"])
+        self.assertEqual(0, stats["profiles-output"])
+
+    def test_fetchers(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = "http://127.0.0.1:{0}".format(server.server_address[1])
+        headers = { "User-Agent" : "Test" }
+        try :
+            KeepAliveHandler.connections = 0
+            fetcher = AsyncFetcher(2)
+            try :
+                for path in ["/a", "/b", "/chunked", "/redirect"] :
+                    status, response_headers, body = fetcher.fetch(base + path, headers)
+                    self.assertEqual(200, status)
+                    self.assertEqual("utf-8", response_headers.get_content_charset())
+                    self.assertEqual(
+                        ("/page" if path == "/redirect" else path) + " Test",
+                        body.decode("utf-8"))
+                self.assertEqual(1, KeepAliveHandler.connections)
+                with ThreadPoolExecutor(max_workers=8) as executor :
+                    bodies = list(executor.map(
+                        lambda i : fetcher.fetch(base + "/" + str(i), headers)[2],
+                        range(20)))
+                self.assertEqual([ "/{0} Test".format(i).encode() for i in range(20) ], bodies)
+                self.assertTrue(KeepAliveHandler.connections <= 2)
+            finally :
+                fetcher.close()
+            status, response_headers, body = UrllibFetcher().fetch(base + "/chunked", headers)
+            self.assertEqual(200, status)
+            self.assertEqual(b"/chunked Test", body)
+            fetcher = AsyncFetcher(2)
+            try :
+                for f in [UrllibFetcher(), fetcher] :
+                    for path in ["/gzip", "/deflate", "/rawdeflate"] :
+                        status, response_headers, body = f.fetch(base + path, headers)
+                        self.assertEqual(path.encode() + b" Test", body)
+                        self.assertFalse("Content-Encoding" in response_headers)
+            finally :
+                fetcher.close()
+        finally :
+            server.shutdown()
+            server.server_close()
+
+    def test_caching_fetcher(self):
+        requests = []
+        class FakeFetcher :
+            def __init__(self) :
+                self.status = 200
+            def fetch(self, url, headers) :
+                requests.append(dict(headers))
+                return self.status, parse_headers(io.BytesIO(
+                    b'Content-Type: text/html; charset=utf-8\r\nETag: "v1"\r\n'
+                    b'Last-Modified: Mon, 06 Oct 2025 10:00:00 GMT\r\n\r\n')), (
+                        b"page" if self.status == 200 else b"")
+            def close(self) :
+                pass
+        with tempfile.TemporaryDirectory() as directory :
+            inner = FakeFetcher()
+            fetcher = CachingFetcher(inner, directory, 3600)
+            status, headers, body = fetcher.fetch("http://example/a", { "User-Agent" : "Test" })
+            self.assertEqual((200, b"page"), (status, body))
+            self.assertFalse(fetcher.is_unchanged("http://example/a"))
+            status, headers, body = fetcher.fetch("http://example/a", { "User-Agent" : "Test" })
+            self.assertEqual((200, b"page"), (status, body))
+            self.assertEqual("utf-8", headers.get_content_charset())
+            self.assertTrue(fetcher.is_unchanged("http://example/a"))
+            self.assertEqual(1, len(requests))
+            fetcher = CachingFetcher(inner, directory, 0)
+            inner.status = 304
+            status, headers, body = fetcher.fetch("http://example/a", { "User-Agent" : "Test" })
+            self.assertEqual((200, b"page"), (status, body))
+            self.assertTrue(fetcher.is_unchanged("http://example/a"))
+            self.assertEqual('"v1"', requests[-1]["If-None-Match"])
+            self.assertEqual("Mon, 06 Oct 2025 10:00:00 GMT", requests[-1]["If-Modified-Since"])
+            self.assertEqual("Test", requests[-1]["User-Agent"])
+            inner.status = 200
+            fetcher.fetch("http://example/a", { "User-Agent" : "Test" })
+            self.assertFalse(fetcher.is_unchanged("http://example/a"))
+            fetcher.fetch("http://example/b", { "User-Agent" : "Test" })
+            self.assertFalse("If-None-Match" in requests[-1])
+            # a body that doesn't match its metadata, such as after a crash
+            # between replacing the two, isn't used
+            filename = os.path.join(directory, hashlib.sha256(b"http://example/a").hexdigest())
+            with open(filename + ".body", "wb") as f :
+                f.write(b"other")
+            inner.status = 304
+            fetcher.fetch("http://example/a", { "User-Agent" : "Test" })
+            self.assertFalse("If-None-Match" in requests[-1])
+
+    def test_cached_profile_outputs(self):
+        class FakeFetcher :
+            def __init__(self) :
+                self.page = synthetic_page(list(range(90, 0, -1))).encode("utf-8")
+                self.statuses = []
+            def fetch(self, url, headers) :
+                etag = '"{0}"'.format(len(self.page))
+                self.statuses.append(304 if headers.get("If-None-Match") == etag else 200)
+                return self.statuses[-1], parse_headers(io.BytesIO(
+                    'Content-Type: text/html; charset=utf-8\r\nETag: {0}\r\n\r\n'.format(etag).encode())), (
+                        self.page if self.statuses[-1] == 200 else b"")
+            def close(self) :
+                pass
+        with tempfile.TemporaryDirectory() as directory :
+            inner = FakeFetcher()
+            colors = {
+                "title" : "#58a6ff",
+                "border" : "rgba(56,139,253,0.4)",
+                "background" : "#010409",
+                "text" : "#c9d1d9"
+            }
+            configuration = {
+                "jsonOutputFile" : os.path.join(directory, "out.json"),
+                "svgConfig" : [ dict(colors, filename=os.path.join(directory, "a.svg")) ]
+            }
+            def run() :
+                bib.processProfile(configuration, "X", "Test", CachingFetcher(inner, os.path.join(directory, "cache")))
+            run()
+            self.assertTrue(os.path.isfile(os.path.join(directory, "a.svg")))
+            with patch.object(bib, "parseBibliometrics") as mocked :
+                run()
+                mocked.assert_not_called()
+            self.assertEqual([200, 304], inner.statuses)
+            # a new SVG in the configuration
+            configuration["svgConfig"].append(dict(colors, filename=os.path.join(directory, "b.svg")))
+            run()
+            self.assertTrue(os.path.isfile(os.path.join(directory, "b.svg")))
+            # a deleted SVG
+            os.remove(os.path.join(directory, "a.svg"))
+            run()
+            self.assertTrue(os.path.isfile(os.path.join(directory, "a.svg")))
+            self.assertEqual([200, 304, 304, 304], inner.statuses)
+            # a run that cached a changed page, but failed before its outputs
+            inner.page = synthetic_page(list(range(95, 0, -1))).encode("utf-8")
+            with patch.object(bib, "outputJSON", side_effect=OSError) :
+                with self.assertRaises(OSError) :
+                    run()
+            run()
+            self.assertEqual(304, inner.statuses[-1])
+            with open(configuration["jsonOutputFile"], "r") as f :
+                self.assertEqual(95, json.load(f)["most-cited"])
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(50, 5)
+        start = time.monotonic()
+        for i in range(5) :
+            bucket.acquire()
+        self.assertTrue(time.monotonic() - start < 0.05)
+        for i in range(10) :
+            bucket.acquire()
+        self.assertTrue(time.monotonic() - start >= 0.18)
+
+    def test_rate_limited_fetcher(self):
+        inProgress = {}
+        maxInProgress = {}
+        lock = threading.Lock()
+        class FakeFetcher :
+            def fetch(self, url, headers) :
+                host = url.split("/")[2]
+                with lock :
+                    inProgress[host] = inProgress.get(host, 0) + 1
+                    maxInProgress[host] = max(maxInProgress.get(host, 0), inProgress[host])
+                time.sleep(0.01)
+                with lock :
+                    inProgress[host] -= 1
+                return 200, None, url.encode()
+            def close(self) :
+                pass
+        fetcher = RateLimitedFetcher(FakeFetcher(), 100, 4, 2, 0.01)
+        urls = [ "http://host{0}/{1}".format(i % 2, i) for i in range(20) ]
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=10) as executor :
+            bodies = list(executor.map(lambda url : fetcher.fetch(url, {})[2], urls))
+        self.assertTrue(time.monotonic() - start >= 0.15)
+        self.assertEqual([ url.encode() for url in urls ], bodies)
+        self.assertEqual(["host0", "host1"], sorted(maxInProgress))
+        self.assertTrue(all(count <= 2 for count in maxInProgress.values()))
+
+    def test_retrying_fetcher(self):
+        class FakeFetcher :
+            def __init__(self, responses) :
+                self.responses = list(responses)
+                self.count = 0
+            def fetch(self, url, headers) :
+                self.count += 1
+                response = self.responses.pop(0)
+                if isinstance(response, Exception) :
+                    raise response
+                return response, parse_headers(io.BytesIO(
+                    b"Retry-After: 0\r\n\r\n" if response == 429 else b"\r\n")), b""
+            def close(self) :
+                pass
+        inner = FakeFetcher([503, ConnectionResetError(), 429, 200])
+        fetcher = RetryingFetcher(inner, 3, 0.001)
+        self.assertEqual(200, fetcher.fetch("http://example/", {})[0])
+        self.assertEqual(4, inner.count)
+        inner = FakeFetcher([503, 503, 503])
+        fetcher = RetryingFetcher(inner, 2, 0.001)
+        self.assertEqual(503, fetcher.fetch("http://example/", {})[0])
+        self.assertEqual(3, inner.count)
+        inner = FakeFetcher([404])
+        fetcher = RetryingFetcher(inner, 2, 0.001)
+        self.assertEqual(404, fetcher.fetch("http://example/", {})[0])
+        inner = FakeFetcher([ConnectionResetError()])
+        fetcher = RetryingFetcher(inner, 0, 0.001)
+        with self.assertRaises(ConnectionResetError) :
+            fetcher.fetch("http://example/", {})
+        inner = FakeFetcher([IncompleteRead(b"partial", 10), RemoteDisconnected(), asyncio.IncompleteReadError(b"", 10), 200])
+        fetcher = RetryingFetcher(inner, 3, 0.001)
+        self.assertEqual(200, fetcher.fetch("http://example/", {})[0])
+        self.assertEqual(4, inner.count)
+        self.assertEqual(5, fetcher._delay(0, "5"))
+        self.assertEqual(0, fetcher._delay(0, "Mon, 06 Oct 2025 10:00:00 GMT"))
+        fetcher = RetryingFetcher(inner, 3, 1, 6)
+        delay = fetcher._delay(3, None)
+        self.assertTrue(3 <= delay <= 6)
+        self.assertEqual(6, fetcher._delay(0, "86400"))
+        self.assertEqual(6, fetcher._delay(0, "Fri, 01 Jan 2100 00:00:00 GMT"))
+
+    def test_circuit_breaker(self):
+        breaker = CircuitBreaker(0.5, 4, 0.1)
+        for success in [True, False, True] :
+            breaker.record(success)
+        start = time.monotonic()
+        breaker.wait()
+        self.assertTrue(time.monotonic() - start < 0.05)
+        breaker.record(False)
+        breaker.wait()
+        self.assertTrue(time.monotonic() - start >= 0.1)
+        start = time.monotonic()
+        breaker.wait()
+        self.assertTrue(time.monotonic() - start < 0.05)
+
+    def test_is_m_quotient_current(self):
+        year = datetime.now().year - 25
+        self.assertTrue(bib.isMQuotientCurrent({ "h-index" : 25, "m-quotient" : 1.0 }, year))
+        self.assertFalse(bib.isMQuotientCurrent({ "h-index" : 25, "m-quotient" : 1.0 }, year - 1))
+        self.assertTrue(bib.isMQuotientCurrent({ "h-index" : 25 }, None))
+        self.assertFalse(bib.isMQuotientCurrent({ "h-index" : 25, "m-quotient" : 1.0 }, None))
+        self.assertFalse(bib.isMQuotientCurrent({}, None))
+
+    def test_needs_more_data(self):
+        metrics = {
+            "total-cites" : 4200,
+            "five-year-cites" : 6,
+            "h-index" : 5,
+            "i10-index" : 1
+        }
+        cites = [100, 90, 80, 70]
+        self.assertFalse(BibliometricCalculator.needs_more_data(metrics, cites, ["total-cites", "h-index"]))
+        self.assertFalse(BibliometricCalculator.needs_more_data(metrics, cites, ["h-median", "i1000-index"]))
+        self.assertTrue(BibliometricCalculator.needs_more_data(metrics, cites, ["e-index"]))
+        self.assertTrue(BibliometricCalculator.needs_more_data(metrics, [150, 120, 110, 100], ["h-median", "i100-index"]))
+        self.assertTrue(BibliometricCalculator.needs_more_data(metrics, cites, ["g-index"]))
+        self.assertTrue(BibliometricCalculator.needs_more_data(metrics, cites, ["w-index"]))
+        self.assertTrue(BibliometricCalculator.needs_more_data(metrics, [], ["most-cited"]))
+        cites = [100, 90, 80, 70, 10, 5]
+        for stats in [["e-index", "r-index", "a-index"], ["w-index"], ["i100-index"]]:
+            self.assertFalse(BibliometricCalculator.needs_more_data(metrics, cites, stats))
+        self.assertTrue(BibliometricCalculator.needs_more_data(metrics, cites, ["g-index"]))
+        self.assertFalse(BibliometricCalculator.needs_more_data(metrics, [5, 3, 1, 1, 1], ["g-index"]))
+        cites = [1000]*5
+        self.assertTrue(BibliometricCalculator.needs_more_data(metrics, cites, ["w-index"]))
+        self.assertTrue(BibliometricCalculator.needs_more_data(metrics, cites, ["i1000-index"]))
+        self.assertFalse(BibliometricCalculator.needs_more_data(metrics, cites, ["i10000-index"]))
+
+    def test_scan_page(self) :
+        with open("tests/testcase.html.txt", "r") as f :
+            page = f.read().replace('\n', '')
+        scraped, citesList = bib.scanPage(page)
+        self.assertEqual(23, len(scraped.pop("cites-per-year")))
+        self.assertEqual(
+            {
+                "total-cites" : 2052,
+                "five-year-cites" : 364,
+                "h-index" : 25,
+                "five-year-h-index" : 10,
+                "i10-index" : 33,
+                "five-year-i10-index" : 14
+            },
+            scraped)
+        scraped["cites-per-year"] = bib.scrapePage(page)["cites-per-year"]
+        self.assertEqual(bib.scrapePage(page), scraped)
+        self.assertEqual(bib.parse_cites_per_pub(page), citesList)
+        self.assertEqual(59, len(citesList))
+        metrics, i = bib.scanSummaryTable(page)
+        self.assertTrue(0 < i < page.find("gsc_a_ac gs_ibl"))
+        page = synthetic_page([228, 0, 12], (120, 60, 3, 2, 3, 2))
+        self.assertEqual(
+            ({
+                "total-cites" : 120,
+                "five-year-cites" : 60,
+                "h-index" : 3,
+                "five-year-h-index" : 2,
+                "i10-index" : 3,
+                "five-year-i10-index" : 2
+            }, [228, 12]),
+            bib.scanPage(page))
+        self.assertEqual(({}, []), bib.scanPage("<html></html>"))
+
+    def test_scan_page_bytes(self) :
+        with open("tests/testcase.html.txt", "rb") as f :
+            raw = f.read()
+        page = raw.decode("utf-8")
+        self.assertEqual(bib.scanPage(page), bib.scanPage(raw))
+        self.assertEqual(bib.scanPage(page), bib.scanPage(bytearray(raw)))
+        self.assertEqual(bib.parseBibliometrics(page, 2000), bib.parseBibliometrics(raw, 2000))
+        with tempfile.TemporaryDirectory() as directory :
+            filename = os.path.join(directory, "page.html.gz")
+            with open(filename, "wb") as f :
+                f.write(gzip.compress(raw))
+            self.assertEqual(raw, bib.readSavedPage(filename, True))
+            self.assertEqual([ raw ], bib.readSavedPages(filename, True))
+        server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = "http://127.0.0.1:{0}".format(server.server_address[1])
+        try :
+            with patch.object(bib, "getProfilePageUrl", lambda *args : base + "/gzip") :
+                self.assertEqual("/gzip Mozilla/5.0", bib.getScholarProfilePage("X"))
+                self.assertEqual(b"/gzip Mozilla/5.0", bib.getScholarProfilePage("X", raw=True))
+        finally :
+            server.shutdown()
+            server.server_close()
+
+    def test_streaming_parser(self) :
+        with open("tests/testcase.html.txt", "rb") as f :
+            raw = f.read()
+        expected = bib.scanPage(raw)
+        for size in [1, 3, 7, 100, 4096, len(raw)] :
+            parser = StreamingPageParser()
+            for i in range(0, len(raw), size) :
+                self.assertTrue(parser.feed(raw[i:i+size]))
+            self.assertEqual(expected, parser.close())
+        parser = StreamingPageParser(lambda metrics, cites : len(cites) >= 5)
+        fed = 0
+        while parser.feed(raw[fed:fed+1000]) :
+            fed += 1000
+        self.assertTrue(parser.stopped)
+        self.assertTrue(fed < raw.rfind(b"gsc_a_ac"))
+        self.assertEqual((expected[0], expected[1][:5]), parser.close())
+        self.assertFalse(parser.feed(b"more"))
+        parser.reset()
+        self.assertFalse(parser.feed(raw))
+        self.assertEqual((expected[0], expected[1][:5]), parser.close())
+        with tempfile.TemporaryDirectory() as directory :
+            with open(os.path.join(directory, "page1.html"), "wb") as f :
+                f.write(raw)
+            with open(os.path.join(directory, "page2.html.gz"), "wb") as f :
+                f.write(gzip.compress(raw))
+            parsers = bib.readSavedPages(directory, True, True)
+            self.assertEqual([expected, expected], [ p.close() for p in parsers ])
+
+    def test_streaming_fetch(self) :
+        server = StandInScholarServer(publications=250).start()
+        try :
+            for fetcher in [UrllibFetcher(), AsyncFetcher(1)] :
+                try :
+                    expected = bib.scanPage(bib.getScholarProfilePage("X", fetcher=fetcher, baseUrl=server.base_url))
+                    parser = bib.getScholarProfilePage("X", fetcher=fetcher, baseUrl=server.base_url, parser=StreamingPageParser())
+                    self.assertEqual(expected, parser.close())
+                    pages = bib.getScholarProfilePages("X", maxPages=3, workers=2,
+                        fetcher=fetcher, baseUrl=server.base_url, streaming=True)
+                    self.assertTrue(len(pages) > 1)
+                    self.assertEqual(expected[1], pages[0].cites)
+                    self.assertFalse(pages[0].stopped)
+                    pages = bib.getScholarProfilePages("X", maxPages=3, stats=["g-index"],
+                        fetcher=fetcher, baseUrl=server.base_url, streaming=True)
+                    self.assertTrue(pages[0].stopped)
+                    self.assertEqual(expected[1][:len(pages[0].cites)], pages[0].cites)
+                    pages = bib.getScholarProfilePages("X", maxPages=3, stats=["h-index", "most-cited"],
+                        fetcher=fetcher, baseUrl=server.base_url, streaming=True)
+                    self.assertEqual(1, len(pages))
+                    self.assertTrue(pages[0].stopped)
+                    self.assertEqual(expected[0], pages[0].metrics)
+                    self.assertEqual(expected[1][:1], pages[0].cites)
+                    # the connection of the stopped response isn't reused
+                    self.assertEqual(expected, bib.scanPage(
+                        bib.getScholarProfilePage("X", fetcher=fetcher, baseUrl=server.base_url)))
+                finally :
+                    fetcher.close()
+            with tempfile.TemporaryDirectory() as directory :
+                outputs = {}
+                for streaming in [False, True] :
+                    for include in [None, ["h-index", "total-cites"]] :
+                        configuration = {
+                            "scholarURL" : server.base_url,
+                            "maxPages" : 3,
+                            "streamingParser" : streaming,
+                            "jsonOutputFile" : os.path.join(directory, "X.json"),
+                            "svgConfig" : [ {
+                                "title" : "#58a6ff",
+                                "border" : "rgba(56,139,253,0.4)",
+                                "background" : "#010409",
+                                "text" : "#c9d1d9",
+                                "filename" : os.path.join(directory, "X.svg")
+                            } ]
+                        }
+                        if include != None :
+                            configuration["include"] = include
+                        fetcher = RetryingFetcher(UrllibFetcher(), 0)
+                        bib.processProfile(configuration, "X", "Test", fetcher)
+                        with open(os.path.join(directory, "X.json"), "r") as f :
+                            outputs[(streaming, include == None)] = json.load(f)
+                        os.remove(os.path.join(directory, "X.json"))
+                self.assertEqual(outputs[(False, True)], outputs[(True, True)])
+                # the JSON output includes all of the bibliometrics, so the
+                # stream isn't stopped for those included in the SVGs
+                self.assertEqual(outputs[(False, False)], outputs[(True, False)])
+                self.assertEqual(outputs[(False, True)], outputs[(True, False)])
+        finally :
+            server.stop()
+
+    def test_parse_publications(self) :
+        with open("tests/testcase.html.txt", "rb") as f :
+            raw = f.read()
+        table = bib.parsePublications(raw)
+        self.assertEqual(78, len(table))
+        self.assertEqual(
+            Publication("Article Title One", "A Lastname2, A Lastname1", "Some Journal", 2000, 228, "9963510449828341740"),
+            table[0])
+        self.assertEqual(
+            "15899858865637774246,11917864112545567564",
+            table[1].cluster)
+        self.assertEqual(Publication("Title", table[77].authors, "", 0, 0, ""), table[77])
+        self.assertEqual(list(table), list(bib.parsePublications(raw.decode("utf-8"))))
+        self.assertEqual(bib.parse_cites_per_pub(raw), table.cites_list())
+        self.assertEqual("i", table.cites.typecode)
+        venues = [ v for v in table.venues if v == "Journal" ]
+        self.assertTrue(len(venues) > 1 and all(v is venues[0] for v in venues))
+        page = synthetic_page([5, 3]).replace("Title 0", "Fish &amp; Chips")
+        bib.parsePublications(page, table)
+        self.assertEqual(80, len(table))
+        self.assertEqual(Publication("Fish & Chips", "A Lastname1", "Journal", 2001, 5, "0"), table[78])
+        self.assertEqual(table[79]._asdict(), table.to_records()[79])
+        combined = PublicationTable()
+        combined.extend(table)
+        self.assertEqual(list(table), list(combined))
+
+    def test_parse_publications_missing_fields(self) :
+        page = synthetic_page([5, 3, 2])
+        rows = page.split('<tr class="gsc_a_tr">')
+        rows[1] = rows[1].replace('<div class="gs_gray">Journal<span class="gs_oph">, 2001</span></div>', '')
+        rows[1] = rows[1].replace('<span class="gsc_a_h gsc_a_hc gs_ibl">2001</span>', '')
+        rows[2] = rows[2].replace('</tr>', '')
+        rows[2] = rows[2].replace('<a href="https://scholar.google.com/scholar?cites=1" class="gsc_a_ac gs_ibl">3</a>', '')
+        page = '<tr class="gsc_a_tr">'.join(rows)
+        table = bibliometrics.parsePublications(page)
+        self.assertEqual(
+            [
+                Publication("Title 0", "A Lastname1", "", 0, 5, "0"),
+                Publication("Title 1", "A Lastname1", "Journal", 2001, 0, ""),
+                Publication("Title 2", "A Lastname1", "Journal", 2001, 2, "2")
+            ],
+            list(table))
+        self.assertEqual(list(table), list(bib.parsePublications(page.encode("utf-8"))))
+
+    def test_cites_per_year(self) :
+        with open("tests/testcase.html.txt", "rb") as f :
+            raw = f.read()
+        firstYear, counts = parseCitesPerYear(raw)
+        self.assertEqual(2000, firstYear)
+        self.assertEqual("i", counts.typecode)
+        self.assertEqual(
+            [20, 39, 55, 84, 114, 154, 140, 137, 129, 120, 125, 88, 94, 80, 91, 100, 89, 78, 77, 55, 65, 71, 18],
+            list(counts))
+        self.assertEqual((firstYear, counts), parseCitesPerYear(raw.decode("utf-8")))
+        metrics = bib.parseBibliometrics(raw, None)
+        self.assertEqual(20, metrics["cites-per-year"]["2000"])
+        self.assertEqual(18, metrics["cites-per-year"]["2022"])
+        page = (
+            '<div class="gsc_md_hist_b"><span class="gsc_g_t">2019</span><span class="gsc_g_t">2020</span>'
+            '<span class="gsc_g_t">2021</span><a class="gsc_g_a" style="height:9px;z-index:3">'
+            '<span class="gsc_g_al">7</span></a><a class="gsc_g_a" style="height:9px;z-index:1">'
+            '<span class="gsc_g_al">5</span></a></div>'
+        )
+        self.assertEqual({ "2019" : 7, "2020" : 0, "2021" : 5 }, bib.scrapePage(page)["cites-per-year"])
+        self.assertEqual(None, parseCitesPerYear("<html></html>"))
+        self.assertFalse("cites-per-year" in bib.scrapePage(synthetic_page([3, 2])))
+        with tempfile.TemporaryDirectory() as directory :
+            filename = os.path.join(directory, "metrics.json")
+            bib.outputJSON(filename, metrics)
+            self.assertEqual(metrics["cites-per-year"], bib.readPreviousBibliometrics(filename)["cites-per-year"])
+
+    def test_summary_table_layout(self) :
+        page = synthetic_page([50, 40, 30], (120, 60, 3, 2, 3, 1))
+        rows = page[page.find("<tr>"):page.find("</tbody>")].split("</tr>")
+        reordered = page.replace("".join(rows), rows[2] + "</tr>" + rows[0] + "</tr>" + rows[1] + "</tr>")
+        self.assertEqual(bib.scrapePage(page), bib.scrapePage(reordered))
+        self.assertEqual(1, bib.scrapePage(reordered)["five-year-i10-index"])
+        with patch("builtins.print") as mocked :
+            scraped = bib.scrapePage(page.replace(">h-index<", ">Indice h<"))
+            self.assertTrue("Unrecognized row" in str(mocked.call_args))
+        self.assertEqual(bib.scrapePage(page), scraped)
+        with patch("builtins.print") as mocked :
+            scraped, i = bib.scanSummaryTable(page.replace(">60<", ">n/a<"))
+            self.assertTrue("column 3 of row 1" in " ".join(str(a) for a in mocked.call_args[0]))
+        self.assertEqual({ "total-cites" : 120 }, scraped)
+        parser = StreamingPageParser()
+        with patch("builtins.print") :
+            parser.feed(page.replace(">60<", ">n/a<").encode())
+        self.assertEqual(({ "total-cites" : 120 }, [50, 40, 30]), parser.close())
+
+    def test_parser_backends(self) :
+        with open("tests/testcase.html.txt", "rb") as f :
+            raw = f.read()
+        page = synthetic_page([50, 40, 30], (120, 60, 3, 2, 3, 1))
+        rows = page[page.find("<tr>"):page.find("</tbody>")].split("</tr>")
+        pages = [
+            raw,
+            raw.decode("utf-8"),
+            bytearray(raw),
+            page,
+            page.replace("".join(rows), rows[2] + "</tr>" + rows[0] + "</tr>" + rows[1] + "</tr>"),
+            page.replace(">60<", ">n/a<"),
+            "<html></html>"
+        ] + synthetic_pages(2, 250)
+        for p in pages :
+            with patch("builtins.print") :
+                expected = bib.scanPage(p)
+                for name, backend in parserBackends.items() :
+                    self.assertEqual(expected, backend().scan(p), name)
+                    self.assertEqual(bib.parse_cites_per_pub(p), backend().cites(p), name)
+        expected = bib.parseBibliometrics(raw, 2000, [pages[-1]])
+        for name in parserBackends :
+            parser = bib.getParser({ "parser" : name.upper() })
+            self.assertEqual(expected, bib.parseBibliometrics(raw, 2000, [pages[-1]], parser))
+        with patch("builtins.print"), self.assertRaises(SystemExit) :
+            bib.getParser({ "parser" : "lxml" })
+        stats = benchmark_parsers(pages, 1)
+        self.assertEqual(set(parserBackends), set(stats))
+        for name in stats :
+            self.assertEqual(1, stats[name]["agreement"])
+            self.assertEqual([], stats[name]["disagreements"])
+            self.assertTrue(stats[name]["pages-per-second"] > 0)
+
+    def test_reprocess(self) :
+        with open("tests/testcase.html.txt", "rb") as f :
+            raw = f.read()
+        with tempfile.TemporaryDirectory() as directory :
+            os.makedirs(os.path.join(directory, "2024", "06"))
+            os.makedirs(os.path.join(directory, ".hidden"))
+            files = {
+                os.path.join(directory, "2024", "06", "page.html") : raw,
+                os.path.join(directory, "2024", "page.html.gz") : gzip.compress(raw),
+                os.path.join(directory, "2024", "empty.html") : b"",
+                os.path.join(directory, "zzz.html") : synthetic_page([50, 40, 30]).encode(),
+                os.path.join(directory, ".hidden", "page.html") : raw
+            }
+            for filename, page in files.items() :
+                with open(filename, "wb") as f :
+                    f.write(page)
+            expected = [
+                os.path.join(directory, "zzz.html"),
+                os.path.join(directory, "2024", "empty.html"),
+                os.path.join(directory, "2024", "page.html.gz"),
+                os.path.join(directory, "2024", "06", "page.html")
+            ]
+            self.assertEqual(
+                [ ({ "page" : filename }, [ filename ]) for filename in expected ],
+                list(archived_pages([directory])))
+            output = io.StringIO()
+            self.assertEqual((4, 1), reprocess([directory], output, 2000, "regex", 2, 1))
+            results = [ json.loads(line) for line in output.getvalue().splitlines() ]
+            self.assertEqual(expected, [ result["page"] for result in results ])
+            self.assertTrue("total citations" in results[1]["error"])
+            self.assertFalse("metrics" in results[1])
+            with patch("builtins.print") :
+                metrics = bib.convertMetrics(bib.parseBibliometrics(raw, 2000))
+                self.assertEqual(metrics, results[2]["metrics"])
+                self.assertEqual(metrics, results[3]["metrics"])
+                self.assertEqual(
+                    bib.convertMetrics(bib.parseBibliometrics(files[expected[0]], 2000)),
+                    results[0]["metrics"]
+                )
+            # the scanner parses compressed pages as they are decompressed,
+            # without decompressing them into memory
+            with open(os.path.join(directory, "page.html.xz"), "wb") as f :
+                f.write(lzma.compress(raw))
+            with patch.object(bib, "decompressPage", side_effect=AssertionError) :
+                for filename in [ expected[2], os.path.join(directory, "page.html.xz") ] :
+                    line, failed = reprocess_page(filename, 2000, "scanner")
+                    self.assertFalse(failed)
+                    self.assertEqual(metrics, json.loads(line)["metrics"])
+
+    def test_reprocess_archive(self) :
+        first = synthetic_page(list(range(250, 150, -1))).encode()
+        second = synthetic_page([20, 10]).encode()
+        updated = synthetic_page(list(range(251, 151, -1))).encode()
+        start = datetime(2025, 6, 1, tzinfo=timezone.utc)
+        with tempfile.TemporaryDirectory() as directory :
+            archive = PageArchive(os.path.join(directory, "archive"))
+            # the pages of two profiles, retrieved together, and the second
+            # page retrieved before the first
+            archive.put("A", 100, second, start)
+            archive.put("A", 0, first, start + timedelta(seconds=1))
+            archive.put("B", 0, second, start + timedelta(seconds=2))
+            archive.put("A", 0, updated, start + timedelta(days=1))
+            archive.put("A", 100, second, start + timedelta(days=1, seconds=1))
+            archive.put("B", 0, second, start + timedelta(days=1))
+            archive.put("B", 200, second, start + timedelta(days=2))
+            # a page without the first page of its retrieval
+            archive.put("B", 200, second, start + timedelta(days=3))
+            self.assertEqual(
+                [
+                    ({ "profile" : "A", "fetched" : (start + timedelta(seconds=1)).isoformat() },
+                        archive.page_paths("A", start + timedelta(seconds=1))),
+                    ({ "profile" : "B", "fetched" : (start + timedelta(seconds=2)).isoformat() },
+                        archive.page_paths("B", start + timedelta(seconds=2))),
+                    ({ "profile" : "A", "fetched" : (start + timedelta(days=1)).isoformat() },
+                        archive.page_paths("A")),
+                    ({ "profile" : "B", "fetched" : (start + timedelta(days=1)).isoformat() },
+                        archive.page_paths("B")),
+                    ({ "profile" : "B", "fetched" : (start + timedelta(days=3)).isoformat() }, [])
+                ],
+                list(archived_pages([directory])))
+            for parser in [ "scanner", "regex" ] :
+                output = io.StringIO()
+                self.assertEqual((5, 1), reprocess([directory], output, 2000, parser, 2, 1))
+                results = [ json.loads(line) for line in output.getvalue().splitlines() ]
+                self.assertEqual(["A", "B", "A", "B", "B"], [ result["profile"] for result in results ])
+                self.assertFalse(any("page" in result for result in results))
+                with patch("builtins.print") :
+                    for result, pages in zip(results, [ [first, second], [second], [updated, second], [second] ]) :
+                        self.assertEqual(
+                            bib.convertMetrics(bib.parseBibliometrics(pages[0], 2000, pages[1:])),
+                            result["metrics"])
+                self.assertTrue("first page" in results[4]["error"])
+
+    def test_page_archive(self) :
+        pages = {
+            bib.getProfilePageUrl("X", 0) : synthetic_page(list(range(200, 100, -1))).encode(),
+            bib.getProfilePageUrl("X", 100) : synthetic_page([50, 40, 30]).encode(),
+            bib.getProfilePageUrl("Y", 0) : synthetic_page([50, 40, 30]).encode()
+        }
+        class FakeFetcher :
+            def fetch(self, url, headers) :
+                return (200, None, pages[url]) if url in pages else (404, None, b"")
+            def close(self) :
+                pass
+        with tempfile.TemporaryDirectory() as directory :
+            archive = PageArchive(os.path.join(directory, "archive"), "lzma")
+            fetcher = ArchivingFetcher(FakeFetcher(), archive)
+            parser = StreamingPageParser()
+            for url in pages :
+                self.assertEqual(pages[url], fetcher.fetch(url, {})[2])
+            self.assertEqual(404, fetcher.fetch(bib.getProfilePageUrl("Z", 0), {}, parser)[0])
+            self.assertEqual(200, fetcher.fetch(bib.getProfilePageUrl("X", 0), {}, parser)[0])
+            self.assertEqual(bib.scanPage(pages[bib.getProfilePageUrl("X", 0)]), parser.close())
+            entries = archive.entries()
+            self.assertEqual(["X", "X", "Y", "X"], [ e["profile"] for e in entries ])
+            self.assertEqual([0, 100, 0, 0], [ e["cstart"] for e in entries ])
+            self.assertEqual(3, len(archive.entries("X")))
+            objects = [
+                name for d, s, names in os.walk(os.path.join(directory, "archive", "objects")) for name in names
+            ]
+            self.assertEqual(2, len(objects))
+            self.assertTrue(all(name.endswith(".xz") for name in objects))
+            for e in entries :
+                self.assertEqual(pages[bib.getProfilePageUrl(e["profile"], e["cstart"])], archive.get(e["sha256"]))
+            self.assertEqual(None, archive.get("0" * 64))
+            changed = synthetic_page([300, 200, 100]).encode()
+            later = datetime.now(timezone.utc) + timedelta(days=1)
+            PageArchive(os.path.join(directory, "archive")).put("X", 0, changed, later)
+            self.assertEqual(2, archive.export("X", os.path.join(directory, "before"), datetime.now(timezone.utc)))
+            self.assertEqual(
+                [ pages[bib.getProfilePageUrl("X", 0)], pages[bib.getProfilePageUrl("X", 100)] ],
+                bib.readSavedPages(os.path.join(directory, "before"), True)
+            )
+            self.assertEqual(2, archive.export("X", os.path.join(directory, "after")))
+            self.assertEqual(
+                [ changed, pages[bib.getProfilePageUrl("X", 100)] ],
+                bib.readSavedPages(os.path.join(directory, "after"), True)
+            )
+            self.assertEqual(0, archive.export("X", os.path.join(directory, "none"), later - timedelta(days=30)))
+            self.assertEqual(1, archive.export("Y", os.path.join(directory, "y")))
+            self.assertTrue(isinstance(
+                bib.getFetcher({ "archiveDirectory" : os.path.join(directory, "archive") }),
+                ArchivingFetcher
+            ))
+            with patch("builtins.print"), self.assertRaises(SystemExit) :
+                bib.getFetcher({ "archiveDirectory" : directory, "archiveCompression" : "zip" })
+
     def test_parse(self) :
         with open("tests/testcase.html.txt", "r") as f :
             page = f.read().replace('\n', '')
             metrics = bib.parseBibliometrics(page, None)
             self.assertEqual(2052, metrics["total-cites"])
             self.assertEqual(364, metrics["five-year-cites"])
+            self.assertEqual(10, metrics["five-year-h-index"])
+            self.assertEqual(14, metrics["five-year-i10-index"])
             self.assertEqual(25, metrics["h-index"])
             self.assertEqual(33, metrics["i10-index"])
             self.assertEqual(44, metrics["g-index"])
@@ -372,6 +1614,12 @@ class TestBibiometrics(unittest.TestCase) :
             "Bibliometrics",
             stats
         )
+        self.assertEqual(image, bib.generateBibliometricsImage(
+            dict(metrics, **{ "cites-per-year" : { "2024" : 10 } }),
+            colors,
+            "Bibliometrics",
+            stats + ["cites-per-year", "unknown"]
+        ))
         if TestBibiometrics.printSampleImage :
             bib.outputImage(image, "images/bibliometrics2.svg")
             bib.outputImage(image2, "images/bibliometrics.svg")